@@ -0,0 +1,93 @@
+"""
+Incremental profile analysis: full recompute vs mergeable aggregates.
+
+Usage:
+    python3 benchmarks/bench_aggregates.py [--history 100000] [--new 200] [--profiles 100]
+
+Builds a --history tweet profile from tests/*_tweets.json (fresh status ids).
+A new scrape of --new tweets follows: a quarter are re-scrapes of recent
+tweets with more likes, the rest are new. The run times re-analysing the
+whole history (EngagementCorpus and a fresh ProfileAggregate) against
+AggregateStore.update with only the new scrape, then times merging
+--profiles stored states, and checks that concurrent updaters of one
+handle don't lose each other's tweets.
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.aggregates import AggregateStore, ProfileAggregate
+from profile_scraper.analytics import EngagementCorpus
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--history', type=int, default=100_000)
+    parser.add_argument('--new', type=int, default=200)
+    parser.add_argument('--profiles', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    raws = [t.get('raw_data') or t for f in sorted((ROOT / 'tests').glob('*_tweets.json'))
+            for t in json.loads(f.read_text(encoding='utf-8'))]
+    history = [dict(raw, internal_unique_id=str(10 ** 12 + i), username='bench')
+               for i, raw in enumerate(itertools.islice(itertools.cycle(raws), args.history))]
+    rescraped = [dict(t, likes=(t.get('likes') or 0) + rng.randint(1, 50)) for t in history[-(args.new // 4):]]
+    fresh = [dict(raw, internal_unique_id=str(2 * 10 ** 12 + i), username='bench')
+             for i, raw in enumerate(itertools.islice(itertools.cycle(raws), args.new - len(rescraped)))]
+    scrape = rescraped + fresh
+    everything = history[:-len(rescraped)] + scrape
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AggregateStore(str(Path(tmp) / 'aggregates.sqlite3'))
+        _, seed_s = timed(lambda: store.update('bench', history))
+
+        _, corpus_s = timed(lambda: EngagementCorpus.from_tweets(everything).summary())
+        _, fresh_s = timed(lambda: ProfileAggregate('bench').update(everything))
+        updated, update_s = timed(lambda: store.update('bench', scrape))
+        _, summary_s = timed(lambda: store.get('bench').summary())
+
+        full = ProfileAggregate('bench')
+        full.update(everything)
+        assert updated.tweets == full.tweets == len(everything)
+        assert updated.metrics['likes'].total == full.metrics['likes'].total
+
+        for p in range(args.profiles):
+            store.update(f'profile_{p}', [dict(t, internal_unique_id=f'{p}-{i}') for i, t in enumerate(raws)])
+        merged, merge_s = timed(lambda: store.merged([f'profile_{p}' for p in range(args.profiles)]))
+
+        # Six writers, disjoint slices of one handle: every tweet must land in the state
+        slices = [raws[i::6] for i in range(6)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda part: store.update('concurrent', part), slices))
+        concurrent = store.get('concurrent').tweets
+        unique = len({t.get('internal_unique_id') for t in raws})
+        assert concurrent == unique, f'concurrent updates lost tweets: {concurrent} of {unique}'
+
+    print(f'{len(everything):,} tweet history, new scrape of {len(scrape)} ({len(rescraped)} re-scraped)')
+    print(f'  seed store with history:                 {seed_s:8.2f} s')
+    print(f'  full recompute, EngagementCorpus:        {corpus_s * 1000:8.1f} ms')
+    print(f'  full recompute, ProfileAggregate:        {fresh_s * 1000:8.1f} ms')
+    print(f'  AggregateStore.update(new scrape):       {update_s * 1000:8.1f} ms  ({fresh_s / update_s:,.0f}x)')
+    print(f'  load state + summary:                    {summary_s * 1000:8.1f} ms')
+    print(f'  merge {args.profiles} stored profiles ({merged.tweets:,} tweets): {merge_s * 1000:8.1f} ms')
+    print(f'  6 concurrent updaters of one handle: {concurrent} of {unique} tweets counted')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Engagement analytics: per-dict Python loops vs the vectorized EngagementCorpus.
+
+Usage:
+    python3 benchmarks/bench_analytics.py [--tweets 1000000] [--authors 500]
+
+Builds a synthetic corpus of --tweets tweets over --authors authors (Pareto
+likes, views ~ 30x likes), then times per-author means, engagement rates and
+median/p90 engagements as plain loops over tweet dicts vs author_stats() and
+outlier_scores(), building the corpus from raw result dicts (column by column
+vs through Tweet records), and the columnar load path.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.analytics import EngagementCorpus, METRICS
+from profile_scraper.columnar import write_columnar
+from profile_scraper.tweet import COUNT_KEYS, Tweet
+
+
+def synthetic_corpus(n: int, n_authors: int, seed: int = 0) -> EngagementCorpus:
+    rng = np.random.default_rng(seed)
+    likes = (rng.pareto(1.2, n) * 10).astype(np.int64)
+    metrics = {
+        'likes': likes,
+        'retweets': likes // 5,
+        'replies': likes // 7,
+        'quotes': likes // 20,
+        'bookmarks': likes // 10,
+        'views': likes * 30 + rng.integers(0, 500, n),
+    }
+    return EngagementCorpus([f'author_{i}' for i in range(n_authors)], rng.integers(0, n_authors, n), metrics)
+
+
+def loop_stats(rows):
+    """The per-dict approach: group in Python, then aggregate per author"""
+    by_author = {}
+    for row in rows:
+        by_author.setdefault(row['author'], []).append(row)
+    out = {}
+    for author, tweets in by_author.items():
+        engagements = sorted(t['likes'] + t['retweets'] + t['replies'] + t['quotes'] + t['bookmarks'] for t in tweets)
+        views = sum(t['views'] for t in tweets)
+        out[author] = {
+            'likes_mean': sum(t['likes'] for t in tweets) / len(tweets),
+            'engagement_rate': sum(engagements) / views if views else None,
+            'p50': engagements[len(engagements) // 2],
+            'p90': engagements[int(len(engagements) * 0.9)],
+        }
+    return out
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tweets', type=int, default=1_000_000)
+    parser.add_argument('--authors', type=int, default=500)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.tweets, args.authors)
+    rows = [
+        dict(author=corpus.authors[code], **{name: int(corpus.metrics[name][i]) for name in METRICS})
+        for i, code in enumerate(corpus.author_codes.tolist())
+    ]
+
+    loop_s, loop = timed(lambda: loop_stats(rows))
+    stats_s, stats = timed(lambda: corpus.author_stats())
+    outlier_s, _ = timed(lambda: corpus.outlier_scores())
+    assert stats['likes_total'].dtype == np.int64
+    for author, row in loop.items():
+        code = corpus.authors.index(author)
+        assert abs(stats['likes_mean'][code] - row['likes_mean']) < 1e-9 * max(1.0, row['likes_mean'])
+
+    raws = [
+        dict(username=row['author'], internal_unique_id=str(i),
+             **{COUNT_KEYS[name][0]: row[name] for name in METRICS})
+        for i, row in enumerate(rows)
+    ]
+    dicts_s, from_dicts = timed(lambda: EngagementCorpus.from_tweets(raws))
+    records_s, from_records = timed(lambda: EngagementCorpus.from_tweets([Tweet.from_dict(r) for r in raws]))
+    for name in METRICS:
+        assert np.array_equal(from_dicts.metrics[name], corpus.metrics[name])
+        assert np.array_equal(from_records.metrics[name], corpus.metrics[name])
+    assert [from_dicts.authors[c] for c in from_dicts.author_codes[:1000]] == [r['author'] for r in rows[:1000]]
+    del raws
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_columnar([{'username': corpus.authors[c], 'internal_unique_id': str(i),
+                         'likes': int(corpus.metrics['likes'][i]), 'views_count': int(corpus.metrics['views'][i])}
+                        for i, c in enumerate(corpus.author_codes[:100_000].tolist())], tmp)
+        load_s, loaded = timed(lambda: EngagementCorpus.from_columnar(tmp))
+
+    print(f'{args.tweets:,} tweets, {args.authors} authors')
+    print(f'  per-dict loops (means, rate, p50/p90):      {loop_s:8.3f} s')
+    print(f'  author_stats (means, rates, p50/p90/p99):  {stats_s:8.3f} s  ({loop_s / stats_s:.0f}x)')
+    print(f'  outlier_scores (per-author robust z):      {outlier_s:8.3f} s')
+    print(f'  from_tweets via Tweet records:             {records_s:8.3f} s')
+    print(f'  from_tweets from raw dicts:                {dicts_s:8.3f} s  ({records_s / dicts_s:.1f}x)')
+    print(f'  loops + from_tweets + author_stats:        {loop_s:8.3f} s vs {dicts_s + stats_s:.3f} s'
+          f'  ({loop_s / (dicts_s + stats_s):.1f}x)')
+    print(f'  from_columnar ({len(loaded):,} tweets):          {load_s:8.3f} s')
+
+
+if __name__ == '__main__':
+    main()
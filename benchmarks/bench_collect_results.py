@@ -0,0 +1,72 @@
+"""
+Benchmark collect_results page throughput against a local mock /results endpoint.
+
+Usage:
+    python3 benchmarks/bench_collect_results.py [--pages 100] [--latency 0.05] [--windows 1 2 4 8]
+
+Each page request to the mock takes --latency seconds. The baseline row replays
+the old strictly-sequential loop (one page at a time, fixed 1 s sleep between
+pages) as an estimate so it does not actually sleep for minutes.
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from profile_scraper.mock_server import MockLobstrServer
+from profile_scraper.scraper import LobstrTwitterScraper
+from profile_scraper.transport import LobstrTransport
+
+
+def run_benchmark(pages, page_size, latency, windows, rate_limit):
+    server = MockLobstrServer(datasets={}, latency=latency, max_page_size=page_size, rate_limit=rate_limit).start()
+    server.add_run([
+        {'id': i, 'username': 'bench_user', 'content': f'tweet {i}', 'likes': i}
+        for i in range(pages * page_size)
+    ], run_id='bench-run')
+
+    rows = []
+    # Old loop: every page waited for the previous one plus a fixed 1 s sleep
+    baseline = pages * (latency + 1.0)
+    rows.append(('sequential + sleep(1) (estimated)', pages, baseline))
+
+    for window in windows:
+        # Client-side limiter out of the way: measure prefetch vs the mock's limits
+        scraper = LobstrTwitterScraper('bench-key', prefetch_window=window,
+                                       transport=LobstrTransport(rate=10_000, burst=10_000),
+                                       base_url=server.base_url)
+        start = time.perf_counter()
+        results = scraper.collect_results('bench-run', page_size=page_size)
+        elapsed = time.perf_counter() - start
+        assert [r['id'] for r in results] == list(range(pages * page_size)), 'pages out of order'
+        rows.append((f'prefetch window={window}', pages, elapsed))
+
+    server.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per mock page request')
+    parser.add_argument('--windows', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--rate-limit', type=int, default=0, help='mock requests/second (0 = unlimited)')
+    args = parser.parse_args()
+
+    # collect_results prints per page; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = run_benchmark(args.pages, args.page_size, args.latency, args.windows, args.rate_limit)
+
+    print(f"{'mode':<36} {'pages':>6} {'seconds':>9} {'pages/s':>9}")
+    print('-' * 63)
+    for mode, pages, elapsed in rows:
+        print(f'{mode:<36} {pages:>6} {elapsed:>9.2f} {pages / elapsed:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
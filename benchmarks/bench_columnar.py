@@ -0,0 +1,81 @@
+"""
+Load time: pretty-printed JSON vs the columnar corpus format.
+
+Usage:
+    python3 benchmarks/bench_columnar.py [--copies 200]
+
+Builds a corpus by repeating the tweets in tests/*_tweets.json --copies times,
+writes it both as indent=2 JSON (today's format) and with write_columnar, then
+times loading everything vs loading just the metric columns.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.columnar import read_columnar, write_columnar
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--copies', type=int, default=200)
+    args = parser.parse_args()
+
+    tweets = []
+    for path in sorted((ROOT / 'tests').glob('*_tweets.json')):
+        tweets.extend(json.loads(path.read_text(encoding='utf-8')))
+    tweets = tweets * args.copies
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / 'corpus.json'
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(tweets, f, indent=2, ensure_ascii=False)
+        corpus = write_columnar(tweets, Path(tmp) / 'corpus.cols')
+
+        metrics = ['likes', 'retweets', 'reply_count', 'quote_count', 'views_count', 'bookmarks_count']
+
+        def load_json():
+            with open(json_path, encoding='utf-8') as f:
+                json.load(f)
+
+        def load_metrics():
+            cols = read_columnar(corpus, columns=metrics, mmap=False)
+            return sum(int(c.sum()) for c in cols.values())
+
+        def load_all():
+            read_columnar(corpus, mmap=False)
+
+        rows = [
+            ('json.load (indent=2)', json_path.stat().st_size, timed(load_json)),
+            ('columnar, all columns', dir_size(corpus), timed(load_all)),
+            ('columnar, 6 metric columns', None, timed(load_metrics)),
+        ]
+
+    print(f'{len(tweets):,} tweets')
+    print(f"{'mode':<30} {'size MB':>9} {'load ms':>10}")
+    print('-' * 51)
+    for mode, size, seconds in rows:
+        size_txt = f'{size / 1e6:>9.1f}' if size else f"{'':>9}"
+        print(f'{mode:<30} {size_txt} {seconds * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
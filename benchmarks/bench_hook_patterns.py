@@ -0,0 +1,73 @@
+"""
+Hook extraction: one regex per template vs HookMatcher's single pass.
+
+Usage:
+    python3 benchmarks/bench_hook_patterns.py [--tweets 200000] [files...]   # defaults to tests/*_tweets.json
+
+Repeats the first lines of the saved tweets up to --tweets lines. The
+baseline matches each template's prefix and phrase regexes one by one. Both
+must name the same templates for every line (the run fails on the first line
+they disagree on). It then times template matching alone and a full
+HookExtractor pass (normalization, matching, per-author tallies).
+"""
+import argparse
+import itertools
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.hook_patterns import HOOK_TEMPLATES, HookExtractor, HookMatcher, first_line
+from profile_scraper.tweet import Tweet
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--tweets', type=int, default=200_000)
+    args = parser.parse_args()
+
+    files = args.files or sorted(str(p) for p in (ROOT / 'tests').glob('*_tweets.json'))
+    records = [Tweet.from_dict(t) for f in files for t in json.loads(Path(f).read_text(encoding='utf-8'))]
+    records = list(itertools.islice(itertools.cycle(records), args.tweets))
+    lines = [first_line(r.content) for r in records]
+
+    separate = [
+        (t.name,
+         re.compile(t.prefix) if t.prefix else None,
+         re.compile(r"(?<![\w'-])(?:%s)(?![\w'-])" % '|'.join(map(re.escape, t.phrases))) if t.phrases else None)
+        for t in HOOK_TEMPLATES
+    ]
+    matcher = HookMatcher()
+
+    def per_template():
+        return [[name for name, prefix, phrases in separate
+                 if line and ((prefix and prefix.match(line)) or (phrases and phrases.search(line)))]
+                for line in lines]
+
+    loop_names, loop_s = timed(per_template)
+    combined_names, combined_s = timed(lambda: [matcher.match_line(line) for line in lines])
+    for line, expected, got in zip(lines, loop_names, combined_names):
+        assert expected == got, f'{line!r}: per-template regexes {expected}, HookMatcher {got}'
+    extractor, extract_s = timed(lambda: HookExtractor().add(records))
+
+    print(f'{len(lines):,} tweets, {len(HOOK_TEMPLATES)} templates')
+    print(f'  regex per template:                   {loop_s:7.3f} s')
+    print(f'  HookMatcher (one pass):               {combined_s:7.3f} s  ({loop_s / combined_s:.1f}x, '
+          f'same templates on every line)')
+    print(f'  HookExtractor.add (end to end):       {extract_s:7.3f} s  '
+          f'({len(lines) / extract_s:,.0f} tweets/s, {extractor.tweets - extractor.unmatched:,} matched)')
+
+
+if __name__ == '__main__':
+    main()
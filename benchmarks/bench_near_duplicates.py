@@ -0,0 +1,97 @@
+"""
+Near-duplicate detection: MinHash/LSH clustering vs all-pairs Jaccard.
+
+Usage:
+    python3 benchmarks/bench_near_duplicates.py [--tweets 200000] [--dup-rate 0.1] [--threshold 0.7]
+
+Builds --tweets synthetic tweets of 20-40 words drawn from the vocabulary of
+tests/*_tweets.json. A --dup-rate share of them are reposts: an earlier tweet
+with one or two words changed. The run times signatures, indexing and
+clustering, reports recall of the planted reposts and false merges, and
+extrapolates all-pairs exact Jaccard from a 2,000-tweet sample.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.near_duplicates import NearDuplicateIndex, jaccard, shingles
+
+
+def synthetic_corpus(n: int, dup_rate: float, seed: int = 0):
+    """(texts, planted) with planted[i] = index of the tweet i reposts, or None"""
+    rng = random.Random(seed)
+    files = sorted((ROOT / 'tests').glob('*_tweets.json'))
+    words = sorted({w for f in files for t in json.loads(f.read_text(encoding='utf-8'))
+                    for w in ((t.get('raw_data') or t).get('content') or '').split()})
+    texts, planted = [], []
+    for i in range(n):
+        if i and rng.random() < dup_rate:
+            source = rng.randrange(i)
+            edited = texts[source].split()
+            for _ in range(rng.randint(1, 2)):
+                edited[rng.randrange(len(edited))] = rng.choice(words)
+            texts.append(' '.join(edited))
+            planted.append(source)
+        else:
+            texts.append(' '.join(rng.choice(words) for _ in range(rng.randint(20, 40))))
+            planted.append(None)
+    return texts, planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tweets', type=int, default=200_000)
+    parser.add_argument('--dup-rate', type=float, default=0.1)
+    parser.add_argument('--threshold', type=float, default=0.7)
+    args = parser.parse_args()
+
+    texts, planted = synthetic_corpus(args.tweets, args.dup_rate)
+    index = NearDuplicateIndex(args.threshold)
+
+    started = time.perf_counter()
+    signatures = index.hasher.signatures(texts)
+    signature_s = time.perf_counter() - started
+    started = time.perf_counter()
+    index.add(texts)
+    add_s = time.perf_counter() - started
+    started = time.perf_counter()
+    clusters = index.cluster()
+    cluster_s = time.perf_counter() - started
+    assert (index.signatures == signatures).all()
+
+    group = {}
+    for number, members in enumerate(clusters):
+        for i in members:
+            group[i] = number
+    reposts = [(i, source) for i, source in enumerate(planted) if source is not None]
+    similar = [(i, s) for i, s in reposts if jaccard(shingles(texts[i]), shingles(texts[s])) >= args.threshold]
+    found = sum(1 for i, s in similar if i in group and group.get(i) == group.get(s))
+    false_merges = sum(1 for members in clusters for i in members[1:]
+                       if jaccard(shingles(texts[members[0]]), shingles(texts[i])) < args.threshold / 2)
+
+    sample = 2_000
+    sample_shingles = [shingles(t) for t in texts[:sample]]
+    started = time.perf_counter()
+    for a in range(sample):
+        for b in range(a + 1, sample):
+            jaccard(sample_shingles[a], sample_shingles[b])
+    pairs_s = (time.perf_counter() - started) * (args.tweets / sample) ** 2
+
+    print(f'{args.tweets:,} tweets, {len(reposts):,} planted reposts, '
+          f'{index.bands} bands x {index.rows} rows (threshold {args.threshold})')
+    print(f'  MinHash signatures:        {signature_s:8.2f} s')
+    print(f'  add (signatures + LSH):    {add_s:8.2f} s')
+    print(f'  cluster:                   {cluster_s:8.2f} s  ({len(clusters):,} clusters)')
+    print(f'  recall (reposts >= threshold): {found / max(1, len(similar)):.1%} of {len(similar):,}')
+    print(f'  members below threshold/2: {false_merges}')
+    print(f'  all-pairs Jaccard (extrapolated): {pairs_s / 3600:,.1f} h')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+End-to-end scrape pipeline benchmark against the offline mock Lobstr API.
+
+Usage:
+    python3 benchmarks/bench_pipeline.py [--out results.json] [--repeat 3]
+    python3 benchmarks/bench_pipeline.py --compare baseline.json [--threshold 0.2]
+    python3 benchmarks/bench_pipeline.py --scenarios tweets_5 profiles_10
+
+Every scenario runs the real client (squid setup, launch, polling, result
+collection) in a fresh subprocess against profile_scraper.mock_server, and
+records wall-clock seconds, HTTP calls per endpoint (as seen by the mock),
+peak RSS of the client process, tweets/s and the estimate_cost() figure.
+
+--compare exits non-zero if any scenario's seconds, HTTP calls or peak RSS
+grew by more than --threshold (a fraction) against a previous --out file.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.mock_server import MockLobstrServer
+
+# name -> (method, handles, tweets requested); handles without a saved
+# dataset get synthetic tweets from the mock
+SCENARIOS = {
+    'tweets_5': ('scrape_tweets', ['samruddhi_mokal'], 5),
+    'tweets_150': ('scrape_tweets', ['dharmeshba'], 150),
+    'tweets_10k': ('scrape_tweets', ['bench_bulk'], 10_000),
+    'profiles_1': ('scrape_tweets', ['bench_p0'], 20),
+    'profiles_10': ('scrape_tweets', [f'bench_p{i}' for i in range(10)], 200),
+    'profiles_10_batch': ('scrape_profiles', [f'bench_p{i}' for i in range(10)], 20),
+}
+COMPARED = ('seconds', 'http_calls_total', 'peak_rss_mb')
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    # VmHWM resets on exec; ru_maxrss can carry the forking parent's peak
+    status = Path('/proc/self/status')
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def run_scenario(name: str, base_url: str) -> dict:
+    """Child process: run one scenario and return its client-side metrics"""
+    from profile_scraper.scraper import LobstrTwitterScraper
+
+    method, handles, count = SCENARIOS[name]
+    scraper = LobstrTwitterScraper('bench-key', base_url=base_url)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if method == 'scrape_profiles':
+            results = scraper.scrape_profiles(handles, max_results_per_profile=count)
+            tweets = sum(len(v) for v in results.values())
+        else:
+            tweets = len(scraper.scrape_tweets({
+                'searchTerms': [f'from:{h}' for h in handles],
+                'maxItems': count,
+            }))
+    seconds = time.perf_counter() - start
+    return {
+        'seconds': seconds,
+        'tweets': tweets,
+        'tweets_per_second': tweets / seconds if seconds else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'estimated_cost': scraper.estimate_cost(tweets),
+    }
+
+
+def measure(name: str, server: MockLobstrServer) -> dict:
+    """Run a scenario in a fresh interpreter so peak RSS is its own"""
+    before = server.call_counts()
+    proc = subprocess.run(
+        [sys.executable, __file__, '--child', name, '--base-url', server.base_url],
+        capture_output=True, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    after = server.call_counts()
+    calls = {k: after[k] - before.get(k, 0) for k in after if after[k] - before.get(k, 0)}
+    result['http_calls'] = dict(sorted(calls.items()))
+    result['http_calls_total'] = sum(calls.values())
+    return result
+
+
+def run_all(names, repeat: int, latency: float, results_per_second: float) -> dict:
+    largest = max(SCENARIOS[n][2] for n in names)
+    scenarios = {}
+    with MockLobstrServer(latency=latency, results_per_second=results_per_second,
+                          synthetic_count=largest, slots=1000) as server:
+        for name in names:
+            runs = [measure(name, server) for _ in range(repeat)]
+            # Median run by wall clock; calls and RSS are from that same run
+            runs.sort(key=lambda r: r['seconds'])
+            scenarios[name] = dict(runs[len(runs) // 2], seconds_all=[r['seconds'] for r in runs])
+            row = scenarios[name]
+            print(f"{name:<18} {row['tweets']:>7} {row['seconds']:>8.2f} {row['tweets_per_second']:>10.0f} "
+                  f"{row['http_calls_total']:>6} {row['peak_rss_mb']:>8.1f} {row['estimated_cost']:>8.4f}",
+                  file=sys.stderr)
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'mock_latency': latency,
+            'mock_results_per_second': results_per_second,
+        },
+        'scenarios': scenarios,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Metrics that regressed by more than threshold (fraction)"""
+    regressions = []
+    for name, row in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        for metric in COMPARED:
+            old, new = base.get(metric), row.get(metric)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f'{name}.{metric}: {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100:.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.02, help='mock seconds per request')
+    parser.add_argument('--results-per-second', type=float, default=0.0,
+                        help='mock run progress speed (0 = runs finish instantly)')
+    parser.add_argument('--out', help='write results JSON here')
+    parser.add_argument('--compare', help='baseline JSON from a previous --out')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed regression fraction')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.base_url)))
+        return
+
+    print(f"{'scenario':<18} {'tweets':>7} {'seconds':>8} {'tweets/s':>10} {'calls':>6} {'rss MB':>8} {'cost $':>8}",
+          file=sys.stderr)
+    print('-' * 71, file=sys.stderr)
+    report = run_all(args.scenarios, args.repeat, args.latency, args.results_per_second)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f'Results written to {args.out}', file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f'❌ {len(regressions)} regression(s) over {args.threshold:.0%}:', file=sys.stderr)
+            for line in regressions:
+                print(f'   {line}', file=sys.stderr)
+            sys.exit(1)
+        print(f'✅ No regressions over {args.threshold:.0%}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
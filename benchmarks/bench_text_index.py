@@ -0,0 +1,89 @@
+"""
+Tweet text index: build, append, compact and top-k query latency.
+
+Usage:
+    python3 benchmarks/bench_text_index.py [--tweets 200000] [--batch 20000] [files...]   # defaults to tests/*_tweets.json
+
+Cycles the saved tweets up to --tweets tweets with fresh status ids and
+jittered likes, indexes them in --batch sized appends (one segment each),
+compacts, then times queries ("tweets containing these terms, ranked by
+likes") against a linear scan of the tweet dicts.
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.text_index import TweetIndex, terms
+
+QUERIES = ['ai', 'claude n8n', 'founders', 'how to', 'absolutely wild', 'india startups']
+
+
+def synthetic_tweets(files, n: int, seed: int = 0):
+    rng = random.Random(seed)
+    raws = [t.get('raw_data') or t for f in files for t in json.loads(Path(f).read_text(encoding='utf-8'))]
+    for i, raw in enumerate(itertools.islice(itertools.cycle(raws), n)):
+        yield dict(raw, internal_unique_id=str(10 ** 12 + i), likes=int((raw.get('likes') or 0) * rng.random() * 2))
+
+
+def disk_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--tweets', type=int, default=200_000)
+    parser.add_argument('--batch', type=int, default=20_000)
+    args = parser.parse_args()
+
+    files = args.files or sorted(str(p) for p in (ROOT / 'tests').glob('*_tweets.json'))
+    tweets = list(synthetic_tweets(files, args.tweets))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = TweetIndex(tmp, max_segments=64)
+        started = time.perf_counter()
+        for start in range(0, len(tweets), args.batch):
+            index.add(tweets[start:start + args.batch])
+        add_s = time.perf_counter() - started
+        segments = len(index.segments)
+        started = time.perf_counter()
+        index.compact()
+        compact_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = TweetIndex(tmp)
+        open_ms = (time.perf_counter() - started) * 1000
+
+        print(f'{len(index):,} tweets, {disk_bytes(Path(tmp)) / 1e6:.1f} MB on disk')
+        print(f'  add ({segments} appends of {args.batch:,}):   {add_s:7.2f} s  ({len(tweets) / add_s:,.0f} tweets/s)')
+        print(f'  compact:                           {compact_s:7.2f} s')
+        print(f'  open (memory-mapped):              {open_ms:7.2f} ms')
+        print(f'  {"query":<18}{"hits":>9}{"index p50":>12}{"index p99":>12}{"scan":>10}')
+        for query in QUERIES:
+            wanted = terms(query)
+            latencies = []
+            for _ in range(200):
+                started = time.perf_counter()
+                hits = index.search(query, k=10, sort='likes')
+                latencies.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            matches = [t for t in tweets if wanted <= terms(t.get('content') or '')]
+            matches.sort(key=lambda t: t['likes'], reverse=True)
+            scan_ms = (time.perf_counter() - started) * 1000
+            assert [h['likes'] for h in hits] == [t['likes'] for t in matches[:10]]
+            latencies.sort()
+            print(f'  {query:<18}{len(matches):>9,}{statistics.median(latencies):>10.3f}ms'
+                  f'{latencies[int(len(latencies) * 0.99)]:>10.3f}ms{scan_ms:>8.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
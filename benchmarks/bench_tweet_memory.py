@@ -0,0 +1,59 @@
+"""
+Memory per tweet: standard dict format vs compact Tweet records.
+
+Usage:
+    python3 benchmarks/bench_tweet_memory.py [files...]   # defaults to tests/*_tweets.json
+
+Measures bytes retained (tracemalloc) by each representation of the same
+tweets after everything else has been freed, and checks that records rebuild
+the standard dicts exactly.
+"""
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from profile_scraper.tweet import Tweet
+
+
+def retained_bytes(build):
+    """Bytes still allocated after build() returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del obj
+    return after - before
+
+
+def main():
+    files = [Path(f) for f in sys.argv[1:]] or sorted((ROOT / 'tests').glob('*_tweets.json'))
+
+    print(f"{'file':<34} {'tweets':>6} {'dicts B/tweet':>14} {'records B/tweet':>16} {'+raw B/tweet':>13}")
+    print('-' * 87)
+    for path in files:
+        text = path.read_text(encoding='utf-8')
+        tweets = json.loads(text)
+        count = len(tweets)
+        # Records must rebuild the standard dicts they were made from
+        assert all(Tweet.from_dict(t).to_dict() == t for t in tweets), f'{path.name}: lossy round trip'
+
+        as_dicts = retained_bytes(lambda: json.loads(text))
+        as_records = retained_bytes(lambda: [Tweet.from_dict(t) for t in json.loads(text)])
+        as_records_raw = retained_bytes(lambda: [Tweet.from_dict(t, keep_raw=True) for t in json.loads(text)])
+
+        print(f'{path.name:<34} {count:>6} {as_dicts / count:>14,.0f} '
+              f'{as_records / count:>16,.0f} {as_records_raw / count:>13,.0f}')
+
+
+if __name__ == '__main__':
+    main()
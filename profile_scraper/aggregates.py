@@ -0,0 +1,465 @@
+"""
+Mergeable streaming aggregates per profile
+ProfileAggregate keeps what an engagement analysis needs: counts, sums and
+sums of squares per metric, quantile sketches, a top-k heap of tweets and
+per-hook-template moments. It does this without keeping the tweets, so a
+re-scraped profile only pays for its new tweets and profiles combine by
+merging states.
+
+Re-scraped tweets carry fresher metrics; each tweet's counted values
+(its contribution) are remembered, retracted and re-added, so counts never
+double. AggregateStore keeps states and contributions in SQLite and only
+reads the contributions of the tweets being updated.
+"""
+import heapq
+import json
+import math
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple, Union
+
+from .analytics import ENGAGEMENT_METRICS, METRICS
+from .hook_patterns import HookMatcher, first_line
+from .tweet import Tweet
+
+DEFAULT_AGGREGATE_PATH = Path.home() / '.cache' / 'profile_scraper' / 'aggregates.sqlite3'
+
+# Per-tweet values in METRICS order, plus the hook templates the tweet matched
+Contribution = Tuple[Tuple[int, ...], Tuple[str, ...]]
+# Values with a quantile sketch (per-tweet metrics plus the two derived ones)
+SKETCHED = ('engagements', 'engagement_rate', 'likes', 'views')
+
+
+class Moments:
+    """Count, sum and sum of squares (mean/variance); min/max only ever widen"""
+
+    __slots__ = ('count', 'total', 'sum_sq', 'min', 'max')
+
+    def __init__(self, count: int = 0, total: float = 0, sum_sq: float = 0, min: float = None, max: float = None):
+        self.count, self.total, self.sum_sq, self.min, self.max = count, total, sum_sq, min, max
+
+    def add(self, x: float):
+        self.count += 1
+        self.total += x
+        self.sum_sq += x * x
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    def remove(self, x: float):
+        """Retract a value added earlier (min/max keep covering it)"""
+        self.count -= 1
+        self.total -= x
+        self.sum_sq -= x * x
+
+    def merge(self, other: 'Moments') -> 'Moments':
+        self.count += other.count
+        self.total += other.total
+        self.sum_sq += other.sum_sq
+        for name, pick in (('min', min), ('max', max)):
+            theirs = getattr(other, name)
+            if theirs is not None:
+                ours = getattr(self, name)
+                setattr(self, name, theirs if ours is None else pick(ours, theirs))
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance"""
+        if not self.count:
+            return None
+        return max(0.0, self.sum_sq / self.count - (self.total / self.count) ** 2)
+
+    @property
+    def std(self) -> Optional[float]:
+        return None if self.variance is None else math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Moments':
+        return cls(**data)
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch for non-negative values (DDSketch style)
+
+    Values fall into logarithmic buckets of width gamma = (1 + a) / (1 - a),
+    so every quantile is within relative error a of a true value. Buckets are
+    plain counts: adding, retracting and merging are exact.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _bucket(self, x: float) -> int:
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def add(self, x: float, n: int = 1):
+        self.count += n
+        if x <= 0:
+            self.zeros += n
+        else:
+            bucket = self._bucket(x)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + n
+
+    def remove(self, x: float):
+        self.add(x, -1)
+        if x > 0 and not self.buckets[self._bucket(x)]:
+            del self.buckets[self._bucket(x)]
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        if other.gamma != self.gamma:
+            raise ValueError('Cannot merge sketches with different relative accuracy')
+        self.count += other.count
+        self.zeros += other.zeros
+        for bucket, n in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + n
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None when empty"""
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if rank < seen:
+                return 2 * self.gamma ** bucket / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'relative_accuracy': self.relative_accuracy, 'zeros': self.zeros, 'count': self.count,
+                'buckets': {str(b): n for b, n in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data['relative_accuracy'])
+        sketch.zeros, sketch.count = data['zeros'], data['count']
+        sketch.buckets = {int(b): n for b, n in data['buckets'].items()}
+        return sketch
+
+
+class TopK:
+    """
+    The k highest-scoring items, re-scorable by key
+
+    A min-heap of (score, key) picks the entry to evict. Re-scored items push
+    a fresh heap entry, and stale ones are skipped when they surface.
+    """
+
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.items: Dict[str, Tuple[float, Any]] = {}       # key -> (score, payload)
+        self._heap: List[Tuple[float, str]] = []
+
+    def offer(self, key: str, score: float, payload: Any = None):
+        if key in self.items:
+            self.items[key] = (score, payload)
+            heapq.heappush(self._heap, (score, key))
+        elif len(self.items) < self.k:
+            self.items[key] = (score, payload)
+            heapq.heappush(self._heap, (score, key))
+        elif score > self._min_score():
+            evicted = heapq.heappop(self._heap)[1]
+            del self.items[evicted]
+            self.items[key] = (score, payload)
+            heapq.heappush(self._heap, (score, key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(score, key) for key, (score, _) in self.items.items()]
+            heapq.heapify(self._heap)
+
+    def _min_score(self) -> float:
+        # Drop heap entries whose item was re-scored or evicted since
+        while self._heap[0][1] not in self.items or self.items[self._heap[0][1]][0] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+    def merge(self, other: 'TopK') -> 'TopK':
+        for key, (score, payload) in other.items.items():
+            self.offer(key, score, payload)
+        return self
+
+    def ranked(self) -> List[Tuple[str, float, Any]]:
+        """(key, score, payload), best first"""
+        return sorted(((key, score, payload) for key, (score, payload) in self.items.items()),
+                      key=lambda item: (-item[1], item[0]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'k': self.k, 'items': [[key, score, payload] for key, score, payload in self.ranked()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TopK':
+        top = cls(data['k'])
+        for key, score, payload in data['items']:
+            top.offer(key, score, payload)
+        return top
+
+
+class ProfileAggregate:
+    """
+    Running engagement statistics for one profile (or a merge of several)
+
+    Attributes:
+        metrics: Moments per metric, plus 'engagements' and 'engagement_rate'
+        sketches: QuantileSketch per SKETCHED value
+        top: TopK tweets by engagements (payload: author and first line)
+        hooks: Moments of engagements per matched hook template
+        counted: status id -> contribution already counted; kept in memory
+                 by default, AggregateStore supplies it per update instead
+    """
+
+    def __init__(self, handle: str = '', k: int = 10, relative_accuracy: float = 0.01,
+                 matcher: HookMatcher = None):
+        self.handle = handle
+        self.metrics: Dict[str, Moments] = {name: Moments() for name in (*METRICS, 'engagements', 'engagement_rate')}
+        self.sketches = {name: QuantileSketch(relative_accuracy) for name in SKETCHED}
+        self.top = TopK(k)
+        self.hooks: Dict[str, Moments] = {}
+        self.counted: MutableMapping[str, Contribution] = {}
+        self.matcher = matcher or HookMatcher()
+        self.updated_at = 0.0
+
+    @property
+    def tweets(self) -> int:
+        return self.metrics['likes'].count
+
+    def _values(self, values: Tuple[int, ...]) -> Dict[str, float]:
+        named = dict(zip(METRICS, values))
+        named['engagements'] = sum(named[name] for name in ENGAGEMENT_METRICS)
+        if named['views'] > 0:
+            named['engagement_rate'] = named['engagements'] / named['views']
+        return named
+
+    def _apply(self, item: Contribution, sign: int):
+        values, templates = item
+        named = self._values(values)
+        for name, value in named.items():
+            moments = self.metrics[name]
+            moments.add(value) if sign > 0 else moments.remove(value)
+        for name in SKETCHED:
+            if name in named:
+                sketch = self.sketches[name]
+                sketch.add(named[name]) if sign > 0 else sketch.remove(named[name])
+        for template in templates:
+            moments = self.hooks.setdefault(template, Moments())
+            moments.add(named['engagements']) if sign > 0 else moments.remove(named['engagements'])
+
+    def update(self, tweets: Iterable[Union[Tweet, Dict[str, Any]]]) -> Dict[str, Contribution]:
+        """
+        Fold in new or re-scraped tweets: O(len(tweets)) whatever the history
+
+        Tweets already counted with the same values are skipped; changed
+        ones are retracted and re-added with their new values.
+
+        Returns:
+            status id -> contribution for every tweet that was (re)counted
+        """
+        changed = {}
+        for tweet in tweets:
+            record = tweet if isinstance(tweet, Tweet) else Tweet.from_dict(tweet)
+            key = record.status_id or str(record.id)
+            previous = self.counted.get(key)
+            values = tuple(int(getattr(record, name) or 0) for name in METRICS)
+            if previous is not None and previous[0] == values:
+                continue
+            line = first_line(record.content)
+            if previous is not None:
+                self._apply(previous, -1)
+                item = (values, previous[1])
+            else:
+                item = (values, tuple(self.matcher.match_line(line)))
+            self._apply(item, +1)
+            self.counted[key] = changed[key] = item
+            self.top.offer(key, self._values(values)['engagements'], {'author': record.author, 'first_line': line})
+        if changed:
+            self.updated_at = time.time()
+        return changed
+
+    def merge(self, other: 'ProfileAggregate') -> 'ProfileAggregate':
+        """
+        Fold another aggregate into this one (e.g. combine several profiles)
+
+        Tweets both sides counted are counted once, as long as both still
+        hold their contributions in memory; otherwise sides must be disjoint.
+        """
+        for key in self.counted.keys() & other.counted.keys():
+            self._apply(self.counted[key], -1)
+        for name, moments in other.metrics.items():
+            self.metrics[name].merge(moments)
+        for name, sketch in other.sketches.items():
+            self.sketches[name].merge(sketch)
+        for template, moments in other.hooks.items():
+            self.hooks.setdefault(template, Moments()).merge(moments)
+        self.top.merge(other.top)
+        self.counted.update(other.counted)
+        self.handle = ','.join(h for h in (self.handle, other.handle) if h)
+        self.updated_at = max(self.updated_at, other.updated_at)
+        return self
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        """Plain dict in the shape of EngagementCorpus.summary rows, plus top tweets and hooks"""
+        engagements = self.metrics['engagements']
+        views_total = self.metrics['views'].total
+        row: Dict[str, Any] = {'author': self.handle, 'tweets': self.tweets}
+        for name in METRICS:
+            row[f'{name}_total'] = self.metrics[name].total
+            row[f'{name}_mean'] = self.metrics[name].mean
+        row['engagements_std'] = engagements.std
+        row['engagement_rate'] = engagements.total / views_total if views_total > 0 else None
+        row['engagement_rate_mean'] = self.metrics['engagement_rate'].mean
+        for name in ('engagements', 'engagement_rate'):
+            for q in percentiles:
+                row[f'{name}_p{q:g}'] = self.sketches[name].quantile(q / 100)
+        row['top'] = [dict(payload or {}, status_id=key, engagements=score) for key, score, payload in self.top.ranked()]
+        mean = engagements.mean
+        row['hooks'] = sorted(
+            ({'template': template, 'matches': m.count, 'mean_engagements': m.mean,
+              'lift': m.mean / mean if mean and m.count else None}
+             for template, m in self.hooks.items() if m.count),
+            key=lambda h: h['lift'] or 0, reverse=True,
+        )
+        return row
+
+    def to_dict(self) -> Dict[str, Any]:
+        """State without the per-tweet contributions (AggregateStore keeps those apart)"""
+        return {
+            'handle': self.handle,
+            'updated_at': self.updated_at,
+            'metrics': {name: m.to_dict() for name, m in self.metrics.items()},
+            'sketches': {name: s.to_dict() for name, s in self.sketches.items()},
+            'top': self.top.to_dict(),
+            'hooks': {template: m.to_dict() for template, m in self.hooks.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], matcher: HookMatcher = None) -> 'ProfileAggregate':
+        aggregate = cls(data['handle'], k=data['top']['k'], matcher=matcher)
+        aggregate.updated_at = data['updated_at']
+        aggregate.metrics = {name: Moments.from_dict(m) for name, m in data['metrics'].items()}
+        aggregate.sketches = {name: QuantileSketch.from_dict(s) for name, s in data['sketches'].items()}
+        aggregate.top = TopK.from_dict(data['top'])
+        aggregate.hooks = {template: Moments.from_dict(m) for template, m in data['hooks'].items()}
+        return aggregate
+
+
+class AggregateStore:
+    """
+    ProfileAggregate states in SQLite, one row per profile plus one per counted tweet
+
+    update() reads the profile's state and only the contribution rows of the
+    incoming tweets, so its cost follows the new scrape, not the history.
+    """
+
+    def __init__(self, path: str = None, matcher: HookMatcher = None):
+        self.path = Path(path or os.environ.get('PROFILE_SCRAPER_AGGREGATES', DEFAULT_AGGREGATE_PATH))
+        self.matcher = matcher or HookMatcher()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS profiles ('
+                ' handle TEXT PRIMARY KEY,'
+                ' state TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS contributions ('
+                ' handle TEXT NOT NULL,'
+                ' status_id TEXT NOT NULL,'
+                ' item TEXT NOT NULL,'
+                ' PRIMARY KEY (handle, status_id))'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _handle(handle: str) -> str:
+        return handle.lstrip('@').lower()
+
+    def _load(self, conn: sqlite3.Connection, handle: str) -> ProfileAggregate:
+        row = conn.execute('SELECT state FROM profiles WHERE handle = ?', (handle,)).fetchone()
+        if row is None:
+            return ProfileAggregate(handle, matcher=self.matcher)
+        return ProfileAggregate.from_dict(json.loads(row[0]), matcher=self.matcher)
+
+    def get(self, handle: str) -> Optional[ProfileAggregate]:
+        """A profile's aggregate (without contributions), or None"""
+        handle = self._handle(handle)
+        with self._connect() as conn:
+            exists = conn.execute('SELECT 1 FROM profiles WHERE handle = ?', (handle,)).fetchone()
+            return self._load(conn, handle) if exists else None
+
+    def update(self, handle: str, tweets: Iterable[Union[Tweet, Dict[str, Any]]]) -> ProfileAggregate:
+        """Fold a scrape's tweets into the stored aggregate and save it (one transaction)"""
+        handle = self._handle(handle)
+        records = [t if isinstance(t, Tweet) else Tweet.from_dict(t) for t in tweets]
+        keys = [r.status_id or str(r.id) for r in records]
+        with self._connect() as conn:
+            # Take the write lock before reading the state, or concurrent updaters
+            # each fold into the same snapshot and the last save wins
+            conn.execute('BEGIN IMMEDIATE')
+            aggregate = self._load(conn, handle)
+            counted = {}
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f'SELECT status_id, item FROM contributions WHERE handle = ?'
+                    f' AND status_id IN ({",".join("?" * len(chunk))})', (handle, *chunk),
+                )
+                for status_id, item in rows:
+                    values, templates = json.loads(item)
+                    counted[status_id] = (tuple(values), tuple(templates))
+            aggregate.counted = counted
+            changed = aggregate.update(records)
+            if changed:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO contributions (handle, status_id, item) VALUES (?, ?, ?)',
+                    [(handle, key, json.dumps(item)) for key, item in changed.items()],
+                )
+                conn.execute('INSERT OR REPLACE INTO profiles (handle, state, updated_at) VALUES (?, ?, ?)',
+                             (handle, json.dumps(aggregate.to_dict()), aggregate.updated_at))
+        aggregate.counted = {}
+        return aggregate
+
+    def merged(self, handles: Sequence[str]) -> ProfileAggregate:
+        """One aggregate over several stored profiles (their tweet sets are disjoint)"""
+        combined = ProfileAggregate(matcher=self.matcher)
+        for handle in handles:
+            aggregate = self.get(handle)
+            if aggregate is not None:
+                combined.merge(aggregate)
+        return combined
+
+    def handles(self) -> List[str]:
+        with self._connect() as conn:
+            return [handle for (handle,) in conn.execute('SELECT handle FROM profiles ORDER BY handle')]
+
+    def delete(self, handle: str):
+        handle = self._handle(handle)
+        with self._connect() as conn:
+            conn.execute('DELETE FROM contributions WHERE handle = ?', (handle,))
+            conn.execute('DELETE FROM profiles WHERE handle = ?', (handle,))
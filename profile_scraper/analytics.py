@@ -0,0 +1,348 @@
+"""
+Vectorized engagement metrics over scraped tweet corpora
+EngagementCorpus holds a corpus of one or many profiles as NumPy arrays (one
+int64 column per metric plus an author code per tweet) and computes
+per-author engagement rates, percentiles, view-normalized ratios and robust
+outlier scores with grouped array operations instead of per-dict loops.
+
+Load from standard tweet dicts / Tweet records, or straight from a columnar
+corpus (see columnar.py), which skips Python-level parsing entirely.
+
+Requires numpy (pip install numpy).
+"""
+import itertools
+import json
+import operator
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .tweet import AUTHOR_KEYS, COUNT_KEYS, Tweet
+
+# corpus metric -> Tweet attribute
+METRICS = {
+    'likes': 'likes',
+    'retweets': 'retweets',
+    'replies': 'replies',
+    'quotes': 'quotes',
+    'bookmarks': 'bookmarks',
+    'views': 'views',
+}
+# corpus metric -> columnar column
+COLUMNAR_METRICS = {
+    'likes': 'likes',
+    'retweets': 'retweets',
+    'replies': 'reply_count',
+    'quotes': 'quote_count',
+    'bookmarks': 'bookmarks_count',
+    'views': 'views_count',
+}
+# Interactions counted as engagement (views are the denominator)
+ENGAGEMENT_METRICS = ('likes', 'retweets', 'replies', 'quotes', 'bookmarks')
+
+# Scales MAD to a standard deviation for normally distributed data
+MAD_SCALE = 1.4826
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('Engagement analytics require numpy: pip install numpy')
+
+
+def group_percentiles(values, groups, n_groups: int, percentiles: Sequence[float]):
+    """
+    Linear-interpolated percentiles of `values` within each group
+
+    Sorts once by value, then stably by group (a radix sort for the
+    integer codes), and indexes each percentile out of every group's run.
+    NaN values are ignored. Groups without values get NaN.
+
+    Returns:
+        float64 array of shape (len(percentiles), n_groups)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    keep = ~np.isnan(values)
+    values, groups = values[keep], groups[keep]
+
+    by_value = np.argsort(values, kind='stable')
+    order = by_value[np.argsort(groups[by_value], kind='stable')]
+    ordered = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    has_values = counts > 0
+    last = np.maximum(counts - 1, 0)
+
+    out = np.full((len(percentiles), n_groups), np.nan)
+    if not len(ordered):
+        return out
+    for row, q in enumerate(percentiles):
+        pos = starts + last * (q / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts + last)
+        frac = pos - lo
+        lo, hi = np.minimum(lo, len(ordered) - 1), np.minimum(hi, len(ordered) - 1)
+        out[row] = np.where(has_values, ordered[lo] + (ordered[hi] - ordered[lo]) * frac, np.nan)
+    return out
+
+
+def _first_values(raws: List[Dict[str, Any]], keys: Sequence[str], default: Any) -> List[Any]:
+    """
+    Value of the first of keys present (not None) in every raw result
+
+    One C-level dict.get pass over all results for the first key; later keys
+    are only read for the results still lacking a value. Like Tweet.from_result
+    but a present 0 or '' is kept rather than falling through to later keys.
+    """
+    values = list(map(dict.get, raws, itertools.repeat(keys[0])))
+    if None not in values:
+        return values
+    missing = list(itertools.compress(range(len(values)), map(operator.is_, values, itertools.repeat(None))))
+    for key in keys[1:]:
+        if not missing:
+            break
+        found = list(map(dict.get, map(raws.__getitem__, missing), itertools.repeat(key)))
+        for index, value in zip(missing, found):
+            values[index] = value
+        missing = list(itertools.compress(missing, map(operator.is_, found, itertools.repeat(None))))
+    for index in missing:
+        values[index] = default
+    return values
+
+
+class EngagementCorpus:
+    """
+    Tweets of one or more authors as metric arrays
+
+    Attributes:
+        authors: Handle per author code
+        author_codes: int64 author code per tweet
+        metrics: Metric name -> int64 array per tweet (likes, retweets, ...)
+        status_ids: Twitter status id per tweet (for looking tweets back up)
+    """
+
+    def __init__(self, authors: List[str], author_codes, metrics: Dict[str, Any], status_ids: List[str] = None):
+        _require_numpy()
+        self.authors = list(authors)
+        self.author_codes = np.asarray(author_codes, dtype=np.int64)
+        self.metrics = {name: np.asarray(metrics[name], dtype=np.int64) for name in METRICS}
+        self.status_ids = status_ids
+        self._by_author = None   # (author sort order, author present, group starts) for _group_sum
+
+    def __len__(self) -> int:
+        return len(self.author_codes)
+
+    @classmethod
+    def from_tweets(cls, tweets: Iterable[Union[Tweet, Dict[str, Any]]]) -> 'EngagementCorpus':
+        """
+        Build from standard tweet dicts, raw Lobstr results or Tweet records
+
+        Dicts are read column by column (one dict.get pass per metric over
+        the raw results, see _first_values) instead of being turned into Tweet
+        records first; fields are looked up under tweet.AUTHOR_KEYS and
+        tweet.COUNT_KEYS as Tweet.from_result does.
+        """
+        _require_numpy()
+        tweets = list(tweets)
+        codes: Dict[str, int] = {}
+        if any(isinstance(t, Tweet) for t in tweets):
+            records = [t if isinstance(t, Tweet) else Tweet.from_dict(t) for t in tweets]
+            author_codes = np.fromiter((codes.setdefault(r.author.lower(), len(codes)) for r in records),
+                                       dtype=np.int64, count=len(records))
+            metrics = {
+                name: np.fromiter((getattr(r, attr) or 0 for r in records), dtype=np.int64, count=len(records))
+                for name, attr in METRICS.items()
+            }
+            return cls(list(codes), author_codes, metrics, [r.status_id for r in records])
+
+        raws = [t.get('raw_data') or t for t in tweets]
+        handles = _first_values(raws, AUTHOR_KEYS, '')
+        # Lowercase and code each distinct handle once, then map every tweet in C
+        code_of = {h: codes.setdefault(h.lower(), len(codes)) for h in dict.fromkeys(handles)}
+        author_codes = np.fromiter(map(code_of.__getitem__, handles), dtype=np.int64, count=len(raws))
+        metrics = {name: np.array(_first_values(raws, COUNT_KEYS[attr], 0), dtype=np.int64)
+                   for name, attr in METRICS.items()}
+        status_ids = [str(s) for s in _first_values(raws, ('internal_unique_id',), '')]
+        return cls(list(codes), author_codes, metrics, status_ids)
+
+    @classmethod
+    def from_columnar(cls, path: str, mmap: bool = True) -> 'EngagementCorpus':
+        """Build from a corpus written by columnar.write_columnar"""
+        from .columnar import read_columnar
+
+        cols = read_columnar(path, columns=list(COLUMNAR_METRICS.values()) + ['author', 'status_id'], mmap=mmap)
+        handles = np.array([a.lower() for a in cols['author'].to_list()], dtype=object)
+        authors, author_codes = np.unique(handles, return_inverse=True)
+        metrics = {name: cols[column] for name, column in COLUMNAR_METRICS.items()}
+        return cls([str(a) for a in authors], author_codes, metrics, cols['status_id'].to_list())
+
+    @property
+    def n_authors(self) -> int:
+        return len(self.authors)
+
+    def engagements(self):
+        """Total interactions per tweet (likes + retweets + replies + quotes + bookmarks)"""
+        return sum(self.metrics[name] for name in ENGAGEMENT_METRICS)
+
+    def _views(self):
+        views = self.metrics['views'].astype(np.float64)
+        views[views == 0] = np.nan
+        return views
+
+    def engagement_rates(self, engagements=None):
+        """Engagements per view for every tweet; NaN where views are 0"""
+        return (self.engagements() if engagements is None else engagements) / self._views()
+
+    def view_ratios(self) -> Dict[str, Any]:
+        """
+        Per-tweet metrics divided by views
+
+        Returns:
+            'engagement_rate' and '<metric>_per_view' float arrays; NaN where views are 0
+        """
+        views = self._views()
+        ratios = {'engagement_rate': self.engagements() / views}
+        for name in ENGAGEMENT_METRICS:
+            ratios[f'{name}_per_view'] = self.metrics[name] / views
+        return ratios
+
+    def _group_sum(self, values):
+        """Per-author sums; integer values are accumulated in int64, so totals stay exact"""
+        if not np.issubdtype(values.dtype, np.integer):
+            return np.bincount(self.author_codes, weights=values, minlength=self.n_authors)
+        if self._by_author is None:
+            counts = np.bincount(self.author_codes, minlength=self.n_authors)
+            starts = np.cumsum(counts) - counts
+            # Stable sort of 16-bit codes is a radix sort (~5x faster than on int64)
+            codes = self.author_codes.astype(np.uint16) if self.n_authors <= 1 << 16 else self.author_codes
+            self._by_author = (np.argsort(codes, kind='stable'), counts > 0, starts[counts > 0])
+        order, present, starts = self._by_author
+        totals = np.zeros(self.n_authors, dtype=np.int64)
+        if len(order):
+            totals[present] = np.add.reduceat(values[order].astype(np.int64), starts)
+        return totals
+
+    def author_stats(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        """
+        Per-author aggregates, one array entry per author (see self.authors)
+
+        Returns:
+            tweets, <metric>_total and <metric>_mean for every metric and
+            for engagements, engagement_rate (total engagements / total views, NaN without views),
+            engagement_rate_mean (mean of per-tweet rates),
+            engagements_p<q> and engagement_rate_p<q> for each percentile
+        """
+        counts = np.bincount(self.author_codes, minlength=self.n_authors)
+        safe_counts = np.where(counts > 0, counts, 1)
+        stats: Dict[str, Any] = {'tweets': counts}
+        for name, values in self.metrics.items():
+            total = self._group_sum(values)
+            stats[f'{name}_total'] = total
+            stats[f'{name}_mean'] = total / safe_counts
+
+        engagements = self.engagements()
+        engagement_total = self._group_sum(engagements)
+        stats['engagements_total'] = engagement_total
+        stats['engagements_mean'] = engagement_total / safe_counts
+        views_total = stats['views_total']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats['engagement_rate'] = np.where(views_total > 0, engagement_total / views_total, np.nan)
+
+        rates = self.engagement_rates(engagements)
+        rated = ~np.isnan(rates)
+        rated_counts = np.bincount(self.author_codes[rated], minlength=self.n_authors)
+        rate_sums = np.bincount(self.author_codes[rated], weights=rates[rated], minlength=self.n_authors)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats['engagement_rate_mean'] = np.where(rated_counts > 0, rate_sums / rated_counts, np.nan)
+
+        for label, values in (('engagements', engagements), ('engagement_rate', rates)):
+            table = group_percentiles(values, self.author_codes, self.n_authors, percentiles)
+            for q, row in zip(percentiles, table):
+                stats[f'{label}_p{q:g}'] = row
+        return stats
+
+    def outlier_scores(self, metric: str = 'engagements'):
+        """
+        Robust z-score of every tweet against its own author
+
+        (log1p(x) - author median) / (1.4826 * author MAD), with x the tweet's
+        engagements (or any metric name). Log scale keeps viral tails from
+        dominating; 0 where an author's MAD is 0.
+        """
+        values = self.engagements() if metric == 'engagements' else self.metrics[metric]
+        logged = np.log1p(values.astype(np.float64))
+        median = group_percentiles(logged, self.author_codes, self.n_authors, (50,))[0]
+        deviation = np.abs(logged - median[self.author_codes])
+        mad = group_percentiles(deviation, self.author_codes, self.n_authors, (50,))[0] * MAD_SCALE
+        scale = mad[self.author_codes]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(scale > 0, (logged - median[self.author_codes]) / scale, 0.0)
+
+    def top_outliers(self, k: int = 10, author: str = None, metric: str = 'engagements') -> List[Tuple[int, float]]:
+        """(tweet index, score) of the k highest outlier scores, optionally for one author ([] if unknown)"""
+        scores = self.outlier_scores(metric)
+        candidates = np.arange(len(self))
+        if author is not None:
+            author = author.lstrip('@').lower()
+            if author not in self.authors:
+                return []
+            candidates = candidates[self.author_codes == self.authors.index(author)]
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> List[Dict[str, Any]]:
+        """
+        author_stats as one plain dict per author, most engaging first
+
+        Ranked by the first requested engagements percentile (the median by
+        default), or by engagements_mean when no percentiles are asked for.
+        """
+        stats = self.author_stats(percentiles)
+        rows = []
+        for code, author in enumerate(self.authors):
+            row: Dict[str, Any] = {'author': author}
+            for name, values in stats.items():
+                value = values[code].item()
+                row[name] = None if isinstance(value, float) and value != value else value
+            rows.append(row)
+        rank = f'engagements_p{percentiles[0]:g}' if len(percentiles) else 'engagements_mean'
+        rows.sort(key=lambda r: r[rank] if r[rank] is not None else -1, reverse=True)
+        return rows
+
+
+def load_corpus(paths: Sequence[str]) -> EngagementCorpus:
+    """EngagementCorpus from JSON scrape files (lists of tweets) and/or columnar corpus directories"""
+    _require_numpy()
+    corpora: List[EngagementCorpus] = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            corpora.append(EngagementCorpus.from_columnar(str(path)))
+        else:
+            corpora.append(EngagementCorpus.from_tweets(json.loads(path.read_text(encoding='utf-8'))))
+    return concat(corpora)
+
+
+def concat(corpora: Sequence[EngagementCorpus]) -> EngagementCorpus:
+    """Merge corpora, re-coding authors so each handle keeps one code"""
+    _require_numpy()
+    authors: Dict[str, int] = {}
+    codes, status_ids = [], []
+    for corpus in corpora:
+        mapping = np.array([authors.setdefault(a, len(authors)) for a in corpus.authors], dtype=np.int64)
+        codes.append(mapping[corpus.author_codes] if len(mapping) else corpus.author_codes)
+        status_ids.extend(corpus.status_ids or [''] * len(corpus))
+    metrics = {
+        name: np.concatenate([c.metrics[name] for c in corpora]) if corpora else np.zeros(0, dtype=np.int64)
+        for name in METRICS
+    }
+    return EngagementCorpus(list(authors), np.concatenate(codes) if codes else np.zeros(0, dtype=np.int64),
+                            metrics, status_ids)
@@ -0,0 +1,594 @@
+"""
+Asyncio-native Lobstr.io Twitter Scraper
+Runs many profile scrapes at once over a pooled HTTP client, so a
+ProfileSubmission takes about as long as its slowest profile.
+"""
+import asyncio
+import traceback
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from .scraper import LobstrTwitterScraper
+from .dialect import ApiDialect
+from .transport import LobstrTransport
+
+
+class AsyncLobstrTwitterScraper:
+    """Async Twitter scraper using Lobstr.io API"""
+
+    # Pure helpers are shared with the sync client
+    build_search_url = LobstrTwitterScraper.build_search_url
+    estimate_cost = LobstrTwitterScraper.estimate_cost
+    _transform_results = LobstrTwitterScraper._transform_results
+    _transform_result = LobstrTwitterScraper._transform_result
+
+    def __init__(self, api_key: str, twitter_auth_token: str = None, twitter_ct0: str = None,
+                 max_concurrency: int = 5, max_connections: int = 20, poll_interval: float = 10,
+                 transport: LobstrTransport = None, base_url: str = 'https://api.lobstr.io/v1/'):
+        if httpx is None:
+            raise ImportError('AsyncLobstrTwitterScraper requires httpx: pip install httpx')
+
+        self.base_url = base_url
+        self.api_key = api_key
+        self.twitter_auth_token = twitter_auth_token
+        self.twitter_ct0 = twitter_ct0
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        # Pass the sync scraper's transport to share one rate limit across both
+        self.transport = transport or LobstrTransport()
+
+        # One pooled client shared by every concurrent scrape
+        self.client = httpx.AsyncClient(
+            headers={
+                'Authorization': f'Token {self.api_key}',
+                'Content-Type': 'application/json'
+            },
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(60.0),
+        )
+
+        # Crawler hashes
+        self.crawler_hash = '1b16ff414d27920fb325b68436dbf5fc'  # Twitter Search
+
+        self.sync_id = None
+        self._last_run_params = None
+        self._account_id = None
+        # Guards one-time account lookups when many scrapes start together
+        self._account_lock = asyncio.Lock()
+        # Squids this client created, and those an in-flight scrape still uses;
+        # slot-limit cleanup only ever deletes the difference
+        self._own_squids = set()
+        self._busy_squids = set()
+        # Scrapes re-creating a squid in a slot they just freed
+        self._refilling = 0
+        self._squids_freed = asyncio.Condition()
+        # Endpoint variants learned by any client in this process (see dialect.py)
+        self.dialect = ApiDialect(api_key)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        await self.client.aclose()
+
+    def _url(self, path: str) -> str:
+        return urljoin(self.base_url, path)
+
+    async def _request(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        """Send a request on the pooled client through the shared transport"""
+        return await self.transport.arequest(self.client, method, url, **kwargs)
+
+    async def sync_twitter_account(self) -> Optional[str]:
+        """
+        Synchronize Twitter account with Lobstr.io
+
+        Returns:
+            Sync ID
+        """
+        if not self.twitter_auth_token or not self.twitter_ct0:
+            print("⚠️ Warning: No Twitter cookies provided. Some features may be limited.")
+            return None
+
+        print('Syncing Twitter account...')
+
+        payload = {
+            'type': 'twitter-sync',
+            'cookies': {
+                'auth_token': self.twitter_auth_token,
+                'ct0': self.twitter_ct0
+            }
+        }
+
+        try:
+            response = await self._request('POST', self._url('accounts/cookies'), json=payload)
+
+            if response.is_success:
+                sync_id = response.json().get('id')
+                print(f'✅ Twitter account synced: {sync_id}')
+                self.sync_id = sync_id
+                return sync_id
+            else:
+                print(f'⚠️ Account sync failed: {response.status_code} - {response.text}')
+                return None
+        except Exception as e:
+            print(f'⚠️ Account sync error: {e}')
+            return None
+
+    async def list_squids(self) -> List[Dict[str, Any]]:
+        """List all squids in account"""
+        response = await self._request('GET', self._url('squids'))
+
+        if response.is_success:
+            data = response.json()
+            return data.get('data', [])
+        return []
+
+    async def list_accounts(self) -> List[Dict[str, Any]]:
+        """List connected accounts"""
+        response = await self._request('GET', self._url('accounts'))
+        if response.is_success:
+            data = response.json()
+            if isinstance(data, dict):
+                return data.get('data', []) or data.get('results', []) or []
+            if isinstance(data, list):
+                return data
+        return []
+
+    async def get_primary_account_id(self) -> Optional[str]:
+        """Return the first available account id (Twitter)"""
+        if self._account_id:
+            return self._account_id
+        async with self._account_lock:
+            if self._account_id:
+                return self._account_id
+            accounts = await self.list_accounts()
+            for acc in accounts:
+                acc_id = acc.get('id') or acc.get('account_id')
+                platform = acc.get('platform') or acc.get('type') or acc.get('name', '')
+                if acc_id and ('twitter' in str(platform).lower() or not platform):
+                    self._account_id = acc_id
+                    return acc_id
+        return None
+
+    async def delete_squid(self, squid_id: str) -> bool:
+        """Delete a squid"""
+        response = await self._request('DELETE', self._url(f'squids/{squid_id}'))
+
+        if response.is_success:
+            print(f'✅ Deleted squid: {squid_id}')
+            return True
+        else:
+            print(f'⚠️ Failed to delete squid: {response.status_code}')
+            return False
+
+    async def cleanup_old_squids(self) -> int:
+        """
+        Delete squids this client created that no scrape is using, to free up slots
+
+        Squids of other clients and of sibling scrapes still in flight (e.g.
+        under scrape_many) are left alone.
+
+        Returns:
+            Number of squids deleted
+        """
+        print('Cleaning up old squids...')
+        idle = sorted(self._own_squids - self._busy_squids)
+
+        if not idle:
+            print('  No idle squids of this client to clean up')
+            return 0
+
+        print(f'  Found {len(idle)} idle squids to delete')
+        # Forget them before awaiting, so concurrent cleanups don't delete them twice
+        self._own_squids.difference_update(idle)
+        deleted = await asyncio.gather(*(self.delete_squid(squid_id) for squid_id in idle))
+        return sum(deleted)
+
+    async def _retire_squid(self, squid_id: str):
+        """
+        Delete a finished scrape's squid and wake scrapes waiting for a slot
+
+        If the delete fails the squid stays behind as idle, so the next
+        slot-limit cleanup (cleanup_old_squids) retries it.
+        """
+        # Forget it first, so a concurrent cleanup doesn't delete it too
+        self._own_squids.discard(squid_id)
+        deleted = False
+        try:
+            deleted = await self.delete_squid(squid_id)
+        finally:
+            async with self._squids_freed:
+                if not deleted:
+                    self._own_squids.add(squid_id)
+                self._busy_squids.discard(squid_id)
+                self._squids_freed.notify_all()
+
+    async def create_squid(self, crawler_hash: str, max_results: int = 1000) -> str:
+        """
+        Create a new scraper instance (Squid)
+
+        If the slot limit is reached, deletes this client's idle squids (see
+        cleanup_old_squids) and retries, waiting for a sibling scrape to
+        finish with its squid when none is idle yet. The new squid counts as
+        busy until the caller passes it to _retire_squid.
+
+        Returns:
+            Squid ID
+        """
+        print('Creating squid...')
+
+        account_id = await self.get_primary_account_id()
+        payload = {
+            'crawler': crawler_hash,
+            'concurrency': 1,
+            'export_unique_results': True,
+            'to_complete': False,
+            # max_results goes at TOP LEVEL, not in params!
+            'max_results': max_results,
+            'max_unique_results_per_run': max_results
+        }
+        if account_id:
+            payload['accounts'] = [account_id]
+
+        url = self._url('squids')
+        response = await self._request('POST', url, json=payload)
+
+        # If slot limit reached, free our own idle squids and retry
+        while not response.is_success and 'SlotsLimitExceeded' in response.text:
+            print('⚠️ Slot limit reached - cleaning up old squids...')
+            if not await self.cleanup_old_squids():
+                if not self._busy_squids and not self._refilling:
+                    # None of the slots in use are ours: nothing to wait for
+                    break
+                # Every slot we hold is in use: wait for a sibling scrape to retire its squid
+                async with self._squids_freed:
+                    await self._squids_freed.wait()
+            self._refilling += 1
+            try:
+                response = await self._request('POST', url, json=payload)
+            finally:
+                async with self._squids_freed:
+                    self._refilling -= 1
+                    self._squids_freed.notify_all()
+
+        if not response.is_success:
+            raise Exception(f'Squid creation failed: {response.status_code} - {response.text}')
+
+        squid = response.json()
+        squid_id = squid.get('id')
+        self._own_squids.add(squid_id)
+        self._busy_squids.add(squid_id)
+        print(f"✅ Squid created: {squid_id} (is_ready={squid.get('is_ready')}, accounts={squid.get('accounts')})")
+        return squid_id
+
+    async def add_tasks(self, squid_id: str, urls: List[str]):
+        """Add Twitter URLs as tasks"""
+        print(f'Adding {len(urls)} tasks...')
+
+        tasks = [{'url': url} for url in urls]
+        payload = {
+            'squid': squid_id,
+            'tasks': tasks
+        }
+
+        response = await self._request('POST', self._url('tasks'), json=payload)
+
+        if not response.is_success:
+            raise Exception(f'Task addition failed: {response.status_code} - {response.text}')
+
+        print(f'✅ Added {len(tasks)} tasks')
+
+    async def attach_account_to_squid(self, squid_id: str):
+        """Attach synced Twitter account to squid via supported endpoints"""
+        account_id = await self.get_primary_account_id()
+        if not account_id:
+            print('ℹ️ No synced account to attach')
+            return
+
+        print(f'Attaching account {account_id} to squid {squid_id}...')
+
+        url_accounts = self._url(f'squids/{squid_id}/accounts')
+        url_base = self._url(f'squids/{squid_id}')
+        variants = {
+            'accounts': ('POST', url_accounts, {'accounts': [account_id]}, 'via /accounts endpoint'),
+            'account': ('POST', url_accounts, {'account': account_id}, 'via singular key'),
+            'put': ('PUT', url_base, {'accounts': [account_id]}, 'via top-level PUT'),
+            'post': ('POST', url_base, {'accounts': [account_id]}, 'via top-level POST'),
+        }
+
+        tried = []
+        for name in self.dialect.order('attach_account', list(variants)):
+            method, url, payload, label = variants[name]
+            resp = await self._request(method, url, json=payload)
+            tried.append((method, url, resp.status_code, resp.text))
+            if resp.is_success:
+                self.dialect.learn('attach_account', name)
+                print(f'✅ Account attached {label}')
+                return
+
+        # Log attempts for debugging
+        print('⚠️ Failed to attach account; attempts:')
+        for method, u, code, text in tried:
+            print(f'   {method} {u} -> {code} {text[:120]}')
+
+    async def configure_squid(self, squid_id: str, max_results: int = 1000):
+        """Configure squid parameters using UI's method: POST with full squid data"""
+        print(f'Configuring squid with max_unique_results_per_run={max_results}...')
+
+        url = self._url(f'squids/{squid_id}')
+
+        response = await self._request('GET', url)
+        if not response.is_success:
+            raise Exception(f'Failed to get squid: {response.status_code} - {response.text}')
+
+        squid = response.json()
+
+        account_id = await self.get_primary_account_id()
+        if account_id:
+            current_accounts = squid.get('accounts', [])
+            account_ids = [acc['id'] if isinstance(acc, dict) else acc for acc in current_accounts]
+            if account_id not in account_ids:
+                print(f'  Attaching account {account_id} to squid...')
+                await self.attach_account_to_squid(squid_id)
+                response = await self._request('GET', url)
+                if response.is_success:
+                    squid = response.json()
+
+        payload = {
+            'name': squid.get('name'),
+            'no_line_breaks': squid.get('no_line_breaks', True),
+            'export_unique_results': squid.get('export_unique_results', True),
+            'to_complete': squid.get('to_complete', False),
+            'params': {
+                'max_results': squid.get('params', {}).get('max_results'),
+                'max_unique_results_per_run': max_results
+            }
+        }
+
+        if squid.get('accounts'):
+            payload['accounts'] = [acc['id'] if isinstance(acc, dict) else acc
+                                   for acc in squid.get('accounts')]
+
+        print(f'  Sending POST to {url} with params: {payload["params"]}')
+        response = await self._request('POST', url, json=payload)
+
+        if not response.is_success:
+            raise Exception(f'Failed to configure squid: {response.status_code} - {response.text}')
+
+        response = await self._request('GET', url)
+        if response.is_success:
+            actual = response.json().get('params', {}).get('max_unique_results_per_run')
+            if actual == max_results:
+                print(f'  ✅ Successfully set max_unique_results_per_run={actual}')
+            else:
+                print(f'  ⚠️ Expected {max_results}, got {actual}')
+        else:
+            print('  ⚠️ Could not verify configuration')
+
+    async def launch_scraping(self, squid_id: str, max_results: int = None) -> str:
+        """Start the scraping job"""
+        print('Launching scraper...')
+
+        payload = {
+            'squid': squid_id
+        }
+        if self._last_run_params:
+            payload.update(self._last_run_params)
+        account_id = await self.get_primary_account_id()
+        if account_id and 'accounts' not in payload:
+            payload['accounts'] = [account_id]
+
+        if max_results:
+            payload['max_unique_results_per_run'] = max_results
+            print(f'  Setting max_unique_results_per_run={max_results} at RUN level')
+
+        variants = {
+            'runs': (self._url('runs'), ''),
+            'squid_launch': (self._url(f'squids/{squid_id}/launch'), ' (alt)'),
+        }
+
+        failures = []
+        for name in self.dialect.order('launch', list(variants)):
+            url, label = variants[name]
+            response = await self._request('POST', url, json=payload)
+            if response.is_success:
+                data = response.json()
+                run_id = data.get('id') or data.get('run') or data.get('run_id')
+                if not run_id:
+                    raise Exception(f'Launch succeeded but no run id in response: {data}')
+                self.dialect.learn('launch', name)
+                print(f'✅ Scraping job launched{label}: {run_id}')
+                return run_id
+            failures.append(response)
+
+        info_resp = await self._request('GET', self._url(f'squids/{squid_id}'))
+        if info_resp.is_success:
+            info = info_resp.json()
+            print(f"  Squid is_ready={info.get('is_ready')} accounts={info.get('accounts')} params={info.get('params')}")
+        raise Exception(f'Launch failed: {failures[0].status_code} - {failures[0].text}')
+
+    async def wait_for_completion(self, run_id: str, timeout: int = 300) -> bool:
+        """Wait for scraping job to complete"""
+        print(f'Monitoring job progress ({run_id})...')
+
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        while loop.time() - start_time < timeout:
+            response = await self._request('GET', self._url(f'runs/{run_id}'))
+
+            if not response.is_success:
+                raise Exception(f'Status check failed: {response.status_code}')
+
+            run_data = response.json()
+
+            status = run_data.get('status', 'unknown')
+            if run_data.get('is_done') or status == 'done':
+                total = run_data.get('total_results', 0)
+                print(f'✅ Job completed! Total results: {total}')
+                return True
+            print(f"  Status: {status} - Results: {run_data.get('total_results', 0)}")
+
+            # Sleeping yields the loop to every other in-flight scrape
+            await asyncio.sleep(self.poll_interval)
+
+        raise Exception('Job timeout')
+
+    async def cancel_run(self, run_id: str) -> bool:
+        """Cancel a running scraping job"""
+        response = await self._request('POST', self._url(f'runs/{run_id}/cancel'))
+
+        if response.is_success:
+            print(f'✅ Run cancelled: {run_id}')
+            return True
+        else:
+            print(f'⚠️ Cancel failed: {response.status_code} - {response.text}')
+            return False
+
+    async def collect_results(self, run_id: str, page_size: int = 100, max_results: int = None,
+                              cancel_early: bool = False) -> List[Dict[str, Any]]:
+        """Collect all results from completed job"""
+        print(f'Collecting results{f" (limit: {max_results})" if max_results else ""}...')
+
+        all_results = []
+        page = 1
+
+        while True:
+            if max_results and len(all_results) >= max_results:
+                print(f'  Reached max_results limit: {max_results}')
+                if cancel_early:
+                    print('  Attempting to cancel run to save credits...')
+                    await self.cancel_run(run_id)
+                break
+
+            params = {
+                'run': run_id,
+                'page': page,
+                'page_size': page_size
+            }
+            response = await self._request('GET', self._url('results'), params=params)
+
+            if not response.is_success:
+                raise Exception(f'Results page {page} failed: {response.status_code} - {response.text[:200]}')
+
+            results = response.json().get('data', [])
+            if not results:
+                break
+
+            all_results.extend(results)
+            print(f'  Collected page {page}: {len(results)} results (total: {len(all_results)})')
+            page += 1
+
+        if max_results and len(all_results) > max_results:
+            print(f'  Trimming results from {len(all_results)} to {max_results}')
+            all_results = all_results[:max_results]
+
+        print(f'✅ Total results collected: {len(all_results)}')
+        return all_results
+
+    async def scrape_tweets(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Main scraping method - same params and output as LobstrTwitterScraper.scrape_tweets
+
+        Args:
+            params: Search parameters (searchTerms, maxItems, filters, etc.)
+
+        Returns:
+            List of tweets
+        """
+        try:
+            if not self.sync_id and self.twitter_auth_token:
+                await self.sync_twitter_account()
+
+            search_terms = params.get('searchTerms', [])
+            if not search_terms:
+                raise ValueError("searchTerms is required")
+
+            search_urls = [self.build_search_url(term, params) for term in search_terms]
+            max_results = params.get('maxItems', 100)
+
+            squid_id = await self.create_squid(self.crawler_hash, max_results=max_results)
+            try:
+                await self.add_tasks(squid_id, search_urls)
+
+                try:
+                    await self.configure_squid(squid_id, max_results)
+                except Exception as cfg_err:
+                    print(f'ℹ️ Skipping configure step: {cfg_err}')
+
+                run_id = await self.launch_scraping(squid_id, max_results=max_results)
+
+                await self.wait_for_completion(run_id, timeout=600)
+                results = await self.collect_results(run_id, max_results=max_results)
+            finally:
+                # Collected (or failed): delete the squid so it doesn't hold a slot
+                await self._retire_squid(squid_id)
+
+            return self._transform_results(results)
+
+        except Exception as e:
+            print(f'❌ Lobstr.io scraping failed: {e}')
+            traceback.print_exc()
+            return []
+
+    async def scrape_many(self, params_list: List[Dict[str, Any]],
+                          max_concurrency: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        Run several scrape_tweets calls concurrently
+
+        Args:
+            params_list: One scrape_tweets params dict per profile
+            max_concurrency: Max scrapes in flight (defaults to self.max_concurrency)
+
+        Returns:
+            One list of tweets per params dict, in input order
+        """
+        # Sync once up front instead of racing in every scrape
+        if not self.sync_id and self.twitter_auth_token:
+            await self.sync_twitter_account()
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def _bounded(params):
+            async with semaphore:
+                return await self.scrape_tweets(params)
+
+        return list(await asyncio.gather(*(_bounded(p) for p in params_list)))
+
+    async def check_health(self) -> bool:
+        """Check if Lobstr.io API is accessible"""
+        try:
+            response = await self._request('GET', self._url('me'))
+
+            if response.is_success:
+                user_info = response.json()
+                print(f"✅ Lobstr.io connected. User: {user_info.get('email', 'N/A')}")
+                print(f"   Credits: {user_info.get('credits', 'N/A')}")
+                return True
+            else:
+                print(f"❌ Lobstr.io health check failed: {response.status_code}")
+                return False
+
+        except Exception as e:
+            print(f"❌ Lobstr.io connection error: {e}")
+            return False
+
+
+def scrape_profiles_concurrently(api_key: str, params_list: List[Dict[str, Any]],
+                                 max_concurrency: int = 5, **kwargs) -> List[List[Dict[str, Any]]]:
+    """Blocking helper for sync callers: scrape every params dict concurrently"""
+    async def _run():
+        async with AsyncLobstrTwitterScraper(api_key, max_concurrency=max_concurrency, **kwargs) as scraper:
+            return await scraper.scrape_many(params_list)
+
+    return asyncio.run(_run())
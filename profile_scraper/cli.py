@@ -0,0 +1,290 @@
+"""
+Bulk profile scraping from the command line
+Reads handles or profile URLs from a file, scrapes them on a worker pool and
+streams tweets to a sink as they arrive: JSONL (gzip-compressed when the path
+ends in .gz) or a TweetStore. Handles that finished are listed in
+<out>.done, so running the same command again skips them.
+
+Usage:
+    python -m profile_scraper handles.txt --out tweets.jsonl.gz --workers 4 --max-tweets 50
+    python -m profile_scraper handles.txt --sink store --out tweets.sqlite3
+"""
+import argparse
+import contextlib
+import gzip
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, TextIO
+
+from .scraper import LobstrTwitterScraper, extract_handle
+from .tweet_store import TweetStore, tweet_key
+
+
+def read_handles(path: str) -> List[str]:
+    """Unique handles from a file of handles/profile URLs ('#' starts a comment)"""
+    handles = []
+    for line in Path(path).read_text(encoding='utf-8').splitlines():
+        ref = line.split('#', 1)[0].strip()
+        handle = extract_handle(ref) if ref else ''
+        if handle and handle not in handles:
+            handles.append(handle)
+    return handles
+
+
+def _open_text(path: Path, mode: str) -> TextIO:
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class JsonlSink:
+    """
+    Append tweets as JSON lines, one per tweet
+
+    Tweets already in the file (e.g. from a handle interrupted mid-scrape)
+    are not written again. Appending to a .gz file adds a gzip member, which
+    gzip readers treat as one stream. A tail damaged by a killed run is cut
+    off on open (see _resume).
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._seen: Set[str] = set()
+        if self.path.exists():
+            self._resume()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = _open_text(self.path, 'a')
+        self._lock = threading.Lock()
+
+    def _resume(self):
+        """
+        Collect the keys of tweets already written
+
+        A killed run can leave a half-written last line or, for .gz, a member
+        without its end-of-stream marker. Everything before the damage is the
+        resume set; a plain file is truncated to it and a .gz file is rewritten
+        from it, so appends start from a clean record boundary.
+        """
+        gz = self.path.suffix == '.gz'
+        good_lines = good_bytes = 0
+        damaged = False
+        with (gzip.open if gz else open)(self.path, 'rb') as f:
+            try:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        damaged = True
+                        break
+                    if line.strip():
+                        self._seen.add(tweet_key(json.loads(line)))
+                    good_lines += 1
+                    good_bytes += len(line)
+            except (EOFError, zlib.error, gzip.BadGzipFile, ValueError):
+                # ValueError covers JSONDecodeError and undecodable bytes
+                damaged = True
+        if not damaged:
+            return
+
+        print(f'⚠️ {self.path}: dropping a damaged tail after {good_lines} lines', file=sys.stderr)
+        if not gz:
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_bytes)
+            return
+        partial = self.path.with_name(self.path.name + '.partial')
+        with gzip.open(self.path, 'rb') as src, gzip.open(partial, 'wb') as dst:
+            dst.writelines(itertools.islice(src, good_lines))
+        os.replace(partial, self.path)
+
+    def write(self, tweets: Iterable[Dict[str, Any]]) -> int:
+        lines = []
+        with self._lock:
+            for tweet in tweets:
+                key = tweet_key(tweet)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                lines.append(json.dumps(tweet, ensure_ascii=False) + '\n')
+            self._file.writelines(lines)
+            self._file.flush()
+        return len(lines)
+
+    def close(self):
+        self._file.close()
+
+
+class StoreSink:
+    """Merge tweets into a TweetStore (SQLite)"""
+
+    def __init__(self, path: str):
+        self.store = TweetStore(path)
+
+    def write(self, tweets: Iterable[Dict[str, Any]]) -> int:
+        return self.store.add(list(tweets))
+
+    def close(self):
+        pass
+
+
+SINKS = {'jsonl': JsonlSink, 'store': StoreSink}
+
+
+class DoneList:
+    """Handles that finished, one per line next to the output"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.handles = set(path.read_text(encoding='utf-8').split()) if path.exists() else set()
+        self._lock = threading.Lock()
+
+    def add(self, handle: str):
+        with self._lock:
+            self.handles.add(handle)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(handle + '\n')
+
+
+class Progress:
+    """Thread-safe tally printed to stderr after every handle"""
+
+    def __init__(self, scraper: LobstrTwitterScraper, total: int):
+        self.scraper = scraper
+        self.total = total
+        self.finished = 0
+        self.tweets = 0
+        self.written = 0
+        self.empty: List[str] = []
+        self.failed: List[str] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def handle_done(self, handle: str, tweets: int, written: int, seconds: float, error: Exception = None):
+        with self._lock:
+            self.finished += 1
+            self.tweets += tweets
+            self.written += written
+            if error is not None:
+                self.failed.append(handle)
+            elif not tweets:
+                self.empty.append(handle)
+            elapsed = time.perf_counter() - self.started
+            status = f'failed: {error}' if error is not None else f'{tweets} tweets'
+            print(f'[{self.finished}/{self.total}] @{handle}: {status} ({seconds:.1f}s) | '
+                  f'{self.tweets} tweets, {self.tweets / elapsed if elapsed else 0:.1f}/s, '
+                  f'est. ${self.scraper.estimate_cost(self.tweets):.4f}', file=sys.stderr)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [
+            f'Handles: {self.finished}/{self.total} scraped in {elapsed:.1f}s',
+            f'Tweets: {self.tweets} ({self.written} new in sink), {self.tweets / elapsed if elapsed else 0:.1f}/s',
+            f'Estimated cost: ${self.scraper.estimate_cost(self.tweets):.4f}',
+        ]
+        if self.empty:
+            lines.append(f'No tweets (will be retried): {", ".join(self.empty)}')
+        if self.failed:
+            lines.append(f'Failed (will be retried): {", ".join(self.failed)}')
+        return '\n'.join(lines)
+
+
+def scrape_handle(scraper: LobstrTwitterScraper, sink, handle: str, args) -> tuple:
+    """Stream one handle's tweets into the sink; returns (tweets, written)"""
+    params = {
+        'searchTerms': [f'from:{handle} {args.query_suffix}'.strip()],
+        'maxItems': args.max_tweets,
+    }
+    if scraper.job_store is not None and not args.live:
+        # Checkpointed jobs resume through scrape_tweets, so collect the list then write it
+        tweets = scraper.scrape_tweets(params)
+        return len(tweets), sink.write(tweets)
+
+    tweets = written = 0
+    batch = []
+    for tweet in scraper.scrape_tweets_iter(params, live=args.live):
+        batch.append(tweet)
+        if len(batch) >= args.flush_every:
+            written += sink.write(batch)
+            tweets += len(batch)
+            batch = []
+    written += sink.write(batch)
+    return tweets + len(batch), written
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m profile_scraper',
+                                     description='Bulk-scrape Twitter profiles via Lobstr.io')
+    parser.add_argument('handles', help='file with one handle or profile URL per line')
+    parser.add_argument('--out', required=True, help='output path (.jsonl, .jsonl.gz or TweetStore .sqlite3)')
+    parser.add_argument('--sink', choices=list(SINKS), default='jsonl')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-tweets', type=int, default=20, help='tweets per profile')
+    parser.add_argument('--query-suffix', default='-filter:retweets -filter:replies')
+    parser.add_argument('--live', action='store_true', help='stream while runs are in progress, cancel early')
+    parser.add_argument('--squid-pool', type=int, default=0, help='warm squids to reuse (0 = off)')
+    parser.add_argument('--checkpoints', action='store_true', help='resume interrupted runs (see JobStore)')
+    parser.add_argument('--flush-every', type=int, default=100, help='tweets buffered per sink write')
+    parser.add_argument('--api-key', default=os.environ.get('LOBSTR_API_KEY'))
+    parser.add_argument('--base-url', default='https://api.lobstr.io/v1/')
+    parser.add_argument('--verbose', action='store_true', help="show the scraper's own output")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error('--api-key or LOBSTR_API_KEY is required')
+
+    handles = read_handles(args.handles)
+    done = DoneList(Path(f'{args.out}.done'))
+    todo = [h for h in handles if h not in done.handles]
+    print(f'{len(handles)} handles, {len(handles) - len(todo)} already complete, {len(todo)} to scrape '
+          f'with {args.workers} workers', file=sys.stderr)
+    if not todo:
+        return
+
+    scraper = LobstrTwitterScraper(
+        args.api_key,
+        twitter_auth_token=os.environ.get('LOBSTR_TWITTER_AUTH_TOKEN'),
+        twitter_ct0=os.environ.get('LOBSTR_TWITTER_CT0'),
+        base_url=args.base_url,
+    )
+    sink = SINKS[args.sink](args.out)
+    progress = Progress(scraper, len(todo))
+
+    def work(handle: str):
+        started = time.perf_counter()
+        try:
+            tweets, written = scrape_handle(scraper, sink, handle, args)
+        except Exception as e:
+            # A stream cut short raises here, so a partially written handle is retried
+            progress.handle_done(handle, 0, 0, time.perf_counter() - started, error=e)
+            return
+        # Zero tweets usually means the scrape failed (scrape_tweets logs why and returns [])
+        if tweets:
+            done.add(handle)
+        progress.handle_done(handle, tweets, written, time.perf_counter() - started)
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+            if args.squid_pool:
+                scraper.enable_squid_pool(size=args.squid_pool)
+            if args.checkpoints:
+                scraper.enable_checkpoints()
+            with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix='scrape') as pool:
+                try:
+                    for future in as_completed([pool.submit(work, h) for h in todo]):
+                        future.result()
+                except KeyboardInterrupt:
+                    # Drop handles not started yet; running ones finish before the sink closes
+                    pool.shutdown(cancel_futures=True)
+                    raise
+    except KeyboardInterrupt:
+        print('Interrupted; finished handles are recorded, re-run to continue', file=sys.stderr)
+    finally:
+        if scraper.squid_pool is not None:
+            scraper.squid_pool.close()
+        sink.close()
+        print(progress.summary(), file=sys.stderr)
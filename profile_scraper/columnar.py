@@ -0,0 +1,177 @@
+"""
+Columnar export/import for scraped tweet corpora
+A corpus is a directory with one .npy file per column plus meta.json. Metrics
+are typed integer columns, published_at is datetime64[s], and text columns are
+stored as an int64 offsets array plus a uint8 UTF-8 data array. Columns load
+independently and are memory-mapped, so readers only pay for what they touch.
+
+Requires numpy (pip install numpy).
+"""
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .tweet import Tweet
+
+FORMAT_VERSION = 1
+
+# column name -> Tweet attribute
+NUMERIC_COLUMNS = {
+    'likes': 'likes',
+    'retweets': 'retweets',
+    'reply_count': 'replies',
+    'quote_count': 'quotes',
+    'views_count': 'views',
+    'bookmarks_count': 'bookmarks',
+}
+TEXT_COLUMNS = {
+    'status_id': 'status_id',
+    'author': 'author',
+    'name': 'name',
+    'content': 'content',
+    'tweet_url': 'tweet_url',
+}
+TIME_COLUMNS = {
+    'published_at': 'published_at',
+}
+ALL_COLUMNS = list(NUMERIC_COLUMNS) + list(TIME_COLUMNS) + list(TEXT_COLUMNS)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('Columnar export requires numpy: pip install numpy')
+
+
+class StringColumn:
+    """Variable-length UTF-8 strings stored as offsets + data"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, values: Sequence[str]) -> 'StringColumn':
+        encoded = [(v or '').encode('utf-8') for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def lengths(self):
+        """Byte length of every value, without decoding"""
+        return np.diff(self.offsets)
+
+    def to_list(self) -> List[str]:
+        # One bulk copy out of the (possibly memory-mapped) arrays, then plain slicing
+        data = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+
+def _parse_time(value: Optional[str]) -> Any:
+    if not value:
+        return np.datetime64('NaT')
+    return np.datetime64(datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None), 's')
+
+
+def _as_records(tweets: Iterable[Union[Tweet, Dict[str, Any]]]) -> List[Tweet]:
+    return [t if isinstance(t, Tweet) else Tweet.from_dict(t) for t in tweets]
+
+
+def write_columnar(tweets: Iterable[Union[Tweet, Dict[str, Any]]], path: str) -> Path:
+    """
+    Write tweets (standard dicts or Tweet records) as a columnar corpus
+
+    Returns:
+        The corpus directory
+    """
+    _require_numpy()
+    records = _as_records(tweets)
+    out = Path(path)
+    out.mkdir(parents=True, exist_ok=True)
+
+    for column, attr in NUMERIC_COLUMNS.items():
+        values = np.fromiter((getattr(r, attr) or 0 for r in records), dtype=np.int64, count=len(records))
+        np.save(out / f'{column}.npy', values)
+
+    for column, attr in TIME_COLUMNS.items():
+        values = np.array([_parse_time(getattr(r, attr)) for r in records], dtype='datetime64[s]')
+        np.save(out / f'{column}.npy', values)
+
+    for column, attr in TEXT_COLUMNS.items():
+        strings = StringColumn.from_strings([getattr(r, attr) for r in records])
+        np.save(out / f'{column}.offsets.npy', strings.offsets)
+        np.save(out / f'{column}.data.npy', strings.data)
+
+    meta = {'version': FORMAT_VERSION, 'rows': len(records), 'columns': ALL_COLUMNS}
+    (out / 'meta.json').write_text(json.dumps(meta, indent=2))
+    return out
+
+
+def read_columnar(path: str, columns: Sequence[str] = None, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Load selected columns of a corpus
+
+    Args:
+        path: Corpus directory written by write_columnar
+        columns: Column names to load (default: all)
+        mmap: Memory-map the .npy files instead of reading them
+
+    Returns:
+        Dict of column -> numpy array (metrics, published_at) or StringColumn (text)
+    """
+    _require_numpy()
+    src = Path(path)
+    meta = json.loads((src / 'meta.json').read_text())
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version: {meta.get('version')}")
+
+    mmap_mode = 'r' if mmap else None
+    loaded = {}
+    for column in columns or meta['columns']:
+        if column in TEXT_COLUMNS:
+            loaded[column] = StringColumn(np.load(src / f'{column}.offsets.npy', mmap_mode=mmap_mode),
+                                          np.load(src / f'{column}.data.npy', mmap_mode=mmap_mode))
+        elif column in NUMERIC_COLUMNS or column in TIME_COLUMNS:
+            loaded[column] = np.load(src / f'{column}.npy', mmap_mode=mmap_mode)
+        else:
+            raise KeyError(f'Unknown column: {column}')
+    return loaded
+
+
+def read_tweets(path: str) -> List[Tweet]:
+    """Rebuild Tweet records from a corpus (raw_data is not stored)"""
+    cols = read_columnar(path, mmap=False)
+    records = []
+    for i in range(len(cols['author'])):
+        published = cols['published_at'][i]
+        records.append(Tweet(
+            id=cols['status_id'][i],
+            status_id=cols['status_id'][i],
+            author=sys.intern(cols['author'][i]),
+            name=sys.intern(cols['name'][i]),
+            content=cols['content'][i],
+            published_at=None if np.isnat(published) else f'{published}Z',
+            tweet_url=cols['tweet_url'][i],
+            **{attr: int(cols[column][i]) for column, attr in NUMERIC_COLUMNS.items()},
+        ))
+    return records
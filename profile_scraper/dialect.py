@@ -0,0 +1,63 @@
+"""
+Learned Lobstr API dialect
+Some calls have several endpoint/payload variants (attaching an account,
+launching a run) and the client used to try them in a fixed order on every
+call. ApiDialect remembers which variant worked, per API key, for every
+client in the process and optionally on disk (MetadataCache), so later calls
+go straight to it and only re-probe the others when it fails.
+"""
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .metadata_cache import MetadataCache, fingerprint
+
+# Dialects change only when Lobstr changes its API
+DIALECT_TTL = 7 * 24 * 3600
+
+
+class ApiDialect:
+    """Per-API-key memory of the working variant for each operation"""
+
+    # (api key fingerprint, operation) -> variant, shared by every client in the process
+    _learned: Dict[Tuple[str, str], str] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, api_key: str, metadata_cache: MetadataCache = None):
+        self.api_key = api_key
+        self.scope = fingerprint(api_key)
+        self.metadata_cache = metadata_cache
+
+    def get(self, operation: str) -> Optional[str]:
+        """The variant that last worked for operation, if known"""
+        key = (self.scope, operation)
+        with self._lock:
+            variant = self._learned.get(key)
+        if variant is None and self.metadata_cache:
+            variant = self.metadata_cache.get(self.api_key, f'dialect:{operation}', ttl=DIALECT_TTL)
+            if variant:
+                with self._lock:
+                    self._learned[key] = variant
+        return variant
+
+    def order(self, operation: str, variants: Sequence[str]) -> List[str]:
+        """variants with the learned one moved to the front"""
+        learned = self.get(operation)
+        if learned not in variants:
+            return list(variants)
+        return [learned] + [v for v in variants if v != learned]
+
+    def learn(self, operation: str, variant: str):
+        """Record the variant that just worked"""
+        key = (self.scope, operation)
+        with self._lock:
+            changed = self._learned.get(key) != variant
+            self._learned[key] = variant
+        if changed and self.metadata_cache:
+            self.metadata_cache.set(self.api_key, f'dialect:{operation}', variant)
+
+    def forget(self, operation: str):
+        """Drop the learned variant so the next call probes from the default order"""
+        with self._lock:
+            self._learned.pop((self.scope, operation), None)
+        if self.metadata_cache:
+            self.metadata_cache.delete(self.api_key, f'dialect:{operation}')
@@ -0,0 +1,324 @@
+"""
+Hook (opening-line) pattern extraction
+Normalizes the first line of each tweet and matches it against a library of
+hook templates (question, list, contrarian, "How I...", number-led, ...).
+All templates are compiled into one regex of optional lookaheads, so a
+single match() call per tweet reports every template the line fits.
+
+HookExtractor streams tweets in, keeps per-template and per-author sums, and
+reports match counts plus engagement lift per template: against the corpus
+mean, and against each author's own mean so large accounts don't dominate.
+"""
+import heapq
+import itertools
+import re
+import string
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .analytics import ENGAGEMENT_METRICS
+from .tweet import Tweet
+
+
+@dataclass(frozen=True)
+class HookTemplate:
+    """
+    A named opening-line pattern
+
+    A line matches when `prefix` (a regex) matches at its start or any of
+    `phrases` (whole words, any position) occurs in it.
+    """
+    name: str
+    description: str = ''
+    prefix: Optional[str] = None
+    phrases: Tuple[str, ...] = ()
+
+
+# Patterns see lowercased, NFKC-normalized text with straight quotes, URLs removed
+HOOK_TEMPLATES: Tuple[HookTemplate, ...] = (
+    HookTemplate('question', 'Opens with a question', prefix=r'.*\?$'),
+    HookTemplate('how_i', '"How I/we ..." first-person result', prefix=r'how (?:i|we)\b'),
+    HookTemplate('how_to', 'Promises a method',
+                 prefix=r"(?:how to|here'?s how|the (?:ultimate|complete) guide)\b"),
+    HookTemplate(
+        'list', 'Numbered list ("5 lessons ...")',
+        prefix=r'(?:(?:my|the|top|here are(?: the)?) )?\d+ (?:[\w-]+ ){0,3}?'
+               r'(?:things|ways|tips|lessons|learnings|mistakes|rules|reasons|books|tools|habits|steps|ideas'
+               r'|prompts|signs|questions|truths|frameworks|projects|principles|skills)\b',
+    ),
+    HookTemplate('number_led', 'Starts with a number, amount or count', prefix=r'[$#]?\d'),
+    HookTemplate(
+        'contrarian', 'Challenges a common belief',
+        prefix=r'stop \w+ing\b',
+        phrases=('unpopular opinion', 'hot take', 'controversial', 'is overrated', 'are overrated',
+                 'is dead', 'are dead', 'is a lie', 'is a myth', 'is a scam', 'nobody talks', 'no one talks',
+                 'nobody tells', 'no one tells', 'nobody is talking', 'no one is talking', 'most people',
+                 "everyone's", 'everyone is', "don't need", 'dont need', 'the truth is', 'the truth about',
+                 'not about', "isn't about", 'not too old', 'not too late', 'stop using', 'stop trying'),
+    ),
+    HookTemplate(
+        'personal_story', 'Opens a first-person story',
+        prefix=r"(?:\d+ (?:years|months|weeks|days) ago|at \d+,|in (?:19|20)\d\d,|yesterday|last (?:week|month|year)"
+               r"|when i was|i (?:was wrong|regret|used to|quit|left|lost|spent|started|failed|challenged)"
+               r"|my (?:mentor|boss|dad|mom|father|mother|first))\b",
+    ),
+    HookTemplate(
+        'curiosity_gap', 'Withholds the payoff',
+        prefix=r"(?:here'?s (?:why|what|the)|this is (?:why|how|what)|the (?:secret|real reason|biggest mistake"
+               r"|smartest)|what (?:nobody|no one)|you won'?t believe|i noticed something)\b",
+    ),
+    HookTemplate(
+        'hype', 'Superlative / excitement claim',
+        phrases=('absolutely wild', 'game changer', 'game-changer', 'gamechanger', 'changed everything',
+                 'changed the game', 'changed my life', 'insane', 'mind blowing', 'mind-blowing', 'just killed',
+                 'just destroyed', 'just democratized', 'just changed'),
+    ),
+    HookTemplate(
+        'announcement', 'News or launch',
+        prefix=r'(?:breaking|just in|big news|introducing|announcing)\b',
+        phrases=('just launched', 'just released', 'just announced', 'just dropped', 'just shipped',
+                 'launches', 'launched'),
+    ),
+    HookTemplate('imperative', 'Direct command to the reader',
+                 prefix=r"(?:stop|start|don'?t|do not|never|always|quit|learn|read|try|remember)\b"),
+    HookTemplate('comparison', 'Contrasts two options or groups',
+                 phrases=('vs', 'versus', 'two types', 'two kinds', 'two groups', 'into two')),
+    HookTemplate('thread', 'Announces a thread', prefix=r'(?:1/|.*\(?1/\d*\)?$)', phrases=('thread', '\U0001f9f5')),
+    HookTemplate('colon_setup', 'Sets up what follows with a trailing colon', prefix=r'.*:$'),
+)
+
+_URL = re.compile(r'https?://\S+')
+# Punctuation that separates words; apostrophes and hyphens stay inside them
+_SEPARATORS = str.maketrans({c: ' ' for c in string.punctuation if c not in "'-"})
+# Phrase matching units: words as a phrase's whole-word boundary sees them ([\w'-] runs), or one
+# other symbol (e.g. an emoji) not touching a word
+_PHRASE_TOKEN = re.compile(r"[\w'-]+|(?<![\w'-])[^\w\s'-](?![\w'-])")
+# (curly, straight); chained str.replace is much faster than str.translate with a dict
+_QUOTES = (('‘', "'"), ('’', "'"), ('“', '"'), ('”', '"'))
+
+
+def normalize(text: str) -> str:
+    """Lowercased NFKC text with straight quotes, links removed and whitespace collapsed"""
+    text = unicodedata.normalize('NFKC', text or '')
+    for curly, straight in _QUOTES:
+        text = text.replace(curly, straight)
+    if '://' in text:
+        text = _URL.sub('', text)
+    return ' '.join(text.split()).lower()
+
+
+def first_line(content: str) -> str:
+    """The first non-empty line of content, normalized for matching ('' if it is only links)"""
+    for line in (content or '').splitlines():
+        line = normalize(line)
+        if line:
+            return line
+    return ''
+
+
+def engagements(tweet: Tweet) -> int:
+    """likes + retweets + replies + quotes + bookmarks"""
+    return sum(getattr(tweet, name) or 0 for name in ENGAGEMENT_METRICS)
+
+
+def tokenize(line: str) -> List[str]:
+    """Whitespace-separated words (and emoji) of a normalized line, punctuation dropped"""
+    return line.translate(_SEPARATORS).split()
+
+
+class HookMatcher:
+    """
+    All templates matched in one pass over a line
+
+    Prefixes are compiled into one regex of optional anchored lookaheads, so
+    a single match() reports every prefix that fits (an alternation would stop
+    at the first). Phrases go into a word trie walked once along the line's
+    tokens, a word-level Aho-Corasick: phrases are a few words long, so the
+    walk stays linear in the line instead of rescanning it per phrase.
+
+    Matches are the same as searching each phrase as a whole-word regex:
+    words are [\w'-] runs, and a multi-word phrase only matches where its
+    words are separated by single spaces in the line (so 'not too old' does not
+    match 'not "too old"', nor 'is dead' match 'is, dead').
+    """
+
+    def __init__(self, templates: Sequence[HookTemplate] = HOOK_TEMPLATES):
+        self.templates = list(templates)
+        prefixed = [(f't{i}', t) for i, t in enumerate(self.templates) if t.prefix]
+        self._prefix = re.compile(''.join(f'(?:(?=(?P<{group}>{t.prefix})))?' for group, t in prefixed))
+        self._prefix_names = [t.name for _, t in prefixed]
+        self._trie: Dict[str, Any] = {}
+        for t in self.templates:
+            for phrase in t.phrases:
+                node = self._trie
+                for token in _PHRASE_TOKEN.findall(phrase.lower()):
+                    node = node.setdefault(token, {})
+                node.setdefault(None, set()).add(t.name)
+        self._order = {t.name: i for i, t in enumerate(self.templates)}
+
+    def match_line(self, line: str) -> List[str]:
+        """Names of the templates a normalized first line matches, in template order"""
+        if not line:
+            return []
+        found = self._prefix.match(line)
+        names = {name for name, group in zip(self._prefix_names, found.groups()) if group is not None}
+        if self._trie:
+            tokens = _PHRASE_TOKEN.findall(line)
+            spans = None
+            for start, token in enumerate(tokens):
+                node = self._trie.get(token)
+                position = start + 1
+                while node is not None:
+                    if None in node:
+                        if position - start == 1:
+                            names.update(node[None])
+                        else:
+                            # Multi-word hits are rare: only then look at what separates the words
+                            if spans is None:
+                                spans = [m.span() for m in _PHRASE_TOKEN.finditer(line)]
+                            if all(spans[i + 1][0] - spans[i][1] == 1 and line[spans[i][1]] == ' '
+                                   for i in range(start, position - 1)):
+                                names.update(node[None])
+                    if position == len(tokens):
+                        break
+                    node = node.get(tokens[position])
+                    position += 1
+        return sorted(names, key=self._order.__getitem__)
+
+    def match(self, content: str) -> List[str]:
+        """Names of the templates a tweet's content opens with"""
+        return self.match_line(first_line(content))
+
+
+@dataclass
+class TemplateStats:
+    """Match count and engagement lift of one hook template"""
+    template: str
+    description: str
+    matches: int
+    share: float                    # matches / tweets
+    mean_engagements: float
+    lift: float                     # mean_engagements / corpus mean
+    author_lift: float              # mean of engagements / own author's mean, over matches
+    examples: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class HookExtractor:
+    """
+    Streaming hook statistics over any number of tweets
+
+    Memory grows with authors x templates, not tweets, so a whole corpus can
+    be fed through add() in chunks; extractors built on separate shards can
+    be combined with merge().
+    """
+
+    def __init__(self, matcher: HookMatcher = None, examples: int = 3):
+        self.matcher = matcher or HookMatcher()
+        self.examples = examples
+        self.tweets = 0
+        self.unmatched = 0
+        self._author_totals: Dict[str, List[int]] = {}              # author -> [tweets, engagements]
+        self._totals: Dict[Tuple[str, str], List[int]] = {}         # (template, author) -> [matches, engagements]
+        self._examples: Dict[str, List[Tuple[int, int, Dict[str, Any]]]] = {}
+        self._tiebreak = itertools.count()
+
+    def add(self, tweets: Iterable[Union[Tweet, Dict[str, Any]]]) -> 'HookExtractor':
+        """Match and tally tweets (standard dicts, raw Lobstr results or Tweet records)"""
+        for tweet in tweets:
+            record = tweet if isinstance(tweet, Tweet) else Tweet.from_dict(tweet)
+            author = record.author.lower()
+            engaged = engagements(record)
+            author_total = self._author_totals.setdefault(author, [0, 0])
+            author_total[0] += 1
+            author_total[1] += engaged
+            self.tweets += 1
+
+            line = first_line(record.content)
+            names = self.matcher.match_line(line)
+            if not names:
+                self.unmatched += 1
+            for name in names:
+                total = self._totals.setdefault((name, author), [0, 0])
+                total[0] += 1
+                total[1] += engaged
+                if self.examples:
+                    self._keep_example(name, engaged, {
+                        'status_id': record.status_id, 'author': record.author,
+                        'first_line': line, 'engagements': engaged,
+                    })
+        return self
+
+    def _keep_example(self, name: str, engaged: int, example: Dict[str, Any]):
+        heap = self._examples.setdefault(name, [])
+        entry = (engaged, next(self._tiebreak), example)
+        if len(heap) < self.examples:
+            heapq.heappush(heap, entry)
+        elif engaged > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def merge(self, other: 'HookExtractor') -> 'HookExtractor':
+        """Fold another extractor's tallies into this one"""
+        self.tweets += other.tweets
+        self.unmatched += other.unmatched
+        for source, target in ((other._author_totals, self._author_totals), (other._totals, self._totals)):
+            for key, (count, engaged) in source.items():
+                total = target.setdefault(key, [0, 0])
+                total[0] += count
+                total[1] += engaged
+        for name, heap in other._examples.items():
+            for engaged, _, example in heap:
+                self._keep_example(name, engaged, example)
+        return self
+
+    def report(self, min_matches: int = 1) -> List[TemplateStats]:
+        """Per-template stats, highest author_lift first"""
+        corpus_engaged = sum(engaged for _, engaged in self._author_totals.values())
+        corpus_mean = corpus_engaged / self.tweets if self.tweets else 0.0
+        author_means = {author: engaged / count for author, (count, engaged) in self._author_totals.items()}
+
+        by_template: Dict[str, List[float]] = {}        # name -> [matches, engagements, relative sum, rated]
+        for (name, author), (count, engaged) in self._totals.items():
+            row = by_template.setdefault(name, [0, 0, 0.0, 0])
+            row[0] += count
+            row[1] += engaged
+            if author_means[author] > 0:
+                row[2] += engaged / author_means[author]
+                row[3] += count
+
+        descriptions = {t.name: t.description for t in self.matcher.templates}
+        stats = []
+        for name, (count, engaged, relative, rated) in by_template.items():
+            if count < min_matches:
+                continue
+            mean = engaged / count
+            examples = [example for _, _, example in sorted(self._examples.get(name, []), reverse=True)]
+            stats.append(TemplateStats(
+                template=name,
+                description=descriptions.get(name, ''),
+                matches=count,
+                share=count / self.tweets,
+                mean_engagements=mean,
+                lift=mean / corpus_mean if corpus_mean else 0.0,
+                author_lift=relative / rated if rated else 0.0,
+                examples=examples,
+            ))
+        stats.sort(key=lambda s: (s.author_lift, s.matches), reverse=True)
+        return stats
+
+
+def extract_hooks(tweets: Iterable[Union[Tweet, Dict[str, Any]]], templates: Sequence[HookTemplate] = HOOK_TEMPLATES,
+                  examples: int = 3, min_matches: int = 1) -> List[TemplateStats]:
+    """Hook template stats for a batch of tweets (see HookExtractor for streaming)"""
+    return HookExtractor(HookMatcher(templates), examples=examples).add(tweets).report(min_matches)
+
+
+def format_report(stats: Sequence[TemplateStats], extractor: Optional[HookExtractor] = None) -> str:
+    """Plain-text table of a report, e.g. to paste into an analysis prompt"""
+    lines = [f'{"template":<16}{"matches":>8}{"share":>8}{"lift":>7}{"author":>8}  best example']
+    for s in stats:
+        example = s.examples[0]['first_line'][:60] if s.examples else ''
+        lines.append(f'{s.template:<16}{s.matches:>8}{s.share:>8.1%}{s.lift:>7.2f}{s.author_lift:>8.2f}  {example}')
+    if extractor is not None:
+        lines.append(f'{extractor.unmatched} of {extractor.tweets} tweets matched no template')
+    return '\n'.join(lines)
@@ -0,0 +1,198 @@
+"""
+Checkpoint store for crash-resumable scrape jobs
+Records each job's squid id, run id, last collected results page and the raw
+results collected so far in SQLite, so a worker that dies mid-wait or
+mid-collection can re-attach to the same Lobstr run instead of paying for a
+new one. Each job is leased to one worker, which renews the lease with every
+write; another worker only takes a job over once its lease has expired.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .tweet_store import tweet_key
+
+DEFAULT_JOB_PATH = Path.home() / '.cache' / 'profile_scraper' / 'jobs.sqlite3'
+
+
+def job_id_for(search_key: str, max_results: Optional[int]) -> str:
+    """Stable id for a search, so a restarted worker finds its own checkpoint"""
+    return hashlib.sha256(f'{search_key}\n{max_results}'.encode('utf-8')).hexdigest()[:32]
+
+
+class JobLeaseLost(Exception):
+    """The job's lease expired and another worker took it over"""
+
+
+@dataclass
+class ScrapeJob:
+    """Checkpointed state of one scrape"""
+    job_id: str
+    search_urls: List[str]
+    max_results: Optional[int]
+    squid_id: Optional[str] = None
+    run_id: Optional[str] = None
+    last_page: int = 0
+    seen_ids: Set[str] = field(default_factory=set)
+    updated_at: float = 0.0
+    owner: Optional[str] = None
+
+
+class JobStore:
+    """
+    SQLite-backed scrape job checkpoints, one row per job plus its collected pages
+
+    A worker claims a job with an owner id in an IMMEDIATE transaction. Every
+    write by the owner (squid, run, page, heartbeat) renews `updated_at`; a
+    job not renewed for `lease` seconds is considered abandoned and the next
+    claim takes it over. Writes by a worker that lost its lease raise
+    JobLeaseLost instead of touching the new owner's state.
+    """
+
+    def __init__(self, path: str = None, lease: float = 120.0):
+        self.path = Path(path or os.environ.get('PROFILE_SCRAPER_JOB_STORE', DEFAULT_JOB_PATH))
+        self.lease = lease
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' job_id TEXT PRIMARY KEY,'
+                ' search_urls TEXT NOT NULL,'
+                ' max_results INTEGER,'
+                ' squid_id TEXT,'
+                ' run_id TEXT,'
+                ' last_page INTEGER NOT NULL DEFAULT 0,'
+                ' seen_ids TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' owner TEXT)'
+            )
+            # Stores created before jobs were leased
+            if 'owner' not in {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}:
+                conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS job_pages ('
+                ' job_id TEXT NOT NULL,'
+                ' page INTEGER NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' PRIMARY KEY (job_id, page))'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT job_id, search_urls, max_results, squid_id, run_id, last_page, seen_ids, updated_at,'
+                ' owner FROM jobs WHERE job_id = ?', (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, urls, max_results, squid_id, run_id, last_page, seen_ids, updated_at, owner = row
+        return ScrapeJob(job_id, json.loads(urls), max_results, squid_id, run_id, last_page,
+                         set(json.loads(seen_ids)), updated_at, owner)
+
+    def claim(self, job_id: str, search_urls: List[str], max_results: Optional[int],
+              owner: str) -> Optional[ScrapeJob]:
+        """
+        Lease the job to owner, creating an empty checkpoint if there is none
+
+        Returns:
+            The job's checkpoint, or None while another owner's lease is live
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT owner, updated_at FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row is None:
+                conn.execute(
+                    'INSERT INTO jobs (job_id, search_urls, max_results, seen_ids, updated_at, owner)'
+                    " VALUES (?, ?, ?, '[]', ?, ?)",
+                    (job_id, json.dumps(search_urls), max_results, now, owner),
+                )
+            elif row[0] not in (None, owner) and row[1] > now - self.lease:
+                return None
+            else:
+                conn.execute('UPDATE jobs SET owner = ?, updated_at = ? WHERE job_id = ?', (owner, now, job_id))
+        return self.get(job_id)
+
+    @staticmethod
+    def _renew(conn: sqlite3.Connection, job_id: str, owner: str, assignments: str = '', values=()):
+        """Apply assignments and renew the lease, or raise JobLeaseLost if owner no longer holds it"""
+        cursor = conn.execute(f'UPDATE jobs SET {assignments}updated_at = ? WHERE job_id = ? AND owner = ?',
+                              (*values, time.time(), job_id, owner))
+        if cursor.rowcount == 0:
+            raise JobLeaseLost(f'Job {job_id} is no longer leased to {owner}')
+
+    def heartbeat(self, job_id: str, owner: str):
+        """Renew owner's lease on the job (call at least every `lease` seconds)"""
+        with self._connect() as conn:
+            self._renew(conn, job_id, owner)
+
+    def update(self, job_id: str, owner: str, **fields: Any):
+        """Set squid_id and/or run_id"""
+        unknown = set(fields) - {'squid_id', 'run_id'}
+        if unknown:
+            raise ValueError(f'Unknown job fields: {", ".join(sorted(unknown))}')
+        with self._connect() as conn:
+            self._renew(conn, job_id, owner, ''.join(f'{name} = ?, ' for name in fields), fields.values())
+
+    def add_page(self, job: ScrapeJob, page: int, results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Checkpoint one collected results page (page and seen ids in one transaction)
+
+        Returns:
+            The page's results not already seen in earlier pages
+        """
+        fresh = []
+        for item in results:
+            key = tweet_key(item)
+            if key and key in job.seen_ids:
+                continue
+            job.seen_ids.add(key)
+            fresh.append(item)
+        job.last_page = page
+        with self._connect() as conn:
+            self._renew(conn, job.job_id, job.owner, 'last_page = ?, seen_ids = ?, ',
+                        (page, json.dumps(sorted(job.seen_ids))))
+            conn.execute('INSERT OR REPLACE INTO job_pages (job_id, page, data) VALUES (?, ?, ?)',
+                         (job.job_id, page, json.dumps(fresh, ensure_ascii=False)))
+        return fresh
+
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Raw results checkpointed so far, in page order"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT data FROM job_pages WHERE job_id = ? ORDER BY page', (job_id,))
+            return [item for (data,) in rows for item in json.loads(data)]
+
+    def reset(self, job_id: str, owner: str):
+        """Forget a job's squid, run and pages but keep the job (and owner's lease)"""
+        with self._connect() as conn:
+            self._renew(conn, job_id, owner, "squid_id = NULL, run_id = NULL, last_page = 0, seen_ids = '[]', ")
+            conn.execute('DELETE FROM job_pages WHERE job_id = ?', (job_id,))
+
+    def finish(self, job_id: str, owner: str):
+        """Drop a completed job's checkpoint"""
+        with self._connect() as conn:
+            if conn.execute('DELETE FROM jobs WHERE job_id = ? AND owner = ?', (job_id, owner)).rowcount == 0:
+                raise JobLeaseLost(f'Job {job_id} is no longer leased to {owner}')
+            conn.execute('DELETE FROM job_pages WHERE job_id = ?', (job_id,))
+
+    def jobs(self) -> List[ScrapeJob]:
+        """Unfinished jobs, oldest first (e.g. to find orphaned runs)"""
+        with self._connect() as conn:
+            ids = [job_id for (job_id,) in conn.execute('SELECT job_id FROM jobs ORDER BY updated_at')]
+        return [job for job in map(self.get, ids) if job is not None]
@@ -0,0 +1,93 @@
+"""
+Persistent Lobstr metadata cache
+Stores the account id, the cookie sync id and the learned API dialect
+variants on disk (SQLite), keyed by API key, so short-lived workers and CLI
+runs can skip the accounts and accounts/cookies round trips at startup. The
+scraper drops a cached account/sync id as soon as a call using it is rejected
+and fetches it again. The crawler hash is a constant and is not cached. Squid
+pool membership is not cached here either: it lives next to the squids' leases
+in squid_pool.SquidLeases.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache' / 'profile_scraper' / 'metadata.sqlite3'
+
+
+def fingerprint(secret: str) -> str:
+    """Stable short digest so raw keys and cookies never hit the disk"""
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()[:32]
+
+
+class MetadataCache:
+    """
+    Small TTL key/value store shared across processes
+
+    SQLite handles cross-process locking; every call opens its own short
+    connection so one cache can be shared between threads.
+    """
+
+    def __init__(self, path: str = None, ttl: float = 24 * 3600):
+        self.path = Path(path or os.environ.get('PROFILE_SCRAPER_CACHE', DEFAULT_CACHE_PATH))
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                ' scope TEXT NOT NULL,'
+                ' name TEXT NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' PRIMARY KEY (scope, name))'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, api_key: str, name: str, ttl: float = None) -> Optional[Any]:
+        """Return a cached value, or None when missing or older than ttl"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT value, updated_at FROM metadata WHERE scope = ? AND name = ?',
+                (fingerprint(api_key), name),
+            ).fetchone()
+        if row is None:
+            return None
+        value, updated_at = row
+        if time.time() - updated_at > (self.ttl if ttl is None else ttl):
+            return None
+        return json.loads(value)
+
+    def set(self, api_key: str, name: str, value: Any):
+        """Store a JSON-serializable value"""
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO metadata (scope, name, value, updated_at) VALUES (?, ?, ?, ?)',
+                (fingerprint(api_key), name, json.dumps(value), time.time()),
+            )
+
+    def delete(self, api_key: str, name: str):
+        """Drop a value, forcing revalidation on next use"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM metadata WHERE scope = ? AND name = ?', (fingerprint(api_key), name))
+
+    def clear(self, api_key: str = None):
+        """Drop everything for one API key, or the whole cache"""
+        with self._connect() as conn:
+            if api_key is None:
+                conn.execute('DELETE FROM metadata')
+            else:
+                conn.execute('DELETE FROM metadata WHERE scope = ?', (fingerprint(api_key),))
@@ -0,0 +1,178 @@
+"""
+Per-operation HTTP metrics for the Lobstr.io clients
+Every request attempt is reported as a RequestEvent to the scraper's hooks;
+MetricsRegistry turns those into latency histograms, status code counts, bytes
+transferred and retry counts per logical operation (create squid, launch,
+poll, results page, ...), readable in-process or as Prometheus text.
+"""
+import bisect
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class RequestEvent:
+    """One HTTP attempt as seen by the transport"""
+    operation: str
+    method: str
+    url: str
+    attempt: int                     # 0 for the first try, 1+ for retries
+    status: Optional[int] = None     # None when the connection failed
+    seconds: float = 0.0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    error: Optional[str] = None
+
+
+def operation_name(method: str, url: str) -> str:
+    """Map an API call to its logical operation, e.g. 'GET runs/{id}' -> 'poll'"""
+    method = method.upper()
+    path = urlparse(url).path.strip('/').split('/')
+    if path and path[0] == 'v1':
+        path = path[1:]
+    head = path[0] if path else ''
+    action = path[2] if len(path) > 2 else None
+
+    if head == 'squids':
+        if len(path) == 1:
+            return 'create_squid' if method == 'POST' else 'list_squids'
+        if action == 'launch':
+            return 'launch'
+        if action == 'accounts':
+            return 'attach_account'
+        if action == 'empty':
+            return 'empty_squid'
+        if method == 'DELETE':
+            return 'delete_squid'
+        return 'get_squid' if method == 'GET' else 'configure_squid'
+    if head == 'runs':
+        if len(path) == 1:
+            return 'launch'
+        return 'cancel_run' if action == 'cancel' else 'poll'
+    if head == 'results':
+        return 'results_page'
+    if head == 'tasks':
+        return 'add_tasks'
+    if head == 'accounts':
+        return 'sync_account' if len(path) > 1 else 'list_accounts'
+    if head == 'me':
+        return 'health'
+    return head or 'unknown'
+
+
+class _OperationStats:
+    """Counters and latency histogram for one operation"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.status_codes: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+
+    def add(self, event: RequestEvent):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, event.seconds)] += 1
+        self.count += 1
+        self.seconds += event.seconds
+        code = str(event.status) if event.status is not None else 'error'
+        self.status_codes[code] = self.status_codes.get(code, 0) + 1
+        self.bytes_sent += event.bytes_sent
+        self.bytes_received += event.bytes_received
+        if event.attempt:
+            self.retries += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.count,
+            'retries': self.retries,
+            'status_codes': dict(sorted(self.status_codes.items())),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'seconds_total': self.seconds,
+            'seconds_mean': self.seconds / self.count if self.count else None,
+            'seconds_p50': self.quantile(0.5),
+            'seconds_p95': self.quantile(0.95),
+            'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], self.buckets)),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process store of per-operation request metrics
+
+    Register observe() as a response hook (LobstrTwitterScraper does this by
+    default) and read snapshot() or to_prometheus() at any time.
+    """
+
+    def __init__(self, namespace: str = 'lobstr'):
+        self.namespace = namespace
+        self._ops: Dict[str, _OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, event: RequestEvent):
+        with self._lock:
+            stats = self._ops.get(event.operation)
+            if stats is None:
+                stats = self._ops[event.operation] = _OperationStats()
+            stats.add(event)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Metrics per operation, as plain dicts"""
+        with self._lock:
+            return {op: stats.to_dict() for op, stats in sorted(self._ops.items())}
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        ns = self.namespace
+        lines: List[str] = [
+            f'# HELP {ns}_request_duration_seconds Lobstr API request latency per attempt',
+            f'# TYPE {ns}_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            ops = sorted(self._ops.items())
+            for op, stats in ops:
+                cumulative = 0
+                for bound, n in zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], stats.buckets):
+                    cumulative += n
+                    lines.append(f'{ns}_request_duration_seconds_bucket{{operation="{op}",le="{bound}"}} {cumulative}')
+                lines.append(f'{ns}_request_duration_seconds_sum{{operation="{op}"}} {stats.seconds:.6f}')
+                lines.append(f'{ns}_request_duration_seconds_count{{operation="{op}"}} {stats.count}')
+
+            lines += [f'# HELP {ns}_responses_total Lobstr API responses by status code',
+                      f'# TYPE {ns}_responses_total counter']
+            for op, stats in ops:
+                for code, n in sorted(stats.status_codes.items()):
+                    lines.append(f'{ns}_responses_total{{operation="{op}",code="{code}"}} {n}')
+
+            for name, attr, help_text in (
+                ('retries_total', 'retries', 'Retried request attempts'),
+                ('sent_bytes_total', 'bytes_sent', 'Request body bytes sent'),
+                ('received_bytes_total', 'bytes_received', 'Response body bytes received'),
+            ):
+                lines += [f'# HELP {ns}_{name} {help_text}', f'# TYPE {ns}_{name} counter']
+                for op, stats in ops:
+                    lines.append(f'{ns}_{name}{{operation="{op}"}} {getattr(stats, attr)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,544 @@
+"""
+Offline Lobstr.io API stand-in
+Implements the endpoints LobstrTwitterScraper uses (me, accounts, squids,
+tasks, runs, runs/{id}, results) on a local ThreadingHTTPServer, with
+configurable latency, pagination limits, rate limiting and run-progress
+simulation. Tweets come from the saved tests/*_tweets.json datasets (matched
+by the from:<handle> in each task URL) or are synthesized.
+
+Record/replay: RecordingProxy forwards to the real API and appends every
+exchange to a JSONL fixture; MockLobstrServer(fixture=...) serves recorded
+responses before falling back to the simulation. Fixtures are safe to commit:
+cookies, tokens and other secret-looking fields are redacted before writing.
+
+Usage:
+    python3 -m profile_scraper.mock_server --port 8765 --latency 0.05
+    scraper = LobstrTwitterScraper('any-key', base_url='http://127.0.0.1:8765/v1/')
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+DATASET_DIR = Path(__file__).parent.parent / 'tests'
+
+# Body keys whose values never go into a recorded fixture (e.g. accounts/cookies
+# carries the Twitter auth_token and ct0 session cookies)
+SECRET_KEY = re.compile(r'token|secret|password|passwd|cookie|ct0|session|api[_-]?key|authorization', re.IGNORECASE)
+REDACTED = '[redacted]'
+
+
+def load_datasets(paths: List[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Raw Lobstr results per lowercase username from saved scrape files"""
+    if paths is None:
+        paths = sorted(DATASET_DIR.glob('*_tweets.json'))
+    by_author: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for path in paths:
+        for tweet in json.loads(Path(path).read_text(encoding='utf-8')):
+            raw = tweet.get('raw_data') or tweet
+            author = str(raw.get('username') or '').lower()
+            key = str(raw.get('internal_unique_id') or raw.get('id'))
+            by_author.setdefault(author, {})[key] = raw
+    # Newest first, like a live search
+    return {
+        author: sorted(tweets.values(), key=lambda r: r.get('published_at') or '', reverse=True)
+        for author, tweets in by_author.items()
+    }
+
+
+def parse_search_url(url: str) -> Dict[str, Optional[str]]:
+    """Pull from:/since:/until: out of an x.com search URL"""
+    query = unquote(parse_qs(urlparse(url).query).get('q', [''])[0])
+    found = {}
+    for op in ('from', 'since', 'until'):
+        match = re.search(rf'(?<![-\w]){op}:(\S+)', query)
+        found[op] = match.group(1) if match else None
+    return found
+
+
+def synthesize_tweets(handle: str, count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Deterministic fake raw results for handles without a dataset"""
+    rng = random.Random(f'{handle}:{seed}')
+    now = int(time.time())
+    tweets = []
+    for i in range(count):
+        status_id = str(1_900_000_000_000_000_000 + rng.randrange(10 ** 15))
+        likes = int(rng.paretovariate(1.2) * 10)
+        tweets.append({
+            'object': 'result',
+            'content': f'Synthetic tweet {i} from @{handle}: ' + ' '.join(
+                rng.choice(['how', 'I', 'built', 'growth', 'AI', 'startup', 'lessons', 'thread', '10x', 'why'])
+                for _ in range(rng.randint(6, 30))),
+            'internal_unique_id': status_id,
+            'username': handle,
+            'name': handle.title(),
+            'published_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now - i * 3600 * rng.randint(1, 30))),
+            'likes': likes,
+            'retweet_count': likes // 5,
+            'reply_count': likes // 7,
+            'quote_count': likes // 40,
+            'views_count': likes * rng.randint(40, 120),
+            'bookmarks_count': likes // 3,
+            'tweet_url': f'https://twitter.com/{handle}/status/{status_id}',
+        })
+    return tweets
+
+
+class _Run:
+    def __init__(self, run_id: str, squid_id: str, results: List[Dict[str, Any]], results_per_second: float):
+        self.run_id = run_id
+        self.squid_id = squid_id
+        self.results = results
+        self.results_per_second = results_per_second
+        self.started_at = time.time()
+        self.cancelled_at: Optional[float] = None
+
+    def produced(self) -> int:
+        """Results available so far under the progress simulation"""
+        end = self.cancelled_at or time.time()
+        if not self.results_per_second:
+            return len(self.results)
+        return min(len(self.results), int((end - self.started_at) * self.results_per_second))
+
+    def status(self) -> Dict[str, Any]:
+        produced = self.produced()
+        done = self.cancelled_at is not None or produced >= len(self.results)
+        status = 'aborted' if self.cancelled_at is not None else ('done' if done else 'running')
+        return {
+            'id': self.run_id,
+            'object': 'run',
+            'squid': self.squid_id,
+            'status': status,
+            'is_done': done,
+            'total_results': produced,
+        }
+
+
+class MockLobstrServer:
+    """
+    Local Lobstr API simulation
+
+    Args:
+        datasets: Raw results per username (default: tests/*_tweets.json)
+        latency: Seconds added to every request
+        results_per_second: Run progress speed (0 = runs finish instantly)
+        max_page_size: Largest page_size honored by /results
+        slots: Squid slot limit (SlotsLimitExceeded beyond it)
+        rate_limit: Requests per second before 429s (0 = unlimited)
+        synthesize: Fill handles without a dataset with synthetic tweets
+        fixture: JSONL file recorded by RecordingProxy to replay first
+    """
+
+    def __init__(self, datasets: Dict[str, List[Dict[str, Any]]] = None, latency: float = 0.0,
+                 results_per_second: float = 0.0, max_page_size: int = 100, slots: int = 10,
+                 rate_limit: int = 0, synthesize: bool = True, synthetic_count: int = 200,
+                 fixture: str = None, host: str = '127.0.0.1', port: int = 0):
+        self.datasets = load_datasets() if datasets is None else datasets
+        self.latency = latency
+        self.results_per_second = results_per_second
+        self.max_page_size = max_page_size
+        self.slots = slots
+        # Ids GET accounts lists; requests naming any other account get 404 AccountNotFound
+        self.accounts = ['mock-account']
+        self.rate_limit = rate_limit
+        self.synthesize = synthesize
+        self.synthetic_count = synthetic_count
+        self.replay = _load_fixture(fixture) if fixture else {}
+
+        self.lock = threading.Lock()
+        self.squids: Dict[str, Dict[str, Any]] = {}
+        self.runs: Dict[str, _Run] = {}
+        self.request_log: List[Tuple[str, str]] = []
+        self._result_ids = itertools.count(1)
+        self._window = [time.time(), 0]
+
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1/'
+
+    def start(self) -> 'MockLobstrServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def call_counts(self) -> Dict[str, int]:
+        """Requests served per 'METHOD endpoint' (ids collapsed to {id})"""
+        counts: Dict[str, int] = {}
+        with self.lock:
+            for method, path in self.request_log:
+                key = f'{method} {_endpoint(path)}'
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    # -- simulation ---------------------------------------------------------
+
+    def _rate_limit(self) -> Tuple[bool, Dict[str, str]]:
+        """Fixed one-second window; returns (limited, headers)"""
+        if not self.rate_limit:
+            return False, {}
+        with self.lock:
+            now = time.time()
+            if now - self._window[0] >= 1:
+                self._window = [now, 0]
+            self._window[1] += 1
+            remaining = self.rate_limit - self._window[1]
+            reset = max(0.0, 1 - (now - self._window[0]))
+        if remaining < 0:
+            return True, {'Retry-After': f'{reset:.3f}'}
+        return False, {'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Reset': f'{reset:.3f}'}
+
+    def _tweets_for_task(self, url: str, cap: Optional[int] = None) -> List[Dict[str, Any]]:
+        search = parse_search_url(url)
+        handle = (search['from'] or '').lower()
+        tweets = self.datasets.get(handle)
+        if tweets is None:
+            count = min(self.synthetic_count, cap or self.synthetic_count)
+            tweets = synthesize_tweets(handle or 'someone', count) if self.synthesize else []
+        if search['since']:
+            tweets = [t for t in tweets if (t.get('published_at') or '')[:10] >= search['since']]
+        if search['until']:
+            tweets = [t for t in tweets if (t.get('published_at') or '')[:10] < search['until']]
+        return tweets
+
+    def add_run(self, results: List[Dict[str, Any]], run_id: str = None) -> str:
+        """Register a run serving `results` directly, without a squid"""
+        run_id = run_id or uuid.uuid4().hex
+        with self.lock:
+            self.runs[run_id] = _Run(run_id, None, results, self.results_per_second)
+        return run_id
+
+    def launch(self, squid_id: str, max_results: Optional[int]) -> _Run:
+        squid = self.squids[squid_id]
+        cap = max_results or (squid.get('params') or {}).get('max_unique_results_per_run')
+        run_id = uuid.uuid4().hex
+        seen, results = set(), []
+        # Tasks run concurrently upstream, so their results arrive interleaved
+        per_task = [self._tweets_for_task(task, cap) for task in squid['tasks']]
+        for batch in itertools.zip_longest(*per_task):
+            for tweet in batch:
+                key = tweet and (tweet.get('internal_unique_id') or tweet.get('id'))
+                if tweet is None or key in seen:
+                    continue
+                seen.add(key)
+                results.append(dict(tweet, id=next(self._result_ids), run=run_id))
+        if cap:
+            results = results[:cap]
+        run = _Run(run_id, squid_id, results, self.results_per_second)
+        self.runs[run_id] = run
+        return run
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+        """Dispatch one API call; returns (status, json body)"""
+        parts = path.strip('/').split('/')[1:]  # drop 'v1'
+        named = [body.get('account')] if isinstance(body, dict) and body.get('account') else []
+        if isinstance(body, dict):
+            named += [a['id'] if isinstance(a, dict) else a for a in body.get('accounts') or []]
+        with self.lock:
+            if parts[0] in ('squids', 'runs') and method in ('POST', 'PUT') and set(named) - set(self.accounts):
+                return 404, {'error': 'AccountNotFound'}
+            if parts == ['me']:
+                return 200, {'email': 'mock@localhost', 'credits': 1_000_000}
+            if parts == ['accounts'] and method == 'GET':
+                return 200, {'data': [{'id': a, 'platform': 'twitter'} for a in self.accounts]}
+            if parts == ['accounts', 'cookies'] and method == 'POST':
+                return 200, {'id': 'mock-sync'}
+
+            if parts == ['squids']:
+                if method == 'GET':
+                    return 200, {'data': [dict(s, id=i) for i, s in self.squids.items()]}
+                if len(self.squids) >= self.slots:
+                    return 400, {'error': 'SlotsLimitExceeded'}
+                squid_id = uuid.uuid4().hex
+                self.squids[squid_id] = {
+                    'name': 'Twitter Search Results Scraper',
+                    'crawler': body.get('crawler'),
+                    'is_ready': True,
+                    'accounts': list(body.get('accounts') or []),
+                    'no_line_breaks': True,
+                    'export_unique_results': True,
+                    'to_complete': False,
+                    'concurrency': body.get('concurrency', 1),
+                    'params': {'max_results': body.get('max_results'),
+                               'max_unique_results_per_run': body.get('max_unique_results_per_run')},
+                    'tasks': [],
+                }
+                return 200, dict(self.squids[squid_id], id=squid_id)
+
+            if parts[0] == 'squids' and len(parts) >= 2:
+                squid = self.squids.get(parts[1])
+                if squid is None:
+                    return 404, {'error': 'NotFound'}
+                action = parts[2] if len(parts) > 2 else None
+                if action is None and method == 'GET':
+                    return 200, dict(squid, id=parts[1])
+                if action is None and method == 'DELETE':
+                    del self.squids[parts[1]]
+                    return 200, {'deleted': True}
+                if action is None and method == 'POST':
+                    for key in ('name', 'no_line_breaks', 'export_unique_results', 'to_complete', 'accounts',
+                                'concurrency'):
+                        if key in body:
+                            squid[key] = body[key]
+                    squid['params'].update(body.get('params') or {})
+                    return 200, dict(squid, id=parts[1])
+                if action == 'empty':
+                    squid['tasks'] = []
+                    return 200, {'deleted': True}
+                if action == 'accounts' and method == 'POST':
+                    squid['accounts'] = list(body.get('accounts') or [body.get('account')])
+                    return 200, dict(squid, id=parts[1])
+                if action == 'launch':
+                    run = self.launch(parts[1], body.get('max_unique_results_per_run'))
+                    return 200, {'id': run.run_id}
+                return 405, {'error': 'MethodNotAllowed'}
+
+            if parts == ['tasks'] and method == 'POST':
+                squid = self.squids.get(body.get('squid'))
+                if squid is None:
+                    return 404, {'error': 'NotFound'}
+                squid['tasks'].extend(t['url'] for t in body.get('tasks') or [])
+                return 200, {'tasks': body.get('tasks')}
+
+            if parts == ['runs'] and method == 'POST':
+                if body.get('squid') not in self.squids:
+                    return 404, {'error': 'NotFound'}
+                run = self.launch(body['squid'], body.get('max_unique_results_per_run'))
+                return 200, {'id': run.run_id}
+
+            if parts[0] == 'runs' and len(parts) >= 2:
+                run = self.runs.get(parts[1])
+                if run is None:
+                    return 404, {'error': 'NotFound'}
+                if len(parts) == 3 and parts[2] == 'cancel':
+                    run.cancelled_at = run.cancelled_at or time.time()
+                    return 200, run.status()
+                return 200, run.status()
+
+            if parts == ['results']:
+                run = self.runs.get(query.get('run'))
+                if run is None:
+                    return 404, {'error': 'NotFound'}
+                page = max(1, int(query.get('page', 1)))
+                page_size = min(self.max_page_size, int(query.get('page_size', 100)))
+                start = (page - 1) * page_size
+                produced = run.produced()
+                data = run.results[start:min(start + page_size, produced)]
+                return 200, {'data': data, 'page': page, 'page_size': page_size, 'total_results': produced}
+
+        return 404, {'error': 'NotFound'}
+
+
+def _endpoint(path: str) -> str:
+    parts = path.strip('/').split('/')[1:]
+    if len(parts) >= 2 and parts[0] in ('squids', 'runs'):
+        parts[1] = '{id}'
+    return '/'.join(parts)
+
+
+def _replay_key(method: str, path: str, query: Dict[str, str]) -> str:
+    return f"{method} {path} {json.dumps(sorted(query.items()))}"
+
+
+def _redact(value: Any) -> Any:
+    """Copy of a JSON value with every SECRET_KEY field replaced by REDACTED"""
+    if isinstance(value, dict):
+        return {k: REDACTED if SECRET_KEY.search(str(k)) else _redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def _load_fixture(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Recorded exchanges grouped by request, replayed in order"""
+    replay: Dict[str, List[Dict[str, Any]]] = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                replay.setdefault(_replay_key(entry['method'], entry['path'], entry['query']), []).append(entry)
+    return replay
+
+
+def _make_handler(server: MockLobstrServer):
+    class MockLobstrHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: Any, headers: Dict[str, str] = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self):
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            body = json.loads(raw) if raw else {}
+
+            with server.lock:
+                server.request_log.append((self.command, parsed.path))
+
+            limited, headers = server._rate_limit()
+            if limited:
+                return self._send(429, {'error': 'TooManyRequests'}, headers)
+            if server.latency:
+                time.sleep(server.latency)
+
+            recorded = server.replay.get(_replay_key(self.command, parsed.path, query))
+            if recorded:
+                entry = recorded.pop(0) if len(recorded) > 1 else recorded[0]
+                return self._send(entry['status'], entry['response'], headers)
+
+            status, response = server.handle(self.command, parsed.path, query, body)
+            self._send(status, response, headers)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    return MockLobstrHandler
+
+
+class RecordingProxy:
+    """
+    Forward calls to the real Lobstr API and record them as a replay fixture
+
+    Point a scraper at proxy.base_url; every exchange is appended to `fixture`
+    as one JSON line. The Authorization header is never recorded, and request
+    and response bodies pass through _redact, so cookies and tokens (e.g. the
+    accounts/cookies sync body) are stored as REDACTED.
+    """
+
+    def __init__(self, fixture: str, upstream: str = 'https://api.lobstr.io', host: str = '127.0.0.1',
+                 port: int = 0):
+        import requests
+
+        self.fixture = Path(fixture)
+        self.upstream = upstream.rstrip('/')
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        proxy = self
+
+        class RecordingHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _forward(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else None
+                headers = {k: v for k, v in self.headers.items() if k.lower() in ('authorization', 'content-type')}
+                upstream = proxy.session.request(self.command, proxy.upstream + self.path, data=body, headers=headers)
+                try:
+                    response = upstream.json()
+                except ValueError:
+                    response = {'raw': upstream.text}
+                try:
+                    request = json.loads(body) if body else None
+                except ValueError:
+                    request = None
+                entry = {
+                    'method': self.command,
+                    'path': parsed.path,
+                    'query': {k: v[0] for k, v in parse_qs(parsed.query).items()},
+                    'request': _redact(request),
+                    'status': upstream.status_code,
+                    'response': _redact(response),
+                }
+                with proxy.lock, open(proxy.fixture, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                data = json.dumps(response).encode()
+                self.send_response(upstream.status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _forward
+
+        self.httpd = ThreadingHTTPServer((host, port), RecordingHandler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1/'
+
+    def start(self) -> 'RecordingProxy':
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Lobstr.io API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added per request')
+    parser.add_argument('--results-per-second', type=float, default=50.0, help='run progress speed (0 = instant)')
+    parser.add_argument('--rate-limit', type=int, default=0, help='requests/second before 429 (0 = unlimited)')
+    parser.add_argument('--slots', type=int, default=10)
+    parser.add_argument('--datasets', nargs='*', help='saved *_tweets.json files (default: tests/)')
+    parser.add_argument('--fixture', help='JSONL recorded by RecordingProxy to replay')
+    parser.add_argument('--record', help='proxy to the real API and record a fixture to this path')
+    args = parser.parse_args()
+
+    if args.record:
+        server = RecordingProxy(args.record, host=args.host, port=args.port)
+        print(f'Recording Lobstr API traffic to {args.record} via {server.base_url}')
+    else:
+        server = MockLobstrServer(
+            datasets=load_datasets(args.datasets) if args.datasets else None,
+            latency=args.latency, results_per_second=args.results_per_second,
+            rate_limit=args.rate_limit, slots=args.slots, fixture=args.fixture,
+            host=args.host, port=args.port,
+        )
+        print(f'Mock Lobstr API on {server.base_url} ({len(server.datasets)} datasets)')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
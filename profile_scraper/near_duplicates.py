@@ -0,0 +1,313 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH banding
+Creators repost lightly edited tweets, which double-count a pattern, and a
+generated tweet can end up nearly copying its source. Each text is reduced to
+character shingles and a MinHash signature whose agreement estimates Jaccard
+similarity. Signatures are split into bands; only texts sharing a band bucket
+are compared, so clustering is roughly linear in the corpus instead of
+comparing every pair.
+
+Requires numpy (pip install numpy).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .hook_patterns import engagements, normalize
+from .tweet import Tweet
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# Shingles per vectorized MinHash block; NUM_PERM x block uint64s (4 MB) stay in cache
+BLOCK_SHINGLES = 4096
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('Near-duplicate detection requires numpy: pip install numpy')
+
+
+def _encoded(text: str, size: int) -> bytes:
+    """Normalized UTF-8 text, NUL-padded to at least one shingle ('' stays empty)"""
+    data = normalize(text).encode('utf-8')
+    return data.ljust(size, b'\0') if data else data
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[bytes]:
+    """Overlapping size-byte windows of the normalized UTF-8 text"""
+    data = _encoded(text, size)
+    return {data[i:i + size] for i in range(len(data) - size + 1)}
+
+
+def jaccard(a: Set[bytes], b: Set[bytes]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    (bands, rows) whose LSH S-curve turns at about threshold
+
+    Two texts with Jaccard s share at least one band bucket with probability
+    1 - (1 - s**rows)**bands, which rises steeply around (1/bands)**(1/rows).
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """
+    MinHash signatures computed for many texts at once
+
+    Shingles are the texts' size-byte windows read straight out of one joined
+    buffer as integers (exact for size <= 8, so no shingle hashing). Each of
+    num_perm multiply-add hashes (a * x + b on uint64, top 32 bits kept) is
+    applied to a whole block, and np.minimum.reduceat takes every text's
+    minima. Shifting after the minimum is safe because the shift is monotone.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        _require_numpy()
+        if not 1 <= shingle_size <= 8:
+            raise ValueError('shingle_size must be between 1 and 8 bytes')
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = (rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)[:, None]
+        self._weights = np.uint64(1) << (np.arange(shingle_size, dtype=np.uint64) * np.uint64(8))
+
+    def _shingle_values(self, data: List[bytes]):
+        """(uint64 shingle values of the joined texts, shingles per text)"""
+        size = self.shingle_size
+        lengths = np.fromiter((len(d) for d in data), dtype=np.int64, count=len(data))
+        counts = np.where(lengths >= size, lengths - size + 1, 0)
+        buffer = np.frombuffer(b''.join(data), dtype=np.uint8).astype(np.uint64)
+        if len(buffer) < size:
+            return np.zeros(0, dtype=np.uint64), counts
+        windows = sum(buffer[j:len(buffer) - size + 1 + j] * self._weights[j] for j in range(size))
+        # Keep only windows that start and end inside one text
+        text_starts = np.cumsum(lengths) - lengths
+        shingle_starts = np.cumsum(counts) - counts
+        positions = np.arange(counts.sum()) + np.repeat(text_starts - shingle_starts, counts)
+        return windows[positions], counts
+
+    def signatures(self, texts: Iterable[str]):
+        """
+        uint32 signature matrix, one row per text
+
+        Texts without shingles (empty, or only links) get all-max rows, which
+        an LSH index leaves out of its buckets.
+        """
+        data = [_encoded(t, self.shingle_size) for t in texts]
+        out = np.full((len(data), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        start = 0
+        while start < len(data):
+            end, total = start, 0
+            while end < len(data) and (total == 0 or total + len(data[end]) <= BLOCK_SHINGLES):
+                total += len(data[end])
+                end += 1
+            values, counts = self._shingle_values(data[start:end])
+            filled = np.flatnonzero(counts)
+            if len(filled):
+                permuted = np.multiply(self._a, values)
+                permuted += self._b
+                minima = np.minimum.reduceat(permuted, (np.cumsum(counts) - counts)[filled], axis=1)
+                out[start + filled] = (minima >> np.uint64(32)).T
+            start = end
+        return out
+
+    def signature(self, text: str):
+        return self.signatures([text])[0]
+
+
+class _DisjointSet:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of MinHash signatures over a set of texts
+
+    Build it from a profile's (or every profile's) scraped tweets, then
+    cluster() groups near-duplicates inside it and query() finds indexed
+    texts similar to a new one, e.g. a generated tweet.
+
+    Each band of rows is reduced to one 64-bit bucket key per text. Per band,
+    keys are kept sorted next to the text indices, so a bucket is a contiguous
+    run found with searchsorted.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE,
+                 hasher: MinHasher = None):
+        _require_numpy()
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = lsh_params(threshold, self.hasher.num_perm)
+        self.texts: List[str] = []
+        self.signatures = np.zeros((0, self.hasher.num_perm), dtype=np.uint32)
+        self._keys = np.zeros((0, self.bands), dtype=np.uint64)     # bucket key per (text, band)
+        self._sorted: Optional[List[Tuple[Any, Any]]] = None          # per band: (sorted keys, text indices)
+        self._mix = np.random.default_rng(7).integers(1, 2 ** 63, self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _band_keys(self, signatures):
+        """uint64 bucket key per (text, band)"""
+        banded = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for row in range(self.rows):
+            keys ^= banded[:, :, row].astype(np.uint64)
+            keys *= self._mix[row]
+        return keys
+
+    def _buckets(self) -> List[Tuple[Any, Any]]:
+        if self._sorted is None:
+            indexed = np.flatnonzero(~np.all(self.signatures == np.iinfo(np.uint32).max, axis=1))
+            self._sorted = []
+            for band in range(self.bands):
+                keys = self._keys[indexed, band]
+                order = np.argsort(keys, kind='stable')
+                self._sorted.append((keys[order], indexed[order]))
+        return self._sorted
+
+    def add(self, texts: Iterable[str]) -> range:
+        """Index texts; returns their indices"""
+        texts = list(texts)
+        signatures = self.hasher.signatures(texts)
+        base = len(self.texts)
+        self.texts.extend(texts)
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self._keys = np.concatenate([self._keys, self._band_keys(signatures)])
+        self._sorted = None
+        return range(base, base + len(texts))
+
+    def estimate(self, a: int, others) -> Any:
+        """Estimated Jaccard of text a against each of others (signature agreement)"""
+        return np.mean(self.signatures[others] == self.signatures[a], axis=1)
+
+    def cluster(self) -> List[List[int]]:
+        """
+        Groups of near-duplicate indices (size >= 2), largest first
+
+        Texts sharing a bucket are joined when their signatures agree on at
+        least `threshold` of positions. Each bucket member is checked against
+        the bucket's first member only, so the work stays linear.
+        """
+        groups = _DisjointSet(len(self.texts))
+        for keys, members in self._buckets():
+            if len(keys) < 2:
+                continue
+            starts = np.concatenate(([True], keys[1:] != keys[:-1]))
+            first = members[np.maximum.accumulate(np.where(starts, np.arange(len(keys)), 0))]
+            pending = np.flatnonzero(~starts)
+            if not len(pending):
+                continue
+            similarity = np.mean(self.signatures[members[pending]] == self.signatures[first[pending]], axis=1)
+            for a, b in zip(first[pending][similarity >= self.threshold].tolist(),
+                            members[pending][similarity >= self.threshold].tolist()):
+                groups.union(a, b)
+
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(self.texts)):
+            clusters.setdefault(groups.find(i), []).append(i)
+        found = [members for members in clusters.values() if len(members) > 1]
+        found.sort(key=len, reverse=True)
+        return found
+
+    def query(self, text: str, threshold: float = None, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        (index, Jaccard) of indexed texts similar to text, most similar first
+
+        Candidates come from the LSH buckets; similarity is the exact shingle
+        Jaccard, so results are not subject to signature noise.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        query_keys = self._band_keys(self.hasher.signatures([text]))[0]
+        candidates = set()
+        for key, (keys, members) in zip(query_keys, self._buckets()):
+            lo, hi = np.searchsorted(keys, key, side='left'), np.searchsorted(keys, key, side='right')
+            candidates.update(members[lo:hi].tolist())
+        if not candidates:
+            return []
+        wanted = shingles(text, self.hasher.shingle_size)
+        scored = [(i, jaccard(wanted, shingles(self.texts[i], self.hasher.shingle_size))) for i in candidates]
+        scored = [hit for hit in scored if hit[1] >= threshold]
+        scored.sort(key=lambda hit: (-hit[1], hit[0]))
+        return scored[:k]
+
+
+TweetLike = Union[Tweet, Dict[str, Any]]
+
+
+def _records(tweets: Iterable[TweetLike]) -> List[Tweet]:
+    return [t if isinstance(t, Tweet) else Tweet.from_dict(t) for t in tweets]
+
+
+def cluster_tweets(tweets: Iterable[TweetLike], threshold: float = 0.7) -> List[List[Tweet]]:
+    """Near-duplicate groups of tweets, most engaged tweet first in each"""
+    records = _records(tweets)
+    index = NearDuplicateIndex(threshold)
+    index.add(r.content for r in records)
+    return [sorted((records[i] for i in members), key=engagements, reverse=True) for members in index.cluster()]
+
+
+def dedupe_tweets(tweets: Iterable[TweetLike], threshold: float = 0.7) -> List[TweetLike]:
+    """
+    tweets with each near-duplicate group reduced to its most engaged tweet
+
+    Order and item types are preserved, so the result can feed pattern
+    statistics in place of the raw corpus.
+    """
+    items = list(tweets)
+    records = _records(items)
+    index = NearDuplicateIndex(threshold)
+    index.add(r.content for r in records)
+    dropped = set()
+    for members in index.cluster():
+        keep = max(members, key=lambda i: engagements(records[i]))
+        dropped.update(i for i in members if i != keep)
+    return [item for i, item in enumerate(items) if i not in dropped]
+
+
+def flag_generated(generated: Iterable[Union[str, Any]], source: Union[NearDuplicateIndex, Iterable[TweetLike]],
+                   threshold: float = 0.6) -> List[Optional[Tuple[int, float]]]:
+    """
+    For each generated tweet, the (source index, Jaccard) of the closest
+    scraped tweet at or above threshold, or None
+
+    generated: Texts or GeneratedTweet-like rows (with .tweet_text)
+    source: A NearDuplicateIndex of scraped tweet texts, or the scraped tweets
+    """
+    if not isinstance(source, NearDuplicateIndex):
+        records = _records(source)
+        source = NearDuplicateIndex(threshold)
+        source.add(r.content for r in records)
+    flags = []
+    for row in generated:
+        text = row if isinstance(row, str) else row.tweet_text
+        hits = source.query(text, threshold=threshold, k=1)
+        flags.append(hits[0] if hits else None)
+    return flags
@@ -0,0 +1,176 @@
+"""
+Adaptive run polling for Lobstr.io jobs
+Polls fast while a run is young, backs off as it ages, and predicts completion
+from the growth of total_results. One RunPoller loop can watch many runs
+against a single shared deadline.
+"""
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RunProgress:
+    """One progress observation for a run"""
+    run_id: str
+    status: str
+    total_results: int
+    done: bool
+    elapsed: float                   # seconds since the poller started watching
+    rate: Optional[float] = None     # results per second, from recent polls
+    eta: Optional[float] = None      # predicted seconds until done (needs a target)
+    next_poll_in: Optional[float] = None
+    run_data: Optional[Dict[str, Any]] = None
+
+
+class _RunState:
+    """Per-run polling bookkeeping"""
+
+    def __init__(self, run_id: str, target: Optional[int], interval: float):
+        self.run_id = run_id
+        self.target = target
+        self.interval = interval
+        self.samples = []  # (timestamp, total_results), newest last
+
+    def observe(self, now: float, total: int):
+        self.samples.append((now, total))
+        del self.samples[:-5]
+
+    def rate(self) -> Optional[float]:
+        if len(self.samples) < 2:
+            return None
+        (t0, n0), (t1, n1) = self.samples[0], self.samples[-1]
+        if t1 <= t0 or n1 <= n0:
+            return None
+        return (n1 - n0) / (t1 - t0)
+
+    def eta(self) -> Optional[float]:
+        rate = self.rate()
+        if not rate or not self.target:
+            return None
+        return max(0.0, (self.target - self.samples[-1][1]) / rate)
+
+
+class RunPoller:
+    """
+    Watch one or more runs with adaptive polling
+
+    Each run starts at min_interval and backs off by `backoff` per poll up to
+    max_interval. When a target result count is known the run's growth rate
+    gives an ETA, and the next poll is pulled in to land on it.
+    """
+
+    def __init__(self, scraper, min_interval: float = 1.0, max_interval: float = 30.0,
+                 backoff: float = 1.5, sleep: Callable[[float], None] = time.sleep):
+        self.scraper = scraper
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._sleep = sleep
+
+    def iter_progress(self, run_ids: Iterable[str], deadline: Optional[float] = None,
+                      targets: Dict[str, int] = None) -> Iterator[RunProgress]:
+        """
+        Poll every run in a single loop, yielding a RunProgress per poll
+
+        Args:
+            run_ids: Runs to watch
+            deadline: Absolute time.time() shared by all runs; stops when passed
+            targets: Optional expected result count per run, used for ETAs
+
+        Raises:
+            TimeoutError: When the deadline passes with runs still pending
+        """
+        targets = targets or {}
+        start = time.time()
+        # Heap of (next_poll_at, run_id); all runs are polled right away
+        states = {run_id: _RunState(run_id, targets.get(run_id), self.min_interval) for run_id in run_ids}
+        queue = [(start, run_id) for run_id in states]
+        heapq.heapify(queue)
+
+        while queue:
+            due, run_id = heapq.heappop(queue)
+            now = time.time()
+            if due > now:
+                self._sleep(due - now)
+                now = time.time()
+
+            run_data = self.scraper.get_run_status(run_id)
+            state = states[run_id]
+            status = run_data.get('status', 'unknown')
+            total = run_data.get('total_results') or 0
+            done = bool(run_data.get('is_done') or status == 'done')
+            state.observe(now, total)
+
+            next_poll_in = None
+            if not done:
+                if deadline is not None and now >= deadline:
+                    pending = [run_id] + [r for _, r in queue]
+                    raise TimeoutError(f'Runs still pending at deadline: {", ".join(pending)}')
+                next_poll_in = state.interval
+                eta = state.eta()
+                if eta is not None:
+                    next_poll_in = min(next_poll_in, max(self.min_interval, eta))
+                if deadline is not None:
+                    # Always get one last look at the deadline itself
+                    next_poll_in = min(next_poll_in, deadline - now)
+                state.interval = min(self.max_interval, state.interval * self.backoff)
+                heapq.heappush(queue, (now + next_poll_in, run_id))
+
+            yield RunProgress(
+                run_id=run_id,
+                status=status,
+                total_results=total,
+                done=done,
+                elapsed=now - start,
+                rate=state.rate(),
+                eta=0.0 if done else state.eta(),
+                next_poll_in=next_poll_in,
+                run_data=run_data,
+            )
+
+    def wait(self, run_ids: Iterable[str], deadline: Optional[float] = None,
+             targets: Dict[str, int] = None,
+             on_progress: Callable[[RunProgress], None] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Block until every run is done
+
+        Returns:
+            Final run data per run id
+        """
+        finished = {}
+        for progress in self.iter_progress(run_ids, deadline=deadline, targets=targets):
+            if on_progress:
+                on_progress(progress)
+            if progress.done:
+                finished[progress.run_id] = progress.run_data
+        return finished
+
+
+def print_progress(progress: RunProgress):
+    """Progress callback printing the scraper's classic status lines"""
+    if progress.done:
+        print(f'✅ Job completed! Total results: {progress.total_results}')
+        return
+    eta = f' - ETA {progress.eta:.0f}s' if progress.eta is not None else ''
+    print(f'  Status: {progress.status} - Results: {progress.total_results}{eta}')
+
+
+def log_progress(progress: RunProgress):
+    """
+    Default progress callback: one structured log record per poll
+
+    Completion is logged at INFO and intermediate polls at DEBUG; the
+    RunProgress fields ride along as record attributes.
+    """
+    fields = {'run_id': progress.run_id, 'status': progress.status, 'total_results': progress.total_results,
+              'elapsed': round(progress.elapsed, 3), 'rate': progress.rate, 'eta': progress.eta}
+    if progress.done:
+        logger.info('Run %s completed: %d results', progress.run_id, progress.total_results, extra=fields)
+    else:
+        logger.debug('Run %s %s: %d results', progress.run_id, progress.status, progress.total_results,
+                     extra=fields)
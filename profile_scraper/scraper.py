@@ -2,28 +2,73 @@
 Lobstr.io Twitter Scraper Integration
 Cost: $0.03 per 1,000 tweets (1,333x cheaper than Apify!)
 """
+import logging
 import requests
 import time
 import json
-from typing import Dict, Any, List, Optional
-from urllib.parse import urljoin, quote
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, quote, urlparse
+
+from .polling import RunPoller, RunProgress, log_progress
+from .metadata_cache import MetadataCache, fingerprint
+from .dialect import ApiDialect
+from .job_store import JobStore, job_id_for
+from .metrics import MetricsRegistry
+from .sharding import DateLike, as_date, date_windows, window_days
+from .singleflight import FlightStore, SingleFlight, flight_key
+from .squid_pool import SquidPool
+from .tweet import Tweet, transform_result
+from .transport import LobstrTransport
+from .tweet_store import TweetStore, tweet_key
+
+logger = logging.getLogger(__name__)
+
+
+def extract_handle(profile_url: str) -> str:
+    """
+    Normalize a profile reference to a bare, lowercase Twitter handle
+
+    Accepts '@user', 'user', 'x.com/user' and 'https://twitter.com/user/...'
+    """
+    ref = profile_url.strip()
+    if '/' in ref:
+        if '://' not in ref:
+            ref = f'https://{ref}'
+        path = urlparse(ref).path.strip('/')
+        ref = path.split('/')[0] if path else ''
+    return ref.lstrip('@').lower()
 
 
 class LobstrTwitterScraper:
     """Twitter scraper using Lobstr.io API"""
     
-    def __init__(self, api_key: str, twitter_auth_token: str = None, twitter_ct0: str = None):
-        self.base_url = 'https://api.lobstr.io/v1/'
+    def __init__(self, api_key: str, twitter_auth_token: str = None, twitter_ct0: str = None,
+                 prefetch_window: int = 4, metadata_cache: MetadataCache = None,
+                 transport: LobstrTransport = None, base_url: str = 'https://api.lobstr.io/v1/',
+                 metrics: MetricsRegistry = None):
+        # Override base_url to target a local stand-in (see mock_server.py)
+        self.base_url = base_url
         self.api_key = api_key
         self.twitter_auth_token = twitter_auth_token
         self.twitter_ct0 = twitter_ct0
         
         # Setup session with authentication
+        # All calls go through the transport (rate limit, retries, circuit breaker)
+        self.transport = transport or LobstrTransport()
         self.session = requests.Session()
         self.session.headers.update({
             'Authorization': f'Token {self.api_key}',
             'Content-Type': 'application/json'
         })
+        # Keep enough pooled connections for the results prefetch window
+        self.prefetch_window = max(1, prefetch_window)
+        for prefix in ('https://', 'http://'):
+            self.session.mount(prefix, HTTPAdapter(pool_maxsize=max(10, self.prefetch_window)))
         
         # Crawler hashes
         self.crawler_hash = '1b16ff414d27920fb325b68436dbf5fc'  # Twitter Search
@@ -31,6 +76,38 @@ class LobstrTwitterScraper:
         self.sync_id = None
         self._last_run_params = None
         self._account_id = None
+        # total_results last seen per run, so collection can plan its pages
+        self._run_totals = {}
+        # Adaptive run status polling (fast start, backoff, ETA)
+        self.poller = RunPoller(self)
+        # Optional warm squid pool (see enable_squid_pool)
+        self.squid_pool = None
+        # Optional on-disk cache of account/sync/squid metadata shared across processes
+        self.metadata_cache = metadata_cache
+        # Which endpoint variants work for this API key (attach account, launch)
+        self.dialect = ApiDialect(api_key, metadata_cache)
+        # Optional coalescing of identical concurrent scrapes (see enable_coalescing)
+        self.singleflight = None
+        # Optional crash-resumable job checkpoints (see enable_checkpoints)
+        self.job_store = None
+        
+        # Per-attempt request/response hooks (see LobstrTransport); the metrics
+        # registry records latency, status codes, bytes and retries per operation
+        self.metrics = metrics or MetricsRegistry()
+        self.hooks = {'request': [], 'response': [self.metrics.observe]}
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on self.session through the shared transport"""
+        return self.transport.request(self.session, method, url, hooks=self.hooks, **kwargs)
+    
+    def add_hook(self, kind: str, hook: Callable):
+        """
+        Register a 'request' hook(method, url, attempt) or a 'response'
+        hook(metrics.RequestEvent), called for every attempt including retries
+        """
+        if kind not in self.hooks:
+            raise ValueError(f"Unknown hook kind {kind!r}; expected 'request' or 'response'")
+        self.hooks[kind].append(hook)
     
     def sync_twitter_account(self) -> str:
         """
@@ -43,6 +120,14 @@ class LobstrTwitterScraper:
             print("⚠️ Warning: No Twitter cookies provided. Some features may be limited.")
             return None
         
+        # Same cookies already synced by another process?
+        cache_name = self._sync_cache_name()
+        if self.metadata_cache:
+            cached = self.metadata_cache.get(self.api_key, cache_name)
+            if cached:
+                self.sync_id = cached
+                return cached
+        
         print('Syncing Twitter account...')
         
         payload = {
@@ -56,12 +141,14 @@ class LobstrTwitterScraper:
         url = urljoin(self.base_url, 'accounts/cookies')
         
         try:
-            response = self.session.post(url, json=payload)
+            response = self._request('POST', url, json=payload)
             
             if response.ok:
                 sync_id = response.json().get('id')
                 print(f'✅ Twitter account synced: {sync_id}')
                 self.sync_id = sync_id
+                if self.metadata_cache and sync_id:
+                    self.metadata_cache.set(self.api_key, cache_name, sync_id)
                 return sync_id
             else:
                 print(f'⚠️ Account sync failed: {response.status_code} - {response.text}')
@@ -70,10 +157,43 @@ class LobstrTwitterScraper:
             print(f'⚠️ Account sync error: {e}')
             return None
     
+    def _sync_cache_name(self) -> str:
+        return f'sync_id:{fingerprint(self.twitter_auth_token + self.twitter_ct0)}'
+
+    def _refresh_rejected_account(self, response) -> Optional[str]:
+        """
+        Drop the account and sync ids after a call carrying them was rejected
+
+        On a 4xx (other than 429 / slot limits) the cached ids may point at an
+        account Lobstr no longer has, so both are forgotten (in memory and in
+        the metadata cache), the cookies are synced again and the account is
+        looked up afresh.
+
+        Returns:
+            The new account id when it differs from the rejected one (worth a
+            retry), else None
+        """
+        if not 400 <= response.status_code < 500 or response.status_code == 429:
+            return None
+        if 'SlotsLimitExceeded' in response.text or not self._account_id:
+            return None
+        stale = self._account_id
+        print(f'⚠️ Request with account {stale} rejected ({response.status_code}); refreshing account ids')
+        self._account_id = None
+        self.sync_id = None
+        if self.metadata_cache:
+            self.metadata_cache.delete(self.api_key, 'account_id')
+            if self.twitter_auth_token and self.twitter_ct0:
+                self.metadata_cache.delete(self.api_key, self._sync_cache_name())
+        if self.twitter_auth_token and self.twitter_ct0:
+            self.sync_twitter_account()
+        fresh = self.get_primary_account_id()
+        return fresh if fresh and fresh != stale else None
+
     def list_squids(self) -> List[Dict[str, Any]]:
         """List all squids in account"""
         url = urljoin(self.base_url, 'squids')
-        response = self.session.get(url)
+        response = self._request('GET', url)
         
         if response.ok:
             data = response.json()
@@ -83,7 +203,7 @@ class LobstrTwitterScraper:
     def list_accounts(self) -> List[Dict[str, Any]]:
         """List connected accounts"""
         url = urljoin(self.base_url, 'accounts')
-        response = self.session.get(url)
+        response = self._request('GET', url)
         if response.ok:
             data = response.json()
             if isinstance(data, dict):
@@ -96,19 +216,25 @@ class LobstrTwitterScraper:
         """Return the first available account id (Twitter)"""
         if self._account_id:
             return self._account_id
+        if self.metadata_cache:
+            self._account_id = self.metadata_cache.get(self.api_key, 'account_id')
+            if self._account_id:
+                return self._account_id
         accounts = self.list_accounts()
         for acc in accounts:
             acc_id = acc.get('id') or acc.get('account_id')
             platform = acc.get('platform') or acc.get('type') or acc.get('name', '')
             if acc_id and ('twitter' in str(platform).lower() or not platform):
                 self._account_id = acc_id
+                if self.metadata_cache:
+                    self.metadata_cache.set(self.api_key, 'account_id', acc_id)
                 return acc_id
         return None
 
     def delete_squid(self, squid_id: str):
         """Delete a squid"""
         url = urljoin(self.base_url, f'squids/{squid_id}')
-        response = self.session.delete(url)
+        response = self._request('DELETE', url)
         
         if response.ok:
             print(f'✅ Deleted squid: {squid_id}')
@@ -132,12 +258,14 @@ class LobstrTwitterScraper:
             if squid_id:
                 self.delete_squid(squid_id)
     
-    def create_squid(self, crawler_hash: str, max_results: int = 1000) -> str:
+    def create_squid(self, crawler_hash: str, max_results: int = 1000, cleanup_on_limit: bool = True,
+                     concurrency: int = 1) -> str:
         """
         Create a new scraper instance (Squid)
-        Will cleanup old squids if slot limit reached
+        Will cleanup old squids if slot limit reached (unless cleanup_on_limit=False)
         
-        Uses max_pages and results_per_page to control result count
+        Uses max_pages and results_per_page to control result count; each run
+        crawls up to `concurrency` of the squid's tasks at a time
         
         Returns:
             Squid ID
@@ -155,7 +283,7 @@ class LobstrTwitterScraper:
         account_id = self.get_primary_account_id()
         payload = {
             'crawler': crawler_hash,
-            'concurrency': 1,
+            'concurrency': concurrency,
             'export_unique_results': True,
             'to_complete': False,
             # max_results goes at TOP LEVEL, not in params!
@@ -166,15 +294,22 @@ class LobstrTwitterScraper:
             payload['accounts'] = [account_id]
         
         url = urljoin(self.base_url, 'squids')
-        response = self.session.post(url, json=payload)
+        response = self._request('POST', url, json=payload)
         
         # If slot limit reached, cleanup and retry
-        if not response.ok and 'SlotsLimitExceeded' in response.text:
+        if not response.ok and 'SlotsLimitExceeded' in response.text and cleanup_on_limit:
             print('⚠️ Slot limit reached - cleaning up old squids...')
             self.cleanup_old_squids()
             
             # Retry creation
-            response = self.session.post(url, json=payload)
+            response = self._request('POST', url, json=payload)
+        
+        # Cached account gone? Retry once with a freshly looked-up one
+        if not response.ok and account_id:
+            fresh = self._refresh_rejected_account(response)
+            if fresh:
+                payload['accounts'] = [fresh]
+                response = self._request('POST', url, json=payload)
         
         if not response.ok:
             raise Exception(f'Squid creation failed: {response.status_code} - {response.text}')
@@ -196,7 +331,7 @@ class LobstrTwitterScraper:
         }
         
         url = urljoin(self.base_url, 'tasks')
-        response = self.session.post(url, json=payload)
+        response = self._request('POST', url, json=payload)
         
         if not response.ok:
             raise Exception(f'Task addition failed: {response.status_code} - {response.text}')
@@ -210,41 +345,30 @@ class LobstrTwitterScraper:
             print('ℹ️ No synced account to attach')
             return
         
-        print(f'Attaching account {account_id} to squid {squid_id}...')
-        
-        tried = []
-        # 1) POST /squids/{id}/accounts
         url_accounts = urljoin(self.base_url, f'squids/{squid_id}/accounts')
-        payload_accounts = {'accounts': [account_id]}
-        resp = self.session.post(url_accounts, json=payload_accounts)
-        tried.append(('POST', url_accounts, resp.status_code, resp.text))
-        if resp.ok:
-            print('✅ Account attached via /accounts endpoint')
-            return
-        
-        # 2) Try singular key
-        payload_account = {'account': account_id}
-        resp = self.session.post(url_accounts, json=payload_account)
-        tried.append(('POST', url_accounts, resp.status_code, resp.text))
-        if resp.ok:
-            print('✅ Account attached via singular key')
-            return
-        
-        # 3) PUT /squids/{id} with top-level accounts
         url_base = urljoin(self.base_url, f'squids/{squid_id}')
-        payload_top = {'accounts': [account_id]}
-        resp = self.session.put(url_base, json=payload_top)
-        tried.append(('PUT', url_base, resp.status_code, resp.text))
-        if resp.ok:
-            print('✅ Account attached via top-level PUT')
-            return
-        
-        # 4) POST /squids/{id} with top-level accounts
-        resp = self.session.post(url_base, json=payload_top)
-        tried.append(('POST', url_base, resp.status_code, resp.text))
-        if resp.ok:
-            print('✅ Account attached via top-level POST')
-            return
+        tried = []
+        while account_id:
+            print(f'Attaching account {account_id} to squid {squid_id}...')
+            variants = {
+                'accounts': ('POST', url_accounts, {'accounts': [account_id]}, 'via /accounts endpoint'),
+                'account': ('POST', url_accounts, {'account': account_id}, 'via singular key'),
+                'put': ('PUT', url_base, {'accounts': [account_id]}, 'via top-level PUT'),
+                'post': ('POST', url_base, {'accounts': [account_id]}, 'via top-level POST'),
+            }
+            
+            # The variant that worked last time goes first; the rest only if it fails
+            for name in self.dialect.order('attach_account', list(variants)):
+                method, url, payload, label = variants[name]
+                resp = self._request(method, url, json=payload)
+                tried.append((method, url, resp.status_code, resp.text))
+                if resp.ok:
+                    self.dialect.learn('attach_account', name)
+                    print(f'✅ Account attached {label}')
+                    return
+            
+            # Every variant rejected: retry once if the cached account id was stale
+            account_id = self._refresh_rejected_account(resp) if len(tried) == len(variants) else None
         
         # Log attempts for debugging
         print('⚠️ Failed to attach account; attempts:')
@@ -258,7 +382,7 @@ class LobstrTwitterScraper:
         url = urljoin(self.base_url, f'squids/{squid_id}')
         
         # Step 1: Get current squid data
-        response = self.session.get(url)
+        response = self._request('GET', url)
         if not response.ok:
             raise Exception(f'Failed to get squid: {response.status_code} - {response.text}')
         
@@ -274,7 +398,7 @@ class LobstrTwitterScraper:
                 print(f'  Attaching account {account_id} to squid...')
                 self.attach_account_to_squid(squid_id)
                 # Refresh squid data after attaching account
-                response = self.session.get(url)
+                response = self._request('GET', url)
                 if response.ok:
                     squid = response.json()
         
@@ -301,13 +425,13 @@ class LobstrTwitterScraper:
         
         # Step 4: POST to update (this is what the UI does!)
         print(f'  Sending POST to {url} with params: {payload["params"]}')
-        response = self.session.post(url, json=payload)
+        response = self._request('POST', url, json=payload)
         
         if not response.ok:
             raise Exception(f'Failed to configure squid: {response.status_code} - {response.text}')
         
         # Step 5: Verify it worked
-        response = self.session.get(url)
+        response = self._request('GET', url)
         if response.ok:
             squid = response.json()
             actual = squid.get('params', {}).get('max_unique_results_per_run')
@@ -338,34 +462,40 @@ class LobstrTwitterScraper:
             payload['max_unique_results_per_run'] = max_results
             print(f'  Setting max_unique_results_per_run={max_results} at RUN level')
         
-        url = urljoin(self.base_url, 'runs')
-        response = self.session.post(url, json=payload)
-        if response.ok:
-            data = response.json()
-            run_id = data.get('id') or data.get('run') or data.get('run_id')
-            if not run_id:
-                raise Exception(f'Launch succeeded but no run id in response: {data}')
-            print(f'✅ Scraping job launched: {run_id}')
-            return run_id
+        variants = {
+            'runs': (urljoin(self.base_url, 'runs'), ''),
+            'squid_launch': (urljoin(self.base_url, f'squids/{squid_id}/launch'), ' (alt)'),
+        }
         
-        # Fallback: try /squids/{id}/launch endpoint
-        launch_url_alt = urljoin(self.base_url, f'squids/{squid_id}/launch')
-        response_alt = self.session.post(launch_url_alt, json=payload)
-        if response_alt.ok:
-            data = response_alt.json()
-            run_id = data.get('id') or data.get('run') or data.get('run_id')
-            if not run_id:
-                raise Exception(f'Alt launch succeeded but no run id in response: {data}')
-            print(f'✅ Scraping job launched (alt): {run_id}')
-            return run_id
+        # The endpoint that worked last time goes first; the other only if it fails
+        failures = []
+        names = self.dialect.order('launch', list(variants))
+        for name in names:
+            url, label = variants[name]
+            response = self._request('POST', url, json=payload)
+            if response.ok:
+                data = response.json()
+                run_id = data.get('id') or data.get('run') or data.get('run_id')
+                if not run_id:
+                    raise Exception(f'Launch succeeded but no run id in response: {data}')
+                self.dialect.learn('launch', name)
+                print(f'✅ Scraping job launched{label}: {run_id}')
+                return run_id
+            failures.append(response)
+            # Both endpoints rejected our cached account: retry them once with a fresh one
+            if len(failures) == len(names) and account_id and payload.get('accounts') == [account_id]:
+                fresh = self._refresh_rejected_account(response)
+                if fresh:
+                    payload['accounts'] = [fresh]
+                    names.extend(list(names))
         
         # Fetch squid info to display readiness flags
         info_url = urljoin(self.base_url, f'squids/{squid_id}')
-        info_resp = self.session.get(info_url)
+        info_resp = self._request('GET', info_url)
         if info_resp.ok:
             info = info_resp.json()
             print(f"  Squid is_ready={info.get('is_ready')} accounts={info.get('accounts')} params={info.get('params')}")
-        raise Exception(f'Launch failed: {response.status_code} - {response.text}')
+        raise Exception(f'Launch failed: {failures[0].status_code} - {failures[0].text}')
 
     def launch_instant_run(self, search_urls: List[str], max_results: int = 1000) -> Optional[str]:
         """Attempt to run without a squid by providing crawler directly"""
@@ -384,7 +514,11 @@ class LobstrTwitterScraper:
         if account_id:
             payload['accounts'] = [account_id]
         url = urljoin(self.base_url, 'runs')
-        resp = self.session.post(url, json=payload)
+        resp = self._request('POST', url, json=payload)
+        fresh = self._refresh_rejected_account(resp) if not resp.ok and account_id else None
+        if fresh:
+            payload['accounts'] = [fresh]
+            resp = self._request('POST', url, json=payload)
         if resp.ok:
             run_id = resp.json().get('id')
             print(f'✅ Instant run launched: {run_id}')
@@ -392,37 +526,51 @@ class LobstrTwitterScraper:
         print(f'⚠️ Instant run failed: {resp.status_code} - {resp.text}')
         return None
     
-    def wait_for_completion(self, run_id: str, timeout: int = 300) -> bool:
-        """Wait for scraping job to complete"""
-        print('Monitoring job progress...')
+    def get_run_status(self, run_id: str) -> Dict[str, Any]:
+        """Fetch a run's status payload (runs/{id})"""
+        url = urljoin(self.base_url, f'runs/{run_id}')
+        response = self._request('GET', url)
+        
+        if not response.ok:
+            raise Exception(f'Status check failed: {response.status_code}')
         
-        start_time = time.time()
+        run_data = response.json()
+        self._run_totals[run_id] = run_data.get('total_results')
+        return run_data
+    
+    def wait_for_completion(self, run_id: str, timeout: int = 300, expected_results: int = None,
+                            on_progress: Callable[[RunProgress], None] = log_progress) -> bool:
+        """
+        Wait for scraping job to complete
         
-        while time.time() - start_time < timeout:
-            url = urljoin(self.base_url, f'runs/{run_id}')
-            response = self.session.get(url)
-            
-            if not response.ok:
-                raise Exception(f'Status check failed: {response.status_code}')
-            
-            run_data = response.json()
-            
-            status = run_data.get('status', 'unknown')
-            if run_data.get('is_done') or status == 'done':
-                total = run_data.get('total_results', 0)
-                print(f'✅ Job completed! Total results: {total}')
-                return True
-            results = run_data.get('total_results', 0)
-            print(f'  Status: {status} - Results: {results}')
-            
-            time.sleep(10)
+        Polls adaptively (see polling.RunPoller): quickly at first, then
+        backing off, and timed to the ETA predicted from total_results growth
+        when expected_results is given.
+        """
+        print('Monitoring job progress...')
+        self.wait_for_runs([run_id], timeout=timeout,
+                           expected_results={run_id: expected_results} if expected_results else None,
+                           on_progress=on_progress)
+        return True
+    
+    def wait_for_runs(self, run_ids: List[str], timeout: int = 300, expected_results: Dict[str, int] = None,
+                      on_progress: Callable[[RunProgress], None] = log_progress) -> Dict[str, Dict[str, Any]]:
+        """
+        Wait for several runs in a single polling loop under one shared deadline
         
-        raise Exception('Job timeout')
+        Returns:
+            Final run data per run id
+        """
+        try:
+            return self.poller.wait(run_ids, deadline=time.time() + timeout,
+                                    targets=expected_results, on_progress=on_progress)
+        except TimeoutError as e:
+            raise Exception(f'Job timeout: {e}')
     
     def cancel_run(self, run_id: str) -> bool:
         """Cancel a running scraping job"""
         url = urljoin(self.base_url, f'runs/{run_id}/cancel')
-        response = self.session.post(url)
+        response = self._request('POST', url)
         
         if response.ok:
             print(f'✅ Run cancelled: {run_id}')
@@ -431,14 +579,26 @@ class LobstrTwitterScraper:
             print(f'⚠️ Cancel failed: {response.status_code} - {response.text}')
             return False
     
-    def collect_results(self, run_id: str, page_size: int = 100, max_results: int = None, cancel_early: bool = False) -> List[Dict[str, Any]]:
-        """Collect all results from completed job"""
+    def collect_results(self, run_id: str, page_size: int = 100, max_results: int = None, cancel_early: bool = False,
+                        prefetch: int = None) -> List[Dict[str, Any]]:
+        """
+        Collect all results from completed job
+        
+        Pages are prefetched concurrently (see _iter_result_pages) and
+        returned in order.
+        
+        Args:
+            prefetch: Page requests kept in flight (defaults to self.prefetch_window)
+        """
         print(f'Collecting results{f" (limit: {max_results})" if max_results else ""}...')
         
         all_results = []
-        page = 1
         
-        while True:
+        for page, results in self._iter_result_pages(run_id, page_size, max_results, prefetch):
+            all_results.extend(results)
+            logger.debug('Collected page %d: %d results (total: %d)', page, len(results), len(all_results),
+                         extra={'run_id': run_id, 'page': page, 'results': len(results), 'total': len(all_results)})
+            
             # If we have a max_results limit, check if we've reached it
             if max_results and len(all_results) >= max_results:
                 print(f'  Reached max_results limit: {max_results}')
@@ -447,31 +607,6 @@ class LobstrTwitterScraper:
                     print('  Attempting to cancel run to save credits...')
                     self.cancel_run(run_id)
                 break
-            
-            params = {
-                'run': run_id,
-                'page': page,
-                'page_size': page_size
-            }
-            
-            url = urljoin(self.base_url, 'results')
-            response = self.session.get(url, params=params)
-            
-            if not response.ok:
-                print(f'⚠️ Results collection warning: {response.status_code}')
-                break
-            
-            data = response.json()
-            results = data.get('data', [])
-            
-            if not results:
-                break
-            
-            all_results.extend(results)
-            print(f'  Collected page {page}: {len(results)} results (total: {len(all_results)})')
-            page += 1
-            
-            time.sleep(1)  # Rate limiting
         
         # Apply client-side limit if specified
         if max_results and len(all_results) > max_results:
@@ -481,6 +616,188 @@ class LobstrTwitterScraper:
         print(f'✅ Total results collected: {len(all_results)}')
         return all_results
     
+    def iter_results(self, run_id: str, page_size: int = 100, max_results: int = None,
+                     cancel_early: bool = False, prefetch: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream transformed tweets from a job, one results page at a time
+        
+        Only the pages in the prefetch window are held in memory, and
+        max_results is enforced as the stream runs: no further pages are
+        requested once it is reached.
+        
+        Yields:
+            Tweets in the standard format
+        """
+        print(f'Streaming results{f" (limit: {max_results})" if max_results else ""}...')
+        
+        yielded = 0
+        
+        for page, results in self._iter_result_pages(run_id, page_size, max_results, prefetch):
+            if max_results:
+                results = results[:max_results - yielded]
+            for item in results:
+                yield self._transform_result(item)
+            yielded += len(results)
+            logger.debug('Streamed page %d: %d results (total: %d)', page, len(results), yielded,
+                         extra={'run_id': run_id, 'page': page, 'results': len(results), 'total': yielded})
+            
+            if max_results and yielded >= max_results:
+                print(f'  Reached max_results limit: {max_results}')
+                if cancel_early:
+                    print('  Attempting to cancel run to save credits...')
+                    self.cancel_run(run_id)
+                break
+        
+        print(f'✅ Total results streamed: {yielded}')
+    
+    def iter_results_live(self, run_id: str, max_results: int = None, authors: List[str] = None,
+                          page_size: int = 100, cancel: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream tweets while the run is still in progress
+        
+        Re-reads the current /results page as the run fills it, polling with
+        the poller's backoff (min_interval .. max_interval) while nothing new
+        arrives. Only unique tweets by `authors` (when given) count towards
+        max_results; once that many have been yielded the run is cancelled,
+        so Lobstr stops scraping (and billing) the over-fetch.
+        
+        Args:
+            run_id: A launched run; no need to wait for completion first
+            max_results: Unique matching tweets to collect before stopping
+            authors: Handles to keep (case-insensitive); others are skipped
+            cancel: Call cancel_run when max_results is reached before the run is done
+            
+        Yields:
+            Tweets in the standard format
+        """
+        wanted = {a.lstrip('@').lower() for a in authors} if authors else None
+        seen = set()
+        yielded = skipped = 0
+        page, offset = 1, 0
+        interval = self.poller.min_interval
+        done = False
+        
+        while True:
+            results = self._fetch_results_page(run_id, page, page_size)
+            fresh, offset = results[offset:], len(results)
+            for item in fresh:
+                if wanted is not None and str(item.get('username') or '').lower() not in wanted:
+                    skipped += 1
+                    continue
+                key = tweet_key(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield self._transform_result(item)
+                yielded += 1
+                if max_results and yielded >= max_results:
+                    logger.info('Reached %d tweets on page %d', yielded, page,
+                                extra={'run_id': run_id, 'page': page, 'total': yielded, 'skipped': skipped})
+                    if cancel and not done:
+                        self.cancel_run(run_id)
+                    return
+            
+            if offset >= page_size:
+                # Page full: move on without waiting
+                page, offset = page + 1, 0
+                continue
+            if done:
+                # Already drained once after the run finished
+                break
+            if fresh:
+                interval = self.poller.min_interval
+            
+            logger.debug('Live page %d: %d results (total: %d)', page, offset, yielded,
+                         extra={'run_id': run_id, 'page': page, 'results': offset, 'total': yielded})
+            run_data = self.get_run_status(run_id)
+            done = bool(run_data.get('is_done') or run_data.get('status') == 'done')
+            if not done:
+                time.sleep(interval)
+                interval = min(self.poller.max_interval, interval * self.poller.backoff)
+        
+        if skipped:
+            print(f'  Ignored {skipped} results from other authors')
+        print(f'✅ Total results streamed: {yielded}')
+    
+    def _iter_result_pages(self, run_id: str, page_size: int = 100, max_results: int = None,
+                           prefetch: int = None, start_page: int = 1) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yield (page, results) for a run in page order, prefetching ahead
+        
+        Starts at start_page (e.g. when resuming a checkpointed collection).
+        
+        When the run's total_results is known (from wait_for_completion or a
+        single runs/{id} lookup) the page count is fixed up front and up to
+        `prefetch` page requests are kept in flight. Otherwise pages are read
+        one at a time until an empty page. Throttling is left to the
+        transport's shared rate limiter and the server's rate-limit headers.
+        """
+        window = max(1, prefetch or self.prefetch_window)
+        
+        total = self._run_totals.get(run_id)
+        if total is None:
+            total = self._get_run_total(run_id)
+        
+        if total:
+            wanted = min(total, max_results) if max_results else total
+            last_page = max(1, -(-wanted // page_size))
+        else:
+            # Unknown size: no safe way to prefetch past the end
+            last_page = None
+            window = 1
+        
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix='lobstr-results')
+        pending = {}
+        next_page = start_page
+        
+        def _submit_until_full(page_cursor):
+            while len(pending) < window and (last_page is None or page_cursor <= last_page):
+                pending[page_cursor] = executor.submit(self._fetch_results_page, run_id, page_cursor, page_size)
+                page_cursor += 1
+            return page_cursor
+        
+        try:
+            page = start_page
+            next_page = _submit_until_full(next_page)
+            while page in pending:
+                results = pending.pop(page).result()
+                if not results:
+                    break
+                next_page = _submit_until_full(next_page)
+                yield page, results
+                page += 1
+        finally:
+            # Consumer stopped early (limit reached or error): drop queued pages
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def _get_run_total(self, run_id: str) -> Optional[int]:
+        """Look up total_results for a run (None if unavailable)"""
+        try:
+            return self.get_run_status(run_id).get('total_results')
+        except Exception:
+            return None
+    
+    def _fetch_results_page(self, run_id: str, page: int, page_size: int) -> List[Dict[str, Any]]:
+        """
+        Fetch one /results page
+        
+        Rate limits and transient failures are handled by the transport; a
+        page that still fails raises instead of silently ending collection.
+        """
+        params = {
+            'run': run_id,
+            'page': page,
+            'page_size': page_size
+        }
+        url = urljoin(self.base_url, 'results')
+        response = self._request('GET', url, params=params)
+        
+        if not response.ok:
+            raise Exception(f'Results page {page} failed: {response.status_code} - {response.text[:200]}')
+        return response.json().get('data', [])
+    
     def build_search_url(self, search_term: str, filters: Dict[str, Any] = None) -> str:
         """
         Build Twitter search URL with filters
@@ -526,94 +843,489 @@ class LobstrTwitterScraper:
         
         return f'https://x.com/search?q={encoded_query}&src=typed_query&f=live'
     
-    def scrape_tweets(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def scrape_tweets(self, params: Dict[str, Any], live: bool = False) -> List[Dict[str, Any]]:
         """
         Main scraping method - compatible with existing pipeline
         
         Args:
             params: Search parameters (searchTerms, maxItems, filters, etc.)
+            live: Collect while the run is in progress and cancel it as soon as
+                maxItems tweets from the searched authors arrived (see iter_results_live)
             
         Returns:
             List of tweets
         """
         try:
-            # Sync account if not already synced
-            if not self.sync_id and self.twitter_auth_token:
-                self.sync_twitter_account()
+            search_urls, max_results = self._search_request(params)
+            authors = self._search_authors(params) if live else None
             
-            # Build search URLs from terms
-            search_terms = params.get('searchTerms', [])
-            if not search_terms:
-                raise ValueError("searchTerms is required")
+            if self.singleflight is not None:
+                # Share a run with identical in-flight requests (same or bigger maxItems)
+                return self.singleflight.do(flight_key(search_urls), max_results,
+                                            lambda: self._run_search(search_urls, max_results, live, authors))
+            return self._run_search(search_urls, max_results, live, authors)
             
-            search_urls = []
-            for term in search_terms:
-                url = self.build_search_url(term, params)
-                search_urls.append(url)
-            
-            max_results = params.get('maxItems', 100)
+        except Exception as e:
+            print(f'❌ Lobstr.io scraping failed: {e}')
+            import traceback
+            traceback.print_exc()
+            return []
+    
+    def _run_search(self, search_urls: List[str], max_results: int, live: bool = False,
+                    authors: List[str] = None) -> List[Dict[str, Any]]:
+        """Launch one run for search_urls, wait for it and return transformed tweets"""
+        if live:
+            with self._launched_run(search_urls, max_results) as run_id:
+                return list(self.iter_results_live(run_id, max_results=max_results, authors=authors))
+        if self.job_store is not None:
+            tweets = self._run_checkpointed(search_urls, max_results)
+            if tweets is not None:
+                return tweets
+        
+        # Launch, then wait while still holding the squid
+        with self._launched_run(search_urls, max_results) as run_id:
+            self.wait_for_completion(run_id, timeout=600, expected_results=max_results)
+        
+        results = self.collect_results(run_id, max_results=max_results)
+        
+        # Transform to standard format
+        return self._transform_results(results)
+    
+    def _run_checkpointed(self, search_urls: List[str], max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        _run_search with every step checkpointed to self.job_store
+        
+        The job is leased to this call (see JobStore) and the lease renewed
+        on every status poll and collected page. Only a job whose previous
+        owner's lease expired is resumed: one already holding a run id
+        re-attaches to that run and continues collecting after its last
+        checkpointed page, one that died between creating its squid and
+        launching deletes the half-configured squid and starts over. The
+        checkpoint is dropped once the job completes.
+        
+        Returns:
+            Transformed tweets, or None if another live worker holds the job
+        """
+        store = self.job_store
+        owner = uuid.uuid4().hex
+        job = store.claim(job_id_for(flight_key(search_urls), max_results), search_urls, max_results, owner)
+        if job is None:
+            print('⚠️ Another worker is running this search; scraping without a checkpoint')
+            return None
+        
+        def heartbeat(progress: RunProgress):
+            log_progress(progress)
+            store.heartbeat(job.job_id, owner)
+        
+        if job.run_id:
+            try:
+                self.get_run_status(job.run_id)
+                print(f'↩️ Resuming run {job.run_id} after page {job.last_page}')
+            except Exception as e:
+                print(f'⚠️ Checkpointed run {job.run_id} is gone ({e}); starting over')
+                store.reset(job.job_id, owner)
+                job = store.get(job.job_id)
+        elif job.squid_id:
+            print(f'Removing squid {job.squid_id} left by an interrupted job...')
+            self.delete_squid(job.squid_id)
+            store.reset(job.job_id, owner)
+            job = store.get(job.job_id)
+        
+        if not job.run_id:
+            on_squid = lambda squid_id: store.update(job.job_id, owner, squid_id=squid_id)
+            with self._launched_run(search_urls, max_results, on_squid=on_squid) as run_id:
+                store.update(job.job_id, owner, run_id=run_id)
+                job.run_id = run_id
+                self.wait_for_completion(run_id, timeout=600, expected_results=max_results,
+                                         on_progress=heartbeat)
+        else:
+            self.wait_for_completion(job.run_id, timeout=600, expected_results=max_results,
+                                     on_progress=heartbeat)
+        
+        results = store.results(job.job_id)
+        if not (max_results and len(results) >= max_results):
+            for page, page_results in self._iter_result_pages(job.run_id, max_results=max_results,
+                                                              start_page=job.last_page + 1):
+                results.extend(store.add_page(job, page, page_results))
+                logger.debug('Checkpointed page %d (total: %d)', page, len(results),
+                             extra={'run_id': job.run_id, 'page': page, 'total': len(results)})
+                if max_results and len(results) >= max_results:
+                    break
+        
+        store.finish(job.job_id, owner)
+        print(f'✅ Total results collected: {len(results[:max_results] if max_results else results)}')
+        return self._transform_results(results[:max_results] if max_results else results)
+    
+    def scrape_tweets_iter(self, params: Dict[str, Any], live: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of scrape_tweets
+        
+        Yields tweets page by page as they are collected, so callers can write
+        them to disk or a database while memory stays bounded to one page.
+        
+        Args:
+            params: Search parameters (searchTerms, maxItems, filters, etc.)
+            live: Yield tweets while the run is still in progress and cancel it
+                once maxItems tweets from the searched authors arrived
             
-            # Create squid with params & accounts so it's ready
-            squid_id = self.create_squid(self.crawler_hash, max_results=max_results)
+        Yields:
+            Tweets in the standard format, at most maxItems of them
             
-            # Add tasks
-            self.add_tasks(squid_id, search_urls)
+        Raises:
+            Whatever stopped the scrape, after the tweets yielded so far, so
+            callers can tell a partial stream from a complete one
+        """
+        try:
+            search_urls, max_results = self._search_request(params)
+            if live:
+                with self._launched_run(search_urls, max_results) as run_id:
+                    yield from self.iter_results_live(run_id, max_results=max_results,
+                                                      authors=self._search_authors(params))
+                return
+            with self._launched_run(search_urls, max_results) as run_id:
+                self.wait_for_completion(run_id, timeout=600, expected_results=max_results)
+            yield from self.iter_results(run_id, max_results=max_results)
             
-            # Try to configure (may be unsupported) but proceed regardless
-            try:
-                self.configure_squid(squid_id, max_results)
-            except Exception as cfg_err:
-                print(f'ℹ️ Skipping configure step: {cfg_err}')
+        except Exception as e:
+            print(f'❌ Lobstr.io scraping failed: {e}')
+            raise
+    
+    def _search_request(self, params: Dict[str, Any]) -> Tuple[List[str], int]:
+        """
+        Turn scrape_tweets params into search URLs and a result cap
+        
+        Returns:
+            (search_urls, max_results)
+        """
+        # Sync account if not already synced
+        if not self.sync_id and self.twitter_auth_token:
+            self.sync_twitter_account()
+        
+        # Build search URLs from terms
+        search_terms = params.get('searchTerms', [])
+        if not search_terms:
+            raise ValueError("searchTerms is required")
+        
+        search_urls = []
+        for term in search_terms:
+            url = self.build_search_url(term, params)
+            search_urls.append(url)
+        
+        max_results = params.get('maxItems', 100)
+        return search_urls, max_results
+    
+    @staticmethod
+    def _search_authors(params: Dict[str, Any]) -> Optional[List[str]]:
+        """Handles from from:<handle> operators, or None if any term has no author"""
+        authors = []
+        for term in params.get('searchTerms', []):
+            handles = [word[5:] for word in term.split() if word.lower().startswith('from:') and len(word) > 5]
+            if not handles:
+                return None
+            authors.extend(handles)
+        return authors or None
+    
+    @contextmanager
+    def _launched_run(self, search_urls: List[str], max_results: int,
+                      on_squid: Callable[[str], None] = None, concurrency: int = 1) -> Iterator[str]:
+        """
+        Prepare a squid for search_urls, launch it and yield the run id
+        
+        With a squid pool the squid is leased for the duration of the block,
+        so callers should wait for the run to finish inside it. Without one
+        a fresh squid is created and configured, and on_squid (if given) is
+        called with its id right after creation. The run crawls up to
+        `concurrency` of the search URLs at a time.
+        """
+        if self.squid_pool is not None:
+            with self.squid_pool.lease(search_urls, max_results, concurrency=concurrency) as squid_id:
+                yield self.launch_scraping(squid_id, max_results=max_results)
+            return
+        
+        # Create squid with params & accounts so it's ready
+        squid_id = self.create_squid(self.crawler_hash, max_results=max_results, concurrency=concurrency)
+        if on_squid:
+            on_squid(squid_id)
+        
+        # Add tasks
+        self.add_tasks(squid_id, search_urls)
+        
+        # Try to configure (may be unsupported) but proceed regardless
+        try:
+            self.configure_squid(squid_id, max_results)
+        except Exception as cfg_err:
+            print(f'ℹ️ Skipping configure step: {cfg_err}')
+        
+        # Launch with max_results at RUN level
+        yield self.launch_scraping(squid_id, max_results=max_results)
+    
+    def enable_squid_pool(self, size: int = 3, warm: bool = True, **kwargs) -> SquidPool:
+        """
+        Route scrapes through a pool of warm, pre-configured squids
+        
+        Each scrape then only swaps the squid's tasks (and result cap when it
+        changes) instead of creating and configuring a new squid. Call
+        squid_pool.close() when done so other processes can adopt its squids
+        without waiting for the claims to lapse (see SquidLeases).
+        """
+        self.squid_pool = SquidPool(self, size=size, **kwargs)
+        if warm:
+            self.squid_pool.warm()
+        return self.squid_pool
+    
+    def enable_checkpoints(self, store: JobStore = None) -> JobStore:
+        """
+        Checkpoint scrape_tweets jobs so a restarted worker resumes them
+        
+        Squid id, run id, last collected page and the tweets collected so far
+        go to a local JobStore (~/.cache/profile_scraper/jobs.sqlite3 by
+        default). Re-running the same search after a crash attaches to the
+        existing run instead of launching and paying for a new one, once the
+        crashed worker's lease (JobStore.lease, 120 s by default) has expired.
+        """
+        self.job_store = store or JobStore()
+        return self.job_store
+    
+    def enable_coalescing(self, store: FlightStore = None, shared: bool = False) -> SingleFlight:
+        """
+        Coalesce identical concurrent scrape_tweets calls into one run
+        
+        Requests with the same normalized search URLs share a run when an
+        in-flight one asks for at least as many tweets; smaller requests get
+        the first maxItems of its results. Threads in this process always
+        coalesce. Pass a FlightStore (or shared=True for the default one) to
+        coalesce with other worker processes on this machine as well.
+        """
+        if store is None and shared:
+            store = FlightStore()
+        self.singleflight = SingleFlight(store)
+        return self.singleflight
+    
+    def scrape_profiles(self, profile_urls: List[str], max_results_per_profile: int = 20,
+                        params: Dict[str, Any] = None,
+                        query_suffix: str = '-filter:retweets -filter:replies') -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Batch mode - scrape every profile of a submission in one squid and one run
+
+        All profiles become tasks on a single squid, share one launch and one
+        wait, and the results are split back out per author using
+        raw_data.username.
+
+        Lobstr's result cap is per run, not per task, so the run is capped at
+        max_results_per_profile * len(handles) and a prolific profile can use
+        up another's share. When a run hits that cap, the profiles that came
+        back short get a follow-up run of their own (repeated until no run is
+        capped), and every profile is trimmed to max_results_per_profile.
+
+        Args:
+            profile_urls: Profile URLs or handles (e.g. ProfileSubmission.profile_urls)
+            max_results_per_profile: Result cap applied to each profile
+            params: Optional search filters passed to build_search_url
+            query_suffix: Appended to every from:<handle> query
+
+        Returns:
+            Dict of handle -> list of tweets (every requested handle is present)
+        """
+        handles = []
+        for profile_url in profile_urls:
+            handle = extract_handle(profile_url)
+            if handle and handle not in handles:
+                handles.append(handle)
+
+        by_handle = {handle: [] for handle in handles}
+        if not handles:
+            return by_handle
+
+        try:
+            if not self.sync_id and self.twitter_auth_token:
+                self.sync_twitter_account()
+
+            seen = {handle: set() for handle in handles}
+            pending = handles
+            while pending:
+                search_urls = [
+                    self.build_search_url(f'from:{handle} {query_suffix}'.strip(), params)
+                    for handle in pending
+                ]
+                # The run-level cap is shared by every task, so budget for all pending profiles
+                run_max = max_results_per_profile * len(pending)
+
+                with self._launched_run(search_urls, run_max) as run_id:
+                    self.wait_for_completion(run_id, timeout=600, expected_results=run_max)
+                results = self.collect_results(run_id, max_results=run_max)
+
+                # Demultiplex by author and apply each profile's own cap
+                skipped = 0
+                for item in results:
+                    handle = str(item.get('username') or '').lower()
+                    bucket = by_handle.get(handle)
+                    if bucket is None or handle not in pending:
+                        skipped += 1
+                    elif len(bucket) < max_results_per_profile and tweet_key(item) not in seen[handle]:
+                        seen[handle].add(tweet_key(item))
+                        bucket.append(item)
+                if skipped:
+                    print(f'  Ignored {skipped} results from other authors')
+
+                # Short profiles of an uncapped run have no more tweets; after a capped
+                # run they may have been crowded out, so they get a run of their own.
+                # A capped run with a short profile had some profile over its share,
+                # which is now full, so every follow-up has fewer profiles.
+                if len(results) < run_max:
+                    break
+                pending = [h for h in pending if len(by_handle[h]) < max_results_per_profile]
+                if pending:
+                    print(f'  Run hit its shared cap; follow-up run for {len(pending)} short profiles')
+
+            for handle in handles:
+                by_handle[handle] = self._transform_results(by_handle[handle])
+                print(f'  @{handle}: {len(by_handle[handle])} tweets')
+
+        except Exception as e:
+            print(f'❌ Lobstr.io batch scraping failed: {e}')
+            import traceback
+            traceback.print_exc()
+
+        return by_handle
+
+    def scrape_profile_incremental(self, profile_url: str, store: TweetStore, max_results: int = 100,
+                                   params: Dict[str, Any] = None,
+                                   query_suffix: str = '-filter:retweets -filter:replies') -> List[Dict[str, Any]]:
+        """
+        Scrape only tweets newer than the profile's stored history
+        
+        Looks up the newest stored published_at for the author and adds a
+        since: filter (via build_search_url's 'start'), merges the new tweets
+        into the store and returns the full merged history. since: has day
+        granularity, so tweets from that last day are fetched again and
+        de-duplicated by tweet id.
+        
+        Args:
+            profile_url: Profile URL or handle
+            store: TweetStore holding previously scraped tweets
+            max_results: Cap on new tweets fetched in this run
+            params: Optional extra search filters
             
-            # Launch with max_results at RUN level
-            run_id = self.launch_scraping(squid_id, max_results=max_results)
+        Returns:
+            Stored tweets for the profile, newest first
+        """
+        handle = extract_handle(profile_url)
+        search_params = dict(params or {})
+        
+        latest = store.latest_published_at(handle)
+        if latest:
+            search_params['start'] = latest[:10]
+            print(f'@{handle}: {store.count(handle)} tweets stored, fetching since {latest[:10]}')
+        
+        search_params['searchTerms'] = [f'from:{handle} {query_suffix}'.strip()]
+        search_params['maxItems'] = max_results
+        new_tweets = self.scrape_tweets(search_params)
+        
+        added = store.add(new_tweets)
+        print(f'✅ @{handle}: {added} new tweets merged ({store.count(handle)} total)')
+        return store.get_tweets(handle)
+    
+    def scrape_profile_sharded(self, profile_url: str, start: DateLike, end: DateLike = None,
+                               max_results: int = 1000, params: Dict[str, Any] = None,
+                               query_suffix: str = '-filter:retweets -filter:replies',
+                               probe_days: int = 7, target_per_window: int = 200,
+                               max_windows: int = 50, max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Deep history scrape split into since:/until: date windows
+        
+        A probe scrape of the newest `probe_days` measures the posting rate.
+        The rest of [start, end) is then cut into windows expected to hold
+        about target_per_window tweets each (see sharding.window_days), and
+        every window becomes a task of a single run with squid concurrency
+        min(windows, max_concurrency), so Lobstr crawls the windows in
+        parallel instead of one serial from:<handle> search. Results are
+        merged, de-duplicated by tweet id and returned newest first.
+        
+        Args:
+            profile_url: Profile URL or handle
+            start: Oldest day to include ('YYYY-MM-DD' or date)
+            end: Day after the newest to include (default: tomorrow)
+            max_results: Cap on tweets returned
+            params: Optional extra search filters (start/end are set per window)
+            max_concurrency: Most windows crawled at once (bounded by the plan's slots)
             
-            # Wait and collect
-            self.wait_for_completion(run_id, timeout=600)
-            results = self.collect_results(run_id, max_results=max_results)
+        Returns:
+            Tweets in the standard format, newest first
+        """
+        handle = extract_handle(profile_url)
+        term = f'from:{handle} {query_suffix}'.strip()
+        start = as_date(start)
+        end = as_date(end) if end else date.today() + timedelta(days=1)
+        by_id: Dict[str, Dict[str, Any]] = {}
+        
+        try:
+            # Probe the newest window to learn the posting rate
+            probe_start = max(start, end - timedelta(days=probe_days))
+            probe_cap = min(max_results, target_per_window)
+            probe = self.scrape_tweets(dict(params or {}, searchTerms=[term], maxItems=probe_cap,
+                                            start=probe_start.isoformat(), end=end.isoformat()))
+            for tweet in probe:
+                by_id.setdefault(tweet_key(tweet), tweet)
             
-            # Transform to standard format
-            return self._transform_results(results)
+            remaining_end = probe_start
+            span_start = probe_start
+            if len(probe) >= probe_cap:
+                # Probe hit its cap: it only covers back to its oldest tweet's day
+                oldest = min((t['raw_data'].get('published_at') or '' for t in probe), default='')
+                if oldest:
+                    span_start = as_date(oldest)
+                    remaining_end = span_start + timedelta(days=1)
+            span_days = max(1, (end - span_start).days)
+            rate = len(probe) / span_days
             
+            wanted = max_results - len(by_id)
+            if remaining_end > start and wanted > 0:
+                days = window_days(rate, target_per_window, (remaining_end - start).days, max_windows)
+                windows = date_windows(start, remaining_end, days)
+                print(f'@{handle}: {rate:.1f} tweets/day in probe, {len(windows)} windows of {days} days')
+                
+                search_urls = [self.build_search_url(term, dict(params or {}, start=since, end=until))
+                               for since, until in windows]
+                concurrency = max(1, min(len(windows), max_concurrency))
+                with self._launched_run(search_urls, wanted, concurrency=concurrency) as run_id:
+                    self.wait_for_completion(run_id, timeout=600, expected_results=wanted)
+                for tweet in self._transform_results(self.collect_results(run_id, max_results=wanted)):
+                    by_id.setdefault(tweet_key(tweet), tweet)
+        
         except Exception as e:
-            print(f'❌ Lobstr.io scraping failed: {e}')
+            print(f'❌ Lobstr.io sharded scraping failed: {e}')
             import traceback
             traceback.print_exc()
-            return []
+        
+        tweets = sorted(by_id.values(), key=lambda t: t['raw_data'].get('published_at') or '', reverse=True)
+        print(f'✅ @{handle}: {min(len(tweets), max_results)} unique tweets from {start} to {end}')
+        return tweets[:max_results]
     
     def _transform_results(self, raw_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform Lobstr.io results to standard tweet format"""
-        transformed = []
-        
-        for item in raw_results:
-            # Extract tweet data from Lobstr.io response
-            # Adapt field names based on actual Lobstr.io response structure
-            tweet = {
-                'id': item.get('tweet_id') or item.get('id') or '',
-                'tweet_id': item.get('tweet_id') or item.get('id') or '',
-                'text': item.get('text') or item.get('full_text') or '',
-                'created_at': item.get('created_at') or item.get('timestamp'),
-                'author': {
-                    'userName': item.get('username') or item.get('author_username') or '',
-                    'fullName': item.get('author_name') or '',
-                    'followers': item.get('author_followers') or item.get('followers_count') or 0,
-                    'following': item.get('author_following') or item.get('following_count') or 0,
-                    'verified': item.get('verified') or False,
-                },
-                'retweetCount': item.get('retweet_count') or item.get('retweets') or 0,
-                'likeCount': item.get('like_count') or item.get('likes') or item.get('favorites') or 0,
-                'replyCount': item.get('reply_count') or item.get('replies') or 0,
-                'quoteCount': item.get('quote_count') or item.get('quotes') or 0,
-                'viewCount': item.get('view_count') or item.get('views') or 0,
-                'media': item.get('media') or [],
-                'hashtags': item.get('hashtags') or [],
-                'urls': item.get('urls') or [],
-                'raw_data': item,  # Store full raw data
-            }
-            
-            transformed.append(tweet)
+        return [self._transform_result(item) for item in raw_results]
+    
+    def _transform_result(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Transform a single Lobstr.io result to standard tweet format"""
+        return transform_result(item)
+    
+    def iter_tweet_records(self, run_id: str, page_size: int = 100, max_results: int = None,
+                           keep_raw: bool = False, prefetch: int = None) -> Iterator[Tweet]:
+        """
+        Stream compact Tweet records (see tweet.Tweet) instead of dicts
         
-        return transformed
+        raw_data is only retained when keep_raw=True; Tweet.to_dict() rebuilds
+        the standard format when needed.
+        """
+        yielded = 0
+        for _, results in self._iter_result_pages(run_id, page_size, max_results, prefetch):
+            if max_results:
+                results = results[:max_results - yielded]
+            for item in results:
+                yield Tweet.from_result(item, keep_raw=keep_raw)
+            yielded += len(results)
+            if max_results and yielded >= max_results:
+                break
     
     def estimate_cost(self, max_items: int) -> float:
         """Estimate cost for scraping"""
@@ -624,7 +1336,7 @@ class LobstrTwitterScraper:
         """Check if Lobstr.io API is accessible"""
         try:
             url = urljoin(self.base_url, 'me')
-            response = self.session.get(url)
+            response = self._request('GET', url)
             
             if response.ok:
                 user_info = response.json()
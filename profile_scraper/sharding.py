@@ -0,0 +1,50 @@
+"""
+Date-window sharding for deep profile history scrapes
+Splits a since:/until: date range into windows so one profile's history can
+be scraped as many tasks that Lobstr runs in parallel, instead of a single
+serial from:<handle> crawl. Window size follows the posting rate observed in
+a first probe window.
+"""
+import math
+from datetime import date, timedelta
+from typing import List, Tuple, Union
+
+DateLike = Union[str, date]
+
+
+def as_date(value: DateLike) -> date:
+    """'YYYY-MM-DD' (or a longer ISO timestamp) or a date"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def date_windows(start: DateLike, end: DateLike, days: int) -> List[Tuple[str, str]]:
+    """
+    Consecutive (since, until) windows covering [start, end), newest first
+
+    until: is exclusive, matching Twitter search, so windows meet without
+    overlapping. The oldest window may be shorter than `days`.
+    """
+    start, end = as_date(start), as_date(end)
+    days = max(1, int(days))
+    windows = []
+    until = end
+    while until > start:
+        since = max(start, until - timedelta(days=days))
+        windows.append((since.isoformat(), until.isoformat()))
+        until = since
+    return windows
+
+
+def window_days(tweets_per_day: float, target_per_window: int, span_days: int,
+                max_windows: int = 50, max_days: int = 365) -> int:
+    """
+    Window length expected to hold about target_per_window tweets
+
+    Widened when that would need more than max_windows windows for span_days.
+    """
+    if tweets_per_day > 0:
+        days = math.floor(target_per_window / tweets_per_day)
+    else:
+        days = max_days
+    days = max(1, min(max_days, days))
+    return max(days, math.ceil(span_days / max_windows))
@@ -0,0 +1,245 @@
+"""
+Singleflight coalescing of identical scrape requests
+Concurrent scrapes of the same normalized search share one Lobstr run: the
+first caller (the leader) launches it and every other caller waits for its
+result. A waiter asking for fewer tweets is served from a bigger run's
+results. Threads in one process coalesce through SingleFlight itself; worker
+processes coalesce through a FlightStore (SQLite) on local disk.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+DEFAULT_FLIGHT_PATH = Path.home() / '.cache' / 'profile_scraper' / 'flights.sqlite3'
+
+
+class FlightFailed(Exception):
+    """The leader's scrape raised; waiters see its message"""
+
+
+def normalize_search_url(url: str) -> str:
+    """Canonical form of an x.com search URL: lowercased, sorted query operators"""
+    query = unquote(parse_qs(urlparse(url).query).get('q', [''])[0])
+    return ' '.join(sorted(query.lower().split()))
+
+
+def flight_key(search_urls: Iterable[str]) -> str:
+    """Key shared by requests for the same set of searches, in any order"""
+    return '\n'.join(sorted({normalize_search_url(u) for u in search_urls}))
+
+
+class _Flight:
+    def __init__(self, max_results: Optional[int]):
+        self.max_results = max_results
+        self.done = threading.Event()
+        self.result: Optional[List[Any]] = None
+        self.error: Optional[BaseException] = None
+
+    def covers(self, max_results: Optional[int]) -> bool:
+        # None means uncapped, which serves everything
+        return self.max_results is None or (max_results is not None and max_results <= self.max_results)
+
+
+class FlightStore:
+    """
+    Cross-process flight table
+
+    One row per (key, max_results). A process claims a flight by inserting
+    its row in an IMMEDIATE transaction, so exactly one process leads; the
+    rest poll until the row is done. Finished results linger for `ttl`
+    seconds so requests arriving just after still reuse them, and a running
+    row older than `lease` seconds is treated as abandoned and taken over.
+    """
+
+    def __init__(self, path: str = None, ttl: float = 60.0, lease: float = 900.0, poll_interval: float = 0.5):
+        self.path = Path(path or os.environ.get('PROFILE_SCRAPER_FLIGHTS', DEFAULT_FLIGHT_PATH))
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS flights ('
+                ' key TEXT NOT NULL,'
+                ' max_results INTEGER NOT NULL,'  # -1 = uncapped
+                ' owner TEXT NOT NULL,'
+                ' status TEXT NOT NULL,'          # running | done | failed
+                ' result TEXT,'
+                ' updated_at REAL NOT NULL,'
+                ' PRIMARY KEY (key, max_results))'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _cap(max_results: Optional[int]) -> int:
+        return -1 if max_results is None else max_results
+
+    def _covering(self, conn: sqlite3.Connection, key: str, max_results: Optional[int], now: float):
+        """Newest live row able to serve max_results"""
+        cap = self._cap(max_results)
+        return conn.execute(
+            'SELECT max_results, owner, status, result FROM flights'
+            ' WHERE key = ? AND (max_results = -1 OR (? != -1 AND max_results >= ?))'
+            " AND ((status = 'running' AND updated_at > ?) OR (status = 'done' AND updated_at > ?))"
+            ' ORDER BY updated_at DESC LIMIT 1',
+            (key, cap, cap, now - self.lease, now - self.ttl),
+        ).fetchone()
+
+    def claim(self, key: str, max_results: Optional[int], owner: str) -> Tuple[str, Any]:
+        """
+        Returns:
+            ('leader', None), ('done', result) or ('running', flight max_results)
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._covering(conn, key, max_results, now)
+                if row is not None:
+                    cap, _, status, result = row
+                    return ('done', json.loads(result)) if status == 'done' else ('running', cap)
+                conn.execute(
+                    'INSERT OR REPLACE INTO flights (key, max_results, owner, status, result, updated_at)'
+                    " VALUES (?, ?, ?, 'running', NULL, ?)",
+                    (key, self._cap(max_results), owner, now),
+                )
+                return 'leader', None
+            finally:
+                conn.execute('COMMIT')
+
+    def finish(self, key: str, max_results: Optional[int], owner: str, result: List[Any] = None,
+               error: str = None):
+        """Publish the leader's result (or failure) to waiting processes"""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE flights SET status = ?, result = ?, updated_at = ?'
+                ' WHERE key = ? AND max_results = ? AND owner = ?',
+                ('failed' if error is not None else 'done',
+                 json.dumps(error if error is not None else result), time.time(),
+                 key, self._cap(max_results), owner),
+            )
+
+    def wait(self, key: str, max_results: Optional[int], cap: int) -> Optional[List[Any]]:
+        """
+        Poll the flight with result cap `cap` until it finishes
+
+        Returns:
+            Its result, or None if it vanished or went stale (caller should retry the claim)
+        """
+        while True:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT status, result, updated_at FROM flights WHERE key = ? AND max_results = ?',
+                    (key, cap),
+                ).fetchone()
+            if row is None:
+                return None
+            status, result, updated_at = row
+            if status == 'done':
+                return json.loads(result)
+            if status == 'failed':
+                raise FlightFailed(json.loads(result))
+            if time.time() - updated_at > self.lease:
+                return None
+            time.sleep(self.poll_interval)
+
+    def purge(self):
+        """Drop finished and abandoned flights"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM flights WHERE (status != 'running' AND updated_at <= ?) OR updated_at <= ?",
+                (now - self.ttl, now - self.lease),
+            )
+
+
+class SingleFlight:
+    """
+    Share one in-flight call per key between threads (and, with a store, processes)
+
+    do(key, max_results, fn) runs fn() unless a flight for key with a result
+    cap of at least max_results is already running, in which case it waits
+    for that flight and returns its result trimmed to max_results. The
+    leader's exception is re-raised in every waiter.
+    """
+
+    def __init__(self, store: FlightStore = None):
+        self.store = store
+        self.owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._flights: Dict[str, List[_Flight]] = {}
+
+    @staticmethod
+    def _trim(result: List[Any], max_results: Optional[int]) -> List[Any]:
+        return list(result if max_results is None else result[:max_results])
+
+    def do(self, key: str, max_results: Optional[int], fn: Callable[[], List[Any]]) -> List[Any]:
+        with self._lock:
+            for flight in self._flights.get(key, ()):
+                if flight.covers(max_results):
+                    break
+            else:
+                flight = None
+            if flight is None:
+                flight = _Flight(max_results)
+                self._flights.setdefault(key, []).append(flight)
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._trim(flight.result, max_results)
+
+        try:
+            flight.result = self._lead(key, max_results, fn)
+            return self._trim(flight.result, max_results)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                flights = self._flights.get(key, [])
+                if flight in flights:
+                    flights.remove(flight)
+                if not flights:
+                    self._flights.pop(key, None)
+            flight.done.set()
+
+    def _lead(self, key: str, max_results: Optional[int], fn: Callable[[], List[Any]]) -> List[Any]:
+        """Run fn for this process, coalescing with other processes when a store is set"""
+        if self.store is None:
+            return fn()
+        while True:
+            role, value = self.store.claim(key, max_results, self.owner)
+            if role == 'done':
+                return value
+            if role == 'running':
+                result = self.store.wait(key, max_results, value)
+                if result is not None:
+                    return result
+                continue
+            try:
+                result = fn()
+            except Exception as e:
+                self.store.finish(key, max_results, self.owner, error=str(e))
+                raise
+            self.store.finish(key, max_results, self.owner, result=result)
+            return result
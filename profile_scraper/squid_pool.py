@@ -0,0 +1,386 @@
+"""
+Warm squid pool for the Twitter Search crawler
+Keeps already-configured squids around and leases them to scrape jobs, so a
+scrape only swaps the squid's tasks (and its result cap when it changes)
+instead of creating, configuring and later deleting a squid every time.
+Pools in different processes on one machine record their squids and claim
+them through SquidLeases (SQLite), so two pools never swap tasks on the same
+squid.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin
+
+from .metadata_cache import fingerprint
+
+DEFAULT_LEASE_PATH = Path.home() / '.cache' / 'profile_scraper' / 'squid_leases.sqlite3'
+
+
+class SquidPoolExhausted(Exception):
+    """No pooled squid became free before the lease timeout"""
+
+
+class SquidLeases:
+    """
+    Cross-process membership and ownership of pooled squids
+
+    One row per squid: the pool it belongs to, its config payload, and the
+    owner holding it with when that claim lapses. Membership and claims live
+    in the same row, so a process reading the pool's squids also sees which
+    are taken. A pool claims a squid in an IMMEDIATE transaction before
+    adopting it and renews the claim every time it leases the squid out or
+    gets it back; squids of a pool that died become adoptable after `ttl`
+    seconds.
+    """
+
+    def __init__(self, path: str = None, ttl: float = 900.0):
+        self.path = Path(path or os.environ.get('PROFILE_SCRAPER_SQUID_LEASES', DEFAULT_LEASE_PATH))
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS squid_leases ('
+                ' squid_id TEXT PRIMARY KEY,'
+                ' pool TEXT NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' owner TEXT,'
+                ' expires_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def members(self, pool: str) -> Dict[str, Dict[str, Any]]:
+        """squid_id -> config payload of every squid recorded for pool, claimed or not"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT squid_id, payload FROM squid_leases WHERE pool = ? ORDER BY rowid',
+                                (pool,)).fetchall()
+        return {squid_id: json.loads(payload) for squid_id, payload in rows}
+
+    def claim(self, pool: str, squid_id: str, owner: str, payload: Dict[str, Any] = None) -> bool:
+        """
+        Claim (or renew owner's claim on) a squid for `ttl` seconds
+
+        A squid not yet recorded becomes a member of pool with `payload`.
+
+        Returns:
+            False if another owner's claim is still live
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT owner, expires_at FROM squid_leases WHERE squid_id = ?',
+                               (squid_id,)).fetchone()
+            if row is None:
+                conn.execute('INSERT INTO squid_leases (squid_id, pool, payload, owner, expires_at)'
+                             ' VALUES (?, ?, ?, ?, ?)',
+                             (squid_id, pool, json.dumps(payload or {}), owner, now + self.ttl))
+                return True
+            if row[0] not in (None, owner) and row[1] > now:
+                return False
+            conn.execute('UPDATE squid_leases SET owner = ?, expires_at = ? WHERE squid_id = ?',
+                         (owner, now + self.ttl, squid_id))
+        return True
+
+    def save(self, squid_id: str, owner: str, payload: Dict[str, Any]):
+        """Record a claimed squid's new config payload"""
+        with self._connect() as conn:
+            conn.execute('UPDATE squid_leases SET payload = ? WHERE squid_id = ? AND owner = ?',
+                         (json.dumps(payload), squid_id, owner))
+
+    def release(self, squid_ids: Iterable[str], owner: str):
+        """Drop owner's claims (squids stay members) so other pools can adopt them right away"""
+        with self._connect() as conn:
+            conn.executemany('UPDATE squid_leases SET owner = NULL, expires_at = 0 WHERE squid_id = ? AND owner = ?',
+                             [(squid_id, owner) for squid_id in squid_ids])
+
+    def forget(self, squid_id: str):
+        """Drop a squid that no longer works from its pool"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM squid_leases WHERE squid_id = ?', (squid_id,))
+
+
+class SquidPool:
+    """
+    Lease warm squids to scrape jobs
+
+    Squids are named `<name_prefix>-<n>` so a new process can adopt the pool a
+    previous one left behind (see warm). The pool only ever touches its own
+    squids: it adopts a squid only after claiming it in `leases`, and when the
+    account's slot limit is hit it waits for a lease to be returned instead of
+    deleting squids other workers may be running. Pools on other machines
+    sharing the API key need their own name_prefix.
+    """
+
+    def __init__(self, scraper, size: int = 3, name_prefix: str = 'pattern-analyzer-pool',
+                 leases: SquidLeases = None):
+        self.scraper = scraper
+        self.size = size
+        self.name_prefix = name_prefix
+        self.leases = leases or SquidLeases()
+        self.owner = uuid.uuid4().hex
+
+        self._cond = threading.Condition()
+        self._idle: List[str] = []
+        self._leased = set()
+        self._creating = 0
+        self._names = set()
+        # squid_id -> {'payload': POST body, 'tasks': [...] or None, 'max_results': int}
+        self._state: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def squid_ids(self) -> List[str]:
+        with self._cond:
+            return list(self._state)
+
+    def warm(self, count: int = None) -> List[str]:
+        """
+        Adopt this pool's existing squids, then create squids up to `count`
+
+        Squids recorded in `leases` by earlier processes are adopted without
+        a list_squids round trip; squids claimed by a live pool in another
+        process are skipped.
+
+        Returns:
+            All squid ids now in the pool
+        """
+        count = min(count or self.size, self.size)
+
+        members = self.leases.members(self._pool_key)
+        if members:
+            candidates = [dict(payload, id=squid_id) for squid_id, payload in members.items()]
+        else:
+            candidates = [squid for squid in self.scraper.list_squids()
+                          if squid.get('id') and (squid.get('name') or '').startswith(f'{self.name_prefix}-')]
+        for squid in candidates:
+            squid_id = squid['id']
+            # Reserve the name even when another pool holds the squid
+            with self._cond:
+                self._names.add(squid.get('name'))
+            if squid_id in self._state or len(self._state) >= self.size:
+                continue
+            if not self.leases.claim(self._pool_key, squid_id, self.owner, self._payload(squid)):
+                continue
+            self._adopt(squid_id, squid)
+            with self._cond:
+                self._idle.append(squid_id)
+
+        while len(self._state) < count:
+            squid_id = self._create_squid()
+            with self._cond:
+                self._idle.append(squid_id)
+                self._cond.notify()
+
+        print(f'✅ Squid pool warm: {len(self._state)} squids')
+        return self.squid_ids
+
+    @contextmanager
+    def lease(self, search_urls: List[str], max_results: int, timeout: float = 600,
+              concurrency: int = 1) -> Iterator[str]:
+        """
+        Lease a squid loaded with `search_urls`, capped at `max_results` and
+        crawling up to `concurrency` tasks at a time
+
+        Hold the lease until the run launched on it has finished; results can
+        be collected after it is returned.
+        """
+        deadline = time.time() + timeout
+        while True:
+            squid_id = self._acquire(max(0.0, deadline - time.time()))
+            if not self.leases.claim(self._pool_key, squid_id, self.owner):
+                # Our claim lapsed while idle and another process adopted it
+                self._retire(squid_id, forget=False)
+                self._release(squid_id)
+                continue
+            try:
+                self._prepare(squid_id, search_urls, max_results, concurrency)
+                break
+            except Exception:
+                self._release(squid_id)
+                # A stale squid (e.g. deleted since it was cached) is retired
+                # by _prepare; try another one, otherwise give up
+                if squid_id in self._state:
+                    raise
+        try:
+            yield squid_id
+        finally:
+            if not self.leases.claim(self._pool_key, squid_id, self.owner):
+                self._retire(squid_id, forget=False)
+            self._release(squid_id)
+
+    def close(self):
+        """Hand every squid back so other processes can adopt the pool right away"""
+        with self._cond:
+            squid_ids = list(self._state)
+            self._state.clear()
+            self._idle.clear()
+            self._names.clear()
+            self._cond.notify_all()
+        self.leases.release(squid_ids, self.owner)
+
+    def _acquire(self, timeout: float) -> str:
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    squid_id = self._idle.pop()
+                    self._leased.add(squid_id)
+                    return squid_id
+                if len(self._state) + self._creating < self.size:
+                    self._creating += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise SquidPoolExhausted(f'No pooled squid free after {timeout}s')
+                self._cond.wait(remaining)
+
+        try:
+            squid_id = self._create_squid()
+        except Exception:
+            with self._cond:
+                self._creating -= 1
+                # Slots are full: shrink to what we have and wait for a lease
+                if self._state:
+                    self.size = len(self._state)
+                    print(f'⚠️ Could not grow squid pool; continuing with {self.size} squids')
+                self._cond.notify_all()
+            if self._state:
+                return self._acquire(max(0.0, deadline - time.time()))
+            raise
+
+        with self._cond:
+            self._creating -= 1
+            self._leased.add(squid_id)
+        return squid_id
+
+    def _release(self, squid_id: str):
+        with self._cond:
+            self._leased.discard(squid_id)
+            if squid_id in self._state:
+                self._idle.append(squid_id)
+            self._cond.notify()
+
+    def _create_squid(self) -> str:
+        """Create and fully configure a new pooled squid (one-time cost)"""
+        with self._cond:
+            index = 0
+            while f'{self.name_prefix}-{index}' in self._names:
+                index += 1
+            name = f'{self.name_prefix}-{index}'
+            self._names.add(name)
+
+        try:
+            squid_id = self.scraper.create_squid(self.scraper.crawler_hash, max_results=100,
+                                                 cleanup_on_limit=False)
+        except Exception:
+            with self._cond:
+                self._names.discard(name)
+            raise
+        try:
+            self.scraper.configure_squid(squid_id, 100)
+        except Exception as cfg_err:
+            print(f'ℹ️ Skipping configure step: {cfg_err}')
+
+        response = self.scraper._request('GET', urljoin(self.scraper.base_url, f'squids/{squid_id}'))
+        squid = response.json() if response.ok else {}
+        squid['name'] = name
+        self.leases.claim(self._pool_key, squid_id, self.owner, self._payload(squid))
+        self._adopt(squid_id, squid, tasks=[])
+        # Persist the pool name so later processes can adopt this squid
+        self._post_config(squid_id, 100)
+        return squid_id
+
+    @property
+    def _pool_key(self) -> str:
+        """Pool membership scope in `leases`: API key, name prefix and crawler"""
+        return f'{fingerprint(self.scraper.api_key)}:{self.name_prefix}:{self.scraper.crawler_hash}'
+
+    @staticmethod
+    def _payload(squid: Dict[str, Any]) -> Dict[str, Any]:
+        """Squid config as POSTed back to squids/{id}"""
+        accounts = [acc['id'] if isinstance(acc, dict) else acc for acc in squid.get('accounts') or []]
+        payload = {
+            'name': squid.get('name'),
+            'no_line_breaks': squid.get('no_line_breaks', True),
+            'export_unique_results': squid.get('export_unique_results', True),
+            'to_complete': squid.get('to_complete', False),
+            'concurrency': squid.get('concurrency', 1),
+            'params': {
+                'max_results': (squid.get('params') or {}).get('max_results'),
+                'max_unique_results_per_run': (squid.get('params') or {}).get('max_unique_results_per_run'),
+            },
+        }
+        if accounts:
+            payload['accounts'] = accounts
+        return payload
+
+    def _adopt(self, squid_id: str, squid: Dict[str, Any], tasks: Optional[List[str]] = None):
+        payload = self._payload(squid)
+        with self._cond:
+            self._names.add(payload['name'])
+            self._state[squid_id] = {
+                'payload': payload,
+                # None means unknown leftovers: empty before the next run
+                'tasks': tasks,
+                'max_results': payload['params']['max_unique_results_per_run'],
+            }
+
+    def _prepare(self, squid_id: str, search_urls: List[str], max_results: int, concurrency: int = 1):
+        """Swap tasks, result cap and concurrency: 0-3 calls, usually 2"""
+        state = self._state[squid_id]
+
+        if state['tasks'] != list(search_urls):
+            if state['tasks'] is None or state['tasks']:
+                self._empty_tasks(squid_id)
+            state['tasks'] = []
+            self.scraper.add_tasks(squid_id, search_urls)
+            state['tasks'] = list(search_urls)
+
+        if state['max_results'] != max_results or state['payload'].get('concurrency', 1) != concurrency:
+            self._post_config(squid_id, max_results, concurrency)
+
+    def _post_config(self, squid_id: str, max_results: int, concurrency: int = 1):
+        state = self._state[squid_id]
+        payload = dict(state['payload'], concurrency=concurrency,
+                       params=dict(state['payload']['params'], max_unique_results_per_run=max_results))
+        response = self.scraper._request('POST', urljoin(self.scraper.base_url, f'squids/{squid_id}'), json=payload)
+        if not response.ok:
+            if response.status_code == 404:
+                self._retire(squid_id)
+            raise Exception(f'Failed to configure squid: {response.status_code} - {response.text}')
+        state['payload'] = payload
+        state['max_results'] = max_results
+        self.leases.save(squid_id, self.owner, payload)
+
+    def _empty_tasks(self, squid_id: str):
+        url = urljoin(self.scraper.base_url, f'squids/{squid_id}/empty')
+        response = self.scraper._request('POST', url, json={'type': 'url'})
+        if not response.ok:
+            # Stale tasks would be re-scraped: retire this squid from the pool
+            self._retire(squid_id)
+            raise Exception(f'Failed to empty squid tasks: {response.status_code} - {response.text}')
+
+    def _retire(self, squid_id: str, forget: bool = True):
+        """Drop a squid that can no longer be used from the pool (and, if forget, from `leases`)"""
+        with self._cond:
+            state = self._state.pop(squid_id, None)
+            if state:
+                self._names.discard(state['payload'].get('name'))
+            self._cond.notify_all()
+        print(f'⚠️ Retired squid {squid_id} from pool')
+        if forget:
+            self.leases.forget(squid_id)
@@ -0,0 +1,340 @@
+"""
+Inverted index over scraped tweet text
+Maps every word to the sorted ids of the tweets containing it (postings) and
+keeps each tweet's metrics next to it, so "tweets containing these terms,
+ranked by likes" is a few binary searches, one postings intersection and a
+top-k partition, without touching JSON dumps.
+
+An index is a directory of segments plus meta.json. Each segment holds .npy
+arrays (sorted 64-bit term hashes, postings offsets, postings, metric columns
+and text columns as in columnar.py) that are memory-mapped on open. add()
+writes a new segment for each scrape batch; compact() merges the segments
+into one.
+
+Requires numpy (pip install numpy).
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .analytics import ENGAGEMENT_METRICS, METRICS
+from .columnar import StringColumn
+from .hook_patterns import normalize, tokenize
+from .tweet import Tweet
+
+FORMAT_VERSION = 1
+
+# Stored per tweet to show or link a hit
+TEXT_FIELDS = ('status_id', 'author', 'content', 'tweet_url')
+# search() sort keys besides the METRICS
+DERIVED_SORTS = ('engagements', 'engagement_rate')
+# Each tweet is also posted under this term for its author (':' never survives tokenizing)
+AUTHOR_TERM = 'from:{}'
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('The tweet text index requires numpy: pip install numpy')
+
+
+def terms(text: str) -> Set[str]:
+    """Distinct index terms of a text (normalized words; # and @ dropped)"""
+    return {token.strip("'-") for token in tokenize(normalize(text))} - {''}
+
+
+def term_hash(term: str) -> int:
+    """Stable 64-bit term id (collisions are negligible at corpus vocabulary sizes)"""
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _intersect(docs, other, size: int):
+    """
+    Ids in both sorted unique arrays of doc ids below size
+
+    Binary-searches each of the (few) docs in other, or, when both are long,
+    marks other in a size-long bitmap and filters docs through it.
+    """
+    if not len(docs) or not len(other):
+        return docs[:0]
+    if len(docs) * 16 < len(other):
+        found = np.searchsorted(other, docs)
+        found[found == len(other)] = 0
+        return docs[other[found] == docs]
+    present = np.zeros(size, dtype=bool)
+    present[other] = True
+    return docs[present[docs]]
+
+
+class Segment:
+    """One immutable, memory-mapped batch of indexed tweets"""
+
+    def __init__(self, path: Path, mmap: bool = True):
+        self.path = path
+        self.mmap = mmap
+        self.term_hashes = self._load('terms')
+        self.offsets = self._load('postings.offsets')
+        self.postings = self._load('postings')
+        self.metrics = {name: self._load(name) for name in METRICS}
+        self.text = {
+            name: StringColumn(self._load(f'{name}.offsets'), self._load(f'{name}.data'))
+            for name in TEXT_FIELDS
+        }
+
+    def _load(self, name: str):
+        # Plain ndarray view of the mapping: np.memmap's __getitem__ costs microseconds per scalar lookup
+        return np.asarray(np.load(self.path / f'{name}.npy', mmap_mode='r' if self.mmap else None))
+
+    def __len__(self) -> int:
+        return len(self.metrics['likes'])
+
+    def postings_for(self, hashed: int):
+        """Sorted local doc ids containing the term (empty if absent)"""
+        i = int(np.searchsorted(self.term_hashes, np.uint64(hashed)))
+        if i == len(self.term_hashes) or self.term_hashes[i] != hashed:
+            return self.postings[:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def scores(self, docs, sort: str):
+        """Sort key of each doc: int64 for metrics and engagements, float64 for engagement_rate"""
+        if sort in METRICS:
+            return np.take(self.metrics[sort], docs)
+        engaged = sum(np.take(self.metrics[name], docs) for name in ENGAGEMENT_METRICS)
+        if sort == 'engagements':
+            return engaged
+        views = np.take(self.metrics['views'], docs)
+        return np.where(views > 0, engaged / np.maximum(views, 1), 0.0)
+
+    @staticmethod
+    def write(path: Path, term_hashes, offsets, postings, metrics: Dict[str, Any], text: Dict[str, StringColumn]):
+        path.mkdir(parents=True)
+        np.save(path / 'terms.npy', term_hashes)
+        np.save(path / 'postings.offsets.npy', offsets)
+        np.save(path / 'postings.npy', postings)
+        for name, values in metrics.items():
+            np.save(path / f'{name}.npy', values)
+        for name, column in text.items():
+            np.save(path / f'{name}.offsets.npy', column.offsets)
+            np.save(path / f'{name}.data.npy', column.data)
+
+
+def _concat_strings(columns: Sequence[StringColumn]) -> StringColumn:
+    offsets, base = [np.zeros(1, dtype=np.int64)], 0
+    for column in columns:
+        offsets.append(np.asarray(column.offsets[1:]) + base)
+        base += int(column.offsets[-1])
+    return StringColumn(np.concatenate(offsets), np.concatenate([np.asarray(c.data) for c in columns]))
+
+
+class TweetIndex:
+    """
+    Append-only inverted index of tweet text with per-tweet metrics
+
+    Tweets are identified by status id; adding one that is already indexed
+    is a no-op. Once more than max_segments segments exist, add() compacts
+    them so queries keep touching only a few arrays.
+    """
+
+    def __init__(self, path: str, max_segments: int = 8, mmap: bool = True):
+        _require_numpy()
+        self.path = Path(path)
+        self.max_segments = max_segments
+        self.mmap = mmap
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / 'meta.json'
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported index format version: {meta.get('version')}")
+        else:
+            meta = {'version': FORMAT_VERSION, 'segments': [], 'next_segment': 0}
+        self._meta = meta
+        self.segments = [Segment(self.path / name, mmap) for name in meta['segments']]
+        self._bases = self._doc_bases()
+        self._status_ids: Optional[Set[str]] = None
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.segments)
+
+    def _doc_bases(self) -> List[int]:
+        bases, base = [], 0
+        for segment in self.segments:
+            bases.append(base)
+            base += len(segment)
+        return bases
+
+    def _save_meta(self, names: List[str]):
+        self._meta['segments'] = names
+        tmp = self.path / 'meta.json.tmp'
+        tmp.write_text(json.dumps(self._meta, indent=2))
+        os.replace(tmp, self.path / 'meta.json')
+
+    def _new_segment_path(self) -> Path:
+        """
+        Reserve a fresh segment directory name
+
+        The advanced counter is saved before the directory is created, and names
+        left on disk by a write that crashed before an older version saved its
+        counter are skipped, so a crash mid-write never blocks later add() calls.
+        """
+        while True:
+            path = self.path / f"seg-{self._meta['next_segment']:06d}"
+            self._meta['next_segment'] += 1
+            if not path.exists():
+                break
+        self._save_meta(self._meta['segments'])
+        return path
+
+    def _open_segments(self, names: List[str], retired: Sequence[Path] = ()):
+        """Point meta.json at names, then reopen; retired segment directories are removed after"""
+        self._save_meta(names)
+        self.segments = [Segment(self.path / name, self.mmap) for name in names]
+        self._bases = self._doc_bases()
+        for path in retired:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def add(self, tweets: Iterable[Union[Tweet, Dict[str, Any]]]) -> int:
+        """
+        Index new tweets (standard dicts, raw Lobstr results or Tweet records) as one segment
+
+        Returns:
+            Number of tweets added (already indexed status ids are skipped)
+        """
+        if self._status_ids is None:
+            self._status_ids = {sid for s in self.segments for sid in s.text['status_id'].to_list()}
+        records, keys = [], []
+        for tweet in tweets:
+            record = tweet if isinstance(tweet, Tweet) else Tweet.from_dict(tweet)
+            key = record.status_id or str(record.id)
+            if key in self._status_ids:
+                continue
+            self._status_ids.add(key)
+            records.append(record)
+            keys.append(key)
+        if not records:
+            return 0
+
+        docs_by_term: Dict[str, List[int]] = {}
+        for doc, record in enumerate(records):
+            for term in terms(record.content) | {AUTHOR_TERM.format(record.author.lower())}:
+                docs_by_term.setdefault(term, []).append(doc)
+        vocabulary = list(docs_by_term)
+        hashes = np.fromiter((term_hash(t) for t in vocabulary), dtype=np.uint64, count=len(vocabulary))
+        order = np.argsort(hashes)
+        lists = [docs_by_term[vocabulary[i]] for i in order]
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(docs) for docs in lists], out=offsets[1:])
+        postings = np.fromiter((doc for docs in lists for doc in docs), dtype=np.int32, count=int(offsets[-1]))
+
+        metrics = {
+            name: np.fromiter((getattr(r, name) or 0 for r in records), dtype=np.int64, count=len(records))
+            for name in METRICS
+        }
+        text = {name: StringColumn.from_strings([getattr(r, name) for r in records]) for name in TEXT_FIELDS}
+        text['status_id'] = StringColumn.from_strings(keys)
+
+        path = self._new_segment_path()
+        Segment.write(path, hashes[order], offsets, postings, metrics, text)
+        self._open_segments(self._meta['segments'] + [path.name])
+        if len(self.segments) > self.max_segments:
+            self.compact()
+        return len(records)
+
+    def compact(self):
+        """Merge all segments into one"""
+        if len(self.segments) <= 1:
+            return
+        hashes, docs = [], []
+        for segment, base in zip(self.segments, self._bases):
+            hashes.append(np.repeat(np.asarray(segment.term_hashes), np.diff(segment.offsets)))
+            docs.append(np.asarray(segment.postings, dtype=np.int64) + base)
+        hashes, docs = np.concatenate(hashes), np.concatenate(docs)
+        order = np.lexsort((docs, hashes))
+        hashes, docs = hashes[order], docs[order]
+        unique, starts = np.unique(hashes, return_index=True)
+        offsets = np.append(starts, len(hashes)).astype(np.int64)
+
+        metrics = {name: np.concatenate([s.metrics[name] for s in self.segments]) for name in METRICS}
+        text = {name: _concat_strings([s.text[name] for s in self.segments]) for name in TEXT_FIELDS}
+        path = self._new_segment_path()
+        Segment.write(path, unique, offsets, docs.astype(np.int32), metrics, text)
+        self._open_segments([path.name], retired=[s.path for s in self.segments])
+
+    def search(self, query: Union[str, Sequence[str]], k: int = 10, sort: str = 'likes',
+               match: str = 'all', author: str = None) -> List[Dict[str, Any]]:
+        """
+        Top-k tweets containing the query terms
+
+        Args:
+            query: Text or list of terms (normalized like indexed text)
+            k: Number of hits
+            sort: A metric (likes, retweets, replies, quotes, bookmarks, views),
+                  'engagements' or 'engagement_rate'
+            match: 'all' terms (AND) or 'any' (OR)
+            author: Only tweets by this handle
+
+        Returns:
+            Hits, best first: status_id, author, content, tweet_url, every metric and score
+        """
+        if sort not in METRICS and sort not in DERIVED_SORTS:
+            raise ValueError(f'Unknown sort key: {sort}')
+        if match not in ('all', 'any'):
+            raise ValueError("match must be 'all' or 'any'")
+        wanted = terms(query) if isinstance(query, str) else {t for q in query for t in terms(q)}
+        if not wanted:
+            return []
+        hashed = [term_hash(t) for t in wanted]
+        author_hash = term_hash(AUTHOR_TERM.format(author.lstrip('@').lower())) if author else None
+
+        candidates = []         # (score, segment index, local doc)
+        for index, segment in enumerate(self.segments):
+            lists = sorted((segment.postings_for(h) for h in hashed), key=len)
+            if match == 'all':
+                # Start from the rarest term: each step costs len(docs) binary searches
+                docs = lists[0]
+                for other in lists[1:]:
+                    if not len(docs):
+                        break
+                    docs = _intersect(docs, other, len(segment))
+            else:
+                docs = np.unique(np.concatenate(lists))
+            if author_hash is not None and len(docs):
+                by_author = segment.postings_for(author_hash)
+                docs = _intersect(docs, by_author, len(segment))
+            if not len(docs):
+                continue
+            scores = segment.scores(docs, sort)
+            if len(docs) > k:
+                top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+                docs, scores = docs[top], scores[top]
+            candidates.extend(zip(scores.astype(np.float64).tolist(), [index] * len(docs), docs.tolist()))
+
+        candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+        return [self._hit(index, doc, score) for score, index, doc in candidates[:k]]
+
+    def _hit(self, index: int, doc: int, score: float) -> Dict[str, Any]:
+        segment = self.segments[index]
+        hit: Dict[str, Any] = {name: segment.text[name][doc] for name in TEXT_FIELDS}
+        hit.update({name: int(segment.metrics[name][doc]) for name in METRICS})
+        hit['score'] = score
+        return hit
+
+    def best_example(self, query: Union[str, Sequence[str]], sort: str = 'likes', author: str = None) -> Optional[str]:
+        """Text of the top hit, e.g. for a PatternCard example"""
+        hits = self.search(query, k=1, sort=sort, author=author)
+        return hits[0]['content'] if hits else None
+
+    def document_frequency(self, term: str) -> int:
+        """Number of indexed tweets containing term"""
+        normalized = terms(term)
+        if len(normalized) != 1:
+            return 0
+        hashed = term_hash(normalized.pop())
+        return sum(len(s.postings_for(hashed)) for s in self.segments)
@@ -0,0 +1,273 @@
+"""
+Rate-limit-aware HTTP transport for the Lobstr.io clients
+Every request goes through one shared token bucket, honors Retry-After and
+X-RateLimit-* headers, retries 429s and (for idempotent methods) 5xx and
+connection errors with jittered backoff, and trips a circuit breaker when the
+API keeps failing. The same transport can serve the sync requests.Session and
+the async httpx client, so threads and asyncio tasks share one budget.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import RequestEvent, operation_name
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+
+class CircuitOpenError(Exception):
+    """The Lobstr API has been failing; requests are short-circuited"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Open after `failure_threshold` consecutive failures, then allow a single
+    trial request once `reset_timeout` has passed (half-open)
+    """
+
+    def __init__(self, failure_threshold: int = 8, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError while open; True if this request is the half-open trial"""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError(f'Lobstr API circuit open after {self._failures} consecutive failures')
+            self._trial_in_flight = True
+            return True
+
+    def end_trial(self):
+        """Let the next request be a trial, however this one ended (even without a recorded outcome)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class LobstrTransport:
+    """
+    Shared request policy: rate limiting, retries and circuit breaking
+
+    request() wraps a requests.Session and arequest() an httpx.AsyncClient.
+    Both return the final response, so callers keep their usual status checks;
+    only exhausted connection errors and an open circuit raise.
+
+    Both also take `hooks`, a {'request': [...], 'response': [...]} dict:
+    request hooks are called as hook(method, url, attempt) before every
+    attempt and response hooks with a metrics.RequestEvent after it, retries
+    included.
+    """
+
+    def __init__(self, rate: float = 20.0, burst: float = 40.0, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                 breaker: CircuitBreaker = None):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # Server-requested pause (monotonic seconds) shared by every caller
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _should_retry(self, method: str, status: Optional[int]) -> bool:
+        if status == 429:
+            return True
+        # Replaying a POST could create a second squid or launch a second run
+        return method.upper() in IDEMPOTENT_METHODS and (status is None or status in RETRY_STATUSES)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _server_pause(self, status: int, headers: Any) -> Optional[float]:
+        """Pause requested via Retry-After or an exhausted X-RateLimit window"""
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                return 1.0
+        if headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+            try:
+                reset = float(headers['X-RateLimit-Reset'])
+            except ValueError:
+                return 1.0
+            # Reset is either an epoch timestamp or seconds from now
+            return reset - time.time() if reset > 1e9 else reset
+        return None
+
+    def _note_pause(self, pause: Optional[float]):
+        if pause and pause > 0:
+            with self._pause_lock:
+                self._pause_until = max(self._pause_until, time.monotonic() + pause)
+
+    def _pause_remaining(self) -> float:
+        return self._pause_until - time.monotonic()
+
+    def _classify(self, method: str, status: Optional[int], headers: Any, attempt: int) -> Optional[float]:
+        """Record the outcome; return a delay to retry after, or None to stop"""
+        if status is not None:
+            self._note_pause(self._server_pause(status, headers))
+        if status is None or status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        if attempt >= self.max_retries or not self._should_retry(method, status):
+            return None
+        return max(self._backoff(attempt), self._pause_remaining())
+
+    @staticmethod
+    def _emit(hooks: Optional[Dict[str, List[Callable]]], kind: str, *args):
+        for hook in (hooks or {}).get(kind, ()):
+            hook(*args)
+
+    @staticmethod
+    def _event(method: str, url: str, attempt: int, started: float, response=None,
+               error: Exception = None) -> RequestEvent:
+        """Describe one attempt (requests or httpx response) for response hooks"""
+        event = RequestEvent(operation_name(method, url), method.upper(), url, attempt,
+                             seconds=time.perf_counter() - started)
+        if response is None:
+            event.error = type(error).__name__ if error else None
+            return event
+        event.status = response.status_code
+        body = getattr(response.request, 'body', None)
+        if body is None:
+            body = getattr(response.request, 'content', None)
+        event.bytes_sent = len(body or b'')
+        event.bytes_received = len(response.content)
+        return event
+
+    def request(self, session, method: str, url: str, hooks: Dict[str, List[Callable]] = None, **kwargs):
+        """Send a request on a requests.Session under the shared policy"""
+        import requests
+
+        attempt = 0
+        while True:
+            trial = self.breaker.before_request()
+            # A trial that raises something unexpected must not keep the circuit shut
+            try:
+                pause = self._pause_remaining()
+                if pause > 0:
+                    time.sleep(pause)
+                self.bucket.acquire()
+
+                self._emit(hooks, 'request', method, url, attempt)
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    self._emit(hooks, 'response', self._event(method, url, attempt, started, error=e))
+                    delay = self._classify(method, None, {}, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self._emit(hooks, 'response', self._event(method, url, attempt, started, response))
+                    delay = self._classify(method, response.status_code, response.headers, attempt)
+                    if delay is None:
+                        return response
+            finally:
+                if trial:
+                    self.breaker.end_trial()
+
+            attempt += 1
+            time.sleep(delay)
+
+    async def arequest(self, client, method: str, url: str, hooks: Dict[str, List[Callable]] = None,
+                       **kwargs):
+        """Send a request on an httpx.AsyncClient under the shared policy"""
+        import httpx
+
+        attempt = 0
+        while True:
+            trial = self.breaker.before_request()
+            try:
+                pause = self._pause_remaining()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                await self.bucket.acquire_async()
+
+                self._emit(hooks, 'request', method, url, attempt)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except (httpx.TransportError,) as e:
+                    self._emit(hooks, 'response', self._event(method, url, attempt, started, error=e))
+                    delay = self._classify(method, None, {}, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self._emit(hooks, 'response', self._event(method, url, attempt, started, response))
+                    delay = self._classify(method, response.status_code, response.headers, attempt)
+                    if delay is None:
+                        return response
+            finally:
+                if trial:
+                    self.breaker.end_trial()
+
+            attempt += 1
+            await asyncio.sleep(delay)
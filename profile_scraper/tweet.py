@@ -0,0 +1,180 @@
+"""
+Compact tweet record
+A slotted dataclass holding one scraped tweet without the nested author dict,
+empty list fields and full raw_data copy of the standard dict format. Author
+handles are interned and the media_0..media_3 columns are folded into a tuple.
+Raw fields without a column of their own (user_id, is_retweeted, run, ...) are
+kept as a values tuple against a shared key layout. to_dict() rebuilds the
+standard format for existing consumers.
+"""
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+MEDIA_SLOTS = 4
+
+# (type, url, thumbnail)
+Media = Tuple[Optional[str], Optional[str], Optional[str]]
+
+# (keys, values): raw fields outside RAW_FIELDS, keys shared between records
+Extra = Tuple[Tuple[str, ...], Tuple[Any, ...]]
+
+# raw_data keys raw_view() rebuilds from the record's own fields
+RAW_FIELDS = frozenset({
+    'id', 'bookmarks_count', 'content', 'internal_unique_id', 'likes', 'name', 'published_at',
+    'quote_count', 'reply_count', 'retweet_count', 'tweet_url', 'username', 'views_count',
+    *(f'media_{i}_{part}' for i in range(MEDIA_SLOTS) for part in ('thumbnail', 'type', 'url')),
+})
+
+# Tweet count attribute -> raw result keys read for it, first truthy one wins
+COUNT_KEYS = {
+    'likes': ('likes', 'like_count', 'favorites'),
+    'retweets': ('retweet_count', 'retweets'),
+    'replies': ('reply_count', 'replies'),
+    'quotes': ('quote_count', 'quotes'),
+    'views': ('views_count', 'view_count', 'views'),
+    'bookmarks': ('bookmarks_count', 'bookmarks'),
+}
+AUTHOR_KEYS = ('username', 'author_username')
+
+_extra_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _first(item: Dict[str, Any], *keys, default=None):
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return default
+
+
+def _extra(item: Dict[str, Any]) -> Optional[Extra]:
+    """Raw fields outside RAW_FIELDS, with the key tuple shared by every record of that layout"""
+    keys = tuple(key for key in item if key not in RAW_FIELDS)
+    if not keys:
+        return None
+    keys = _extra_layouts.setdefault(keys, keys)
+    return keys, tuple(sys.intern(item[key]) if isinstance(item[key], str) else item[key] for key in keys)
+
+
+def transform_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a single Lobstr.io result to standard tweet format"""
+    # Extract tweet data from Lobstr.io response
+    # Adapt field names based on actual Lobstr.io response structure
+    return {
+        'id': item.get('tweet_id') or item.get('id') or '',
+        'tweet_id': item.get('tweet_id') or item.get('id') or '',
+        'text': item.get('text') or item.get('full_text') or '',
+        'created_at': item.get('created_at') or item.get('timestamp'),
+        'author': {
+            'userName': item.get('username') or item.get('author_username') or '',
+            'fullName': item.get('author_name') or '',
+            'followers': item.get('author_followers') or item.get('followers_count') or 0,
+            'following': item.get('author_following') or item.get('following_count') or 0,
+            'verified': item.get('verified') or False,
+        },
+        'retweetCount': item.get('retweet_count') or item.get('retweets') or 0,
+        'likeCount': item.get('like_count') or item.get('likes') or item.get('favorites') or 0,
+        'replyCount': item.get('reply_count') or item.get('replies') or 0,
+        'quoteCount': item.get('quote_count') or item.get('quotes') or 0,
+        'viewCount': item.get('view_count') or item.get('views') or 0,
+        'media': item.get('media') or [],
+        'hashtags': item.get('hashtags') or [],
+        'urls': item.get('urls') or [],
+        'raw_data': item,  # Store full raw data
+    }
+
+
+@dataclass(slots=True)
+class Tweet:
+    """One scraped tweet, stored once"""
+    id: Any                         # Lobstr result id
+    status_id: str                  # Twitter status id
+    author: str                     # handle, interned
+    name: str                       # display name, interned
+    content: str
+    published_at: Optional[str]
+    likes: int = 0
+    retweets: int = 0
+    replies: int = 0
+    quotes: int = 0
+    views: int = 0
+    bookmarks: int = 0
+    media: Tuple[Media, ...] = ()
+    tweet_url: str = ''
+    extra: Optional[Extra] = None               # remaining raw fields (see RAW_FIELDS)
+    raw_data: Optional[Dict[str, Any]] = None   # only kept when asked for
+
+    @classmethod
+    def from_result(cls, item: Dict[str, Any], keep_raw: bool = False) -> 'Tweet':
+        """Build from a raw Lobstr.io result"""
+        media = []
+        for i in range(MEDIA_SLOTS):
+            kind = item.get(f'media_{i}_type')
+            url = item.get(f'media_{i}_url')
+            if kind or url:
+                media.append((sys.intern(kind) if kind else kind, url, item.get(f'media_{i}_thumbnail')))
+
+        return cls(
+            id=item.get('tweet_id') or item.get('id') or '',
+            status_id=str(item.get('internal_unique_id') or ''),
+            author=sys.intern(_first(item, *AUTHOR_KEYS, default='')),
+            name=sys.intern(_first(item, 'name', 'author_name', default='')),
+            content=_first(item, 'content', 'text', 'full_text', default=''),
+            published_at=_first(item, 'published_at', 'created_at', 'timestamp'),
+            likes=_first(item, *COUNT_KEYS['likes'], default=0),
+            retweets=_first(item, *COUNT_KEYS['retweets'], default=0),
+            replies=_first(item, *COUNT_KEYS['replies'], default=0),
+            quotes=_first(item, *COUNT_KEYS['quotes'], default=0),
+            views=_first(item, *COUNT_KEYS['views'], default=0),
+            bookmarks=_first(item, *COUNT_KEYS['bookmarks'], default=0),
+            media=tuple(media),
+            tweet_url=item.get('tweet_url') or '',
+            extra=None if keep_raw else _extra(item),
+            raw_data=item if keep_raw else None,
+        )
+
+    @classmethod
+    def from_dict(cls, tweet: Dict[str, Any], keep_raw: bool = False) -> 'Tweet':
+        """Build from the standard dict format (e.g. the saved tests/*.json files)"""
+        return cls.from_result(tweet.get('raw_data') or tweet, keep_raw=keep_raw)
+
+    def raw_view(self) -> Dict[str, Any]:
+        """
+        raw_data as kept, or rebuilt from the record's fields
+
+        The rebuild equals the original Lobstr result, so
+        Tweet.from_dict(t).to_dict() == t for scraped tweets. Results in other
+        shapes come back in the Lobstr one: fields read through a fallback
+        name (text, like_count, ...) reappear under the Lobstr name, missing
+        RAW_FIELDS are filled in (None, '' or 0), and null counts become 0.
+        """
+        if self.raw_data is not None:
+            return self.raw_data
+        raw = {
+            'id': self.id,
+            'bookmarks_count': self.bookmarks,
+            'content': self.content,
+            'internal_unique_id': self.status_id or None,
+            'likes': self.likes,
+            'name': self.name,
+            'published_at': self.published_at,
+            'quote_count': self.quotes,
+            'reply_count': self.replies,
+            'retweet_count': self.retweets,
+            'tweet_url': self.tweet_url or None,
+            'username': self.author,
+            'views_count': self.views,
+        }
+        for i in range(MEDIA_SLOTS):
+            kind, url, thumbnail = self.media[i] if i < len(self.media) else (None, None, None)
+            raw[f'media_{i}_thumbnail'] = thumbnail
+            raw[f'media_{i}_type'] = kind
+            raw[f'media_{i}_url'] = url
+        if self.extra is not None:
+            raw.update(zip(*self.extra))
+        return raw
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The standard tweet dict produced by LobstrTwitterScraper"""
+        return transform_result(self.raw_view())
@@ -0,0 +1,113 @@
+"""
+Local tweet store for incremental profile scraping
+Keeps every scraped tweet in SQLite keyed by tweet id and author, so a profile
+that is submitted again only needs tweets newer than the ones already stored.
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_STORE_PATH = Path.home() / '.cache' / 'profile_scraper' / 'tweets.sqlite3'
+
+
+def tweet_key(tweet: Dict[str, Any]) -> str:
+    """
+    Stable Twitter status id for a scraped tweet
+
+    The top-level id of a scraped tweet is Lobstr's per-run result id, so
+    it changes between runs. Prefer the real status id from raw_data.
+    """
+    raw = tweet.get('raw_data') or tweet
+    status_id = raw.get('internal_unique_id')
+    if not status_id and raw.get('tweet_url'):
+        status_id = raw['tweet_url'].rstrip('/').rsplit('/', 1)[-1]
+    return str(status_id or tweet.get('tweet_id') or tweet.get('id') or '')
+
+
+def tweet_author(tweet: Dict[str, Any]) -> str:
+    raw = tweet.get('raw_data') or {}
+    author = raw.get('username') or (tweet.get('author') or {}).get('userName') or ''
+    return author.lower()
+
+
+class TweetStore:
+    """SQLite-backed tweet history, one row per (tweet id)"""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.environ.get('PROFILE_SCRAPER_TWEET_STORE', DEFAULT_STORE_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tweets ('
+                ' tweet_id TEXT PRIMARY KEY,'
+                ' author TEXT NOT NULL,'
+                ' published_at TEXT,'
+                ' data TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS tweets_author_published ON tweets (author, published_at)')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, tweets: Iterable[Dict[str, Any]]) -> int:
+        """
+        Merge tweets into the store (newer copies replace older ones)
+
+        Returns:
+            Number of tweets that were not stored before
+        """
+        rows = []
+        for tweet in tweets:
+            key = tweet_key(tweet)
+            if not key:
+                continue
+            raw = tweet.get('raw_data') or {}
+            rows.append((key, tweet_author(tweet), raw.get('published_at'),
+                         json.dumps(tweet, ensure_ascii=False)))
+        if not rows:
+            return 0
+
+        with self._connect() as conn:
+            before = conn.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+            conn.executemany('INSERT OR REPLACE INTO tweets (tweet_id, author, published_at, data) '
+                             'VALUES (?, ?, ?, ?)', rows)
+            after = conn.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+        return after - before
+
+    def latest_published_at(self, author: str) -> Optional[str]:
+        """Newest stored published_at for an author (ISO string) or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT MAX(published_at) FROM tweets WHERE author = ?',
+                               (author.lower(),)).fetchone()
+        return row[0] if row else None
+
+    def get_tweets(self, author: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Stored tweets for an author, newest first"""
+        query = 'SELECT data FROM tweets WHERE author = ? ORDER BY published_at DESC'
+        params = [author.lower()]
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._connect() as conn:
+            return [json.loads(data) for (data,) in conn.execute(query, params)]
+
+    def count(self, author: str = None) -> int:
+        with self._connect() as conn:
+            if author is None:
+                return conn.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+            return conn.execute('SELECT COUNT(*) FROM tweets WHERE author = ?',
+                                (author.lower(),)).fetchone()[0]
+
+    def authors(self) -> List[str]:
+        with self._connect() as conn:
+            return [author for (author,) in conn.execute('SELECT DISTINCT author FROM tweets ORDER BY author')]